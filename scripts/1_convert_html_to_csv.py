@@ -1,32 +1,69 @@
 import os
 import sys
-import glob
+import argparse
 
 # プロジェクトルートをPythonパスに追加
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.utils.html_parser import parse_html_to_csv
+from src.utils.html_parser import convert_sources
+from src.utils.extraction_schema import load_schemas, DEFAULT_SCHEMA_DIR
+from src.utils.table_io import DATA_FORMATS, DEFAULT_DATA_FORMAT, convert_csv_to_parquet
 
 
 def main():
-    """人事データのHTMLファイルをCSVに変換"""
-    # HTMLファイルのディレクトリ
-    html_dir = "data/raw/人事/htmls"
+    """各ソース（kintoneアプリ）のHTMLファイルをCSVに変換"""
+    parser = argparse.ArgumentParser(description="HTMLファイルをCSVに変換")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="並列プロセス数（0ならCPUコア数、デフォルト: 1 = 逐次処理）"
+    )
+    parser.add_argument(
+        "--schema-dir",
+        default=DEFAULT_SCHEMA_DIR,
+        help=f"ソースごとの抽出スキーマ（JSON）のディレクトリ（デフォルト: {DEFAULT_SCHEMA_DIR}）"
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        help="変換するソース名（複数指定可。省略時はすべてのソース）"
+    )
+    parser.add_argument(
+        "--format",
+        choices=DATA_FORMATS,
+        default=DEFAULT_DATA_FORMAT,
+        help="parquet: CSVに加えて型付きのParquet（更新日時は日時型）も出力する"
+    )
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count()
 
-    # CSVの出力先
-    output_csv = "data/raw/人事/人事.csv"
+    schemas = load_schemas(args.schema_dir)
+    if args.source:
+        schemas = [schema for schema in schemas if schema.name in args.source]
 
-    # HTMLファイルをすべて取得
-    html_files = sorted(glob.glob(os.path.join(html_dir, "*.html")))
-
-    if not html_files:
-        print(f"⚠ HTMLファイルが見つかりません: {html_dir}")
+    if not schemas:
+        print(f"⚠ 抽出スキーマが見つかりません: {args.schema_dir}")
         return
 
-    print(f"HTMLファイル数: {len(html_files)}件\n")
+    print(f"対象ソース: {', '.join(schema.name for schema in schemas)}")
+
+    # HTML to CSV変換（全ソースを1回の実行で処理）
+    totals = convert_sources(schemas, workers=workers)
+
+    print("\n【ソース別件数】")
+    for name, total in totals.items():
+        print(f"  {name}: {total}件")
 
-    # HTML to CSV変換
-    parse_html_to_csv(html_files, output_csv)
+    if args.format == "parquet":
+        print("\n【Parquet出力】")
+        for schema in schemas:
+            if not totals.get(schema.name):
+                print(f"  {schema.name}: 変換した行がないためスキップ")
+                continue
+            writer = convert_csv_to_parquet(schema.output_csv, schema.column_types)
+            print(f"  {schema.name}: {writer.path}（{writer.count}件）")
+            writer.timestamps.print_report(note="Parquetでは空の値として保存します")
 
 
 if __name__ == "__main__":
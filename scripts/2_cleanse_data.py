@@ -1,15 +1,112 @@
 import os
 import sys
 import csv
+import argparse
+from collections import defaultdict
 
 # プロジェクトルートをPythonパスに追加
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.utils.data_cleaner import merge_duplicate_corporations
-from src.utils.content_validator import ContentValidator
+from src.utils.data_cleaner import merge_duplicate_corporations, merge_corporation_records, write_merged_records
+from src.utils.content_validator import ContentValidator, VALIDATION_ERROR_REASON, split_by_verdicts
+from src.utils.cleansing_manifest import CleansingManifest, fingerprint_record, group_signature
+from src.utils.prefilter import PreFilter, DEFAULT_MODEL_PATH, is_local_verdict
+from src.utils.dedup import NearDuplicateDetector
+from src.utils.company_names import CompanyNameResolver
+from src.utils.table_io import (
+    DATA_FORMATS, DEFAULT_DATA_FORMAT, RECORD_COLUMN_TYPES, EXCLUDED_COLUMN_TYPES,
+    convert_csv_to_parquet, iter_records, resolve_input_path
+)
 
 
-def cleanse_and_validate(input_path, output_path, excluded_path):
+def validate_incrementally(validator, raw_records, manifest, micro_batch=False):
+    """
+    マニフェストに判定結果がないレコードだけをLLMで検証
+
+    Args:
+        validator: ContentValidator
+        raw_records: 元データのレコードリスト
+        manifest: CleansingManifest
+        micro_batch: 複数のログを1回のリクエストにまとめて判定するかどうか
+
+    Returns:
+        tuple: (valid_records, excluded_records)
+    """
+    fingerprints = [fingerprint_record(record) for record in raw_records]
+
+    # 未判定の指紋ごとに1件だけ検証する
+    pending = {}
+    for fp, record in zip(fingerprints, raw_records):
+        if manifest.get_verdict(fp) is None and fp not in pending:
+            pending[fp] = record
+
+    reused = sum(1 for fp in fingerprints if fp not in pending)
+    print(f"  判定済み（再利用）: {reused}件")
+    print(f"  新規・変更レコード: {len(pending)}件")
+
+    new_verdicts = {}
+    if pending:
+        verdicts = validator.validate_records(list(pending.values()), show_progress=True, micro_batch=micro_batch)
+        for fp, verdict in zip(pending, verdicts):
+            new_verdicts[fp] = verdict
+            # APIエラーで仮判定したものは次回再検証するため記録しない
+            # 前段フィルタの判定はモデル更新時に判定し直せるよう記録しない
+            if verdict.get('reason', '') != VALIDATION_ERROR_REASON and not is_local_verdict(verdict):
+                manifest.set_verdict(fp, verdict)
+
+    verdicts = [new_verdicts.get(fp) or manifest.get_verdict(fp) for fp in fingerprints]
+    return split_by_verdicts(raw_records, verdicts)
+
+
+def merge_incrementally(valid_records, output_path, manifest, name_resolver=None):
+    """
+    レコード構成が変わった法人だけを再統合してCSVに書き込む
+
+    Args:
+        valid_records: 有効なレコードリスト
+        output_path: 出力CSVファイルパス
+        manifest: CleansingManifest
+        name_resolver: 表記ゆれのある法人名をまとめる CompanyNameResolver（Noneなら完全一致）
+
+    Returns:
+        set: 統合後の法人名の集合
+    """
+    name_map = None
+    if name_resolver:
+        name_map = name_resolver.resolve(
+            [record['法人名'] for record in valid_records],
+            [record['更新日時'] for record in valid_records]
+        )
+        name_resolver.print_stats()
+
+    corp_records = defaultdict(list)
+    for record in valid_records:
+        corp_records[name_map[record['法人名']] if name_map else record['法人名']].append(record)
+
+    merged_records = []
+    remerged_count = 0
+
+    for corp_name, records in corp_records.items():
+        signature = group_signature([fingerprint_record(record) for record in records])
+        merged_record = manifest.get_merged(corp_name, signature)
+
+        if merged_record is None:
+            merged_record = merge_corporation_records(corp_name, records)
+            manifest.set_merged(corp_name, signature, merged_record)
+            remerged_count += 1
+
+        merged_records.append(merged_record)
+
+    write_merged_records(merged_records, output_path)
+
+    print(f"入力レコード数: {len(valid_records)}件")
+    print(f"ユニーク法人数: {len(corp_records)}社")
+    print(f"再統合した法人数: {remerged_count}社（変更なし: {len(corp_records) - remerged_count}社）")
+    return set(corp_records)
+
+
+def cleanse_and_validate(input_path, output_path, excluded_path, manifest_path=None, micro_batch=False,
+                         prefilter=None, dedup=False, normalize_names=False, data_format="csv"):
     """
     データのLLM検証とクレンジングを実行
 
@@ -17,47 +114,83 @@ def cleanse_and_validate(input_path, output_path, excluded_path):
     1. LLM検証 - 商談ログとして有効なレコードのみを抽出
     2. 重複統合 - 同じ法人名のレコードを時系列順にまとめる
 
+    manifest_path を指定すると差分モードで実行し、前回から追加・変更されたレコードだけを
+    LLMで検証し、レコード構成が変わった法人だけを再統合する。
+
     Args:
-        input_path: 入力CSVファイルパス
+        input_path: 入力ファイルパス（CSVまたはParquet）
         output_path: 出力CSVファイルパス（有効データ）
         excluded_path: 除外CSVファイルパス（無効データ）
+        manifest_path: 差分モードのマニフェストファイルパス（Noneなら全件処理）
+        micro_batch: 複数のログを1回のリクエストにまとめて判定するかどうか
+        prefilter: LLMの前段で明らかなものを判定する PreFilter（Noneなら全件LLMで判定）
+        dedup: 同じ・ほぼ同じ活動内容をまとめ、代表の1件だけを判定するかどうか
+        normalize_names: 表記ゆれ（株式会社/(株)、全角/半角など）のある法人名を1社にまとめるかどうか
+        data_format: "parquet" の場合は有効データ・除外データをParquetにも出力
     """
     # Step 1: LLM検証でメール文面などを除外
     print("\nStep 1: LLMによる商談判定を実行中...")
-    validator = ContentValidator()
+    validator = ContentValidator(prefilter=prefilter, deduplicator=NearDuplicateDetector() if dedup else None)
 
     # 元データを読み込み
-    with open(input_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        raw_records = list(reader)
+    raw_records = list(iter_records(input_path))
 
     print(f"  元データ: {len(raw_records)}件")
 
-    # 一括検証
-    valid_records, excluded_records = validator.validate_batch(
-        raw_records,
-        show_progress=True
-    )
+    # 一括検証（複数リクエストを並列に送信）
+    if micro_batch:
+        print("  マイクロバッチ: 複数のログを1回のリクエストにまとめて判定")
+    else:
+        print(f"  同時リクエスト数: {validator.max_workers}")
+    manifest = CleansingManifest(manifest_path) if manifest_path else None
+    if manifest:
+        valid_records, excluded_records = validate_incrementally(validator, raw_records, manifest, micro_batch)
+    else:
+        valid_records, excluded_records = validator.validate_batch(
+            raw_records,
+            show_progress=True,
+            micro_batch=micro_batch
+        )
 
     print(f"\n✓ LLM検証完了")
     print(f"  有効なレコード: {len(valid_records)}件")
     print(f"  除外されたレコード: {len(excluded_records)}件")
+    if prefilter:
+        prefilter.print_stats()
+    validator.client.usage.print_stats()
+    validator.client.cache.print_stats()
 
     # Step 2: 有効なレコードのみを重複統合
+    name_resolver = CompanyNameResolver() if normalize_names else None
     print(f"\nStep 2: 有効なレコードを企業ごとに統合中...")
     temp_validated = output_path.replace(".csv", "_temp.csv")
 
-    # 一時的に有効データを保存
-    with open(temp_validated, 'w', encoding='utf-8', newline='') as f:
-        fieldnames = ['更新日時', '法人名', '活動内容']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(valid_records)
+    if manifest:
+        # 構成が変わった法人のみ再統合
+        corp_names = merge_incrementally(valid_records, output_path, manifest, name_resolver)
+        manifest.prune({fingerprint_record(record) for record in raw_records}, corp_names)
+        manifest.save()
+        print(f"  マニフェスト保存: {manifest_path}")
+    else:
+        # 一時的に有効データを保存
+        with open(temp_validated, 'w', encoding='utf-8', newline='') as f:
+            fieldnames = ['更新日時', '法人名', '活動内容']
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(valid_records)
 
-    # 重複統合を実行
-    merge_duplicate_corporations(temp_validated, output_path)
+        # 重複統合を実行
+        merge_duplicate_corporations(temp_validated, output_path, name_resolver=name_resolver)
 
     print(f"  最終データ保存: {output_path}")
+    if name_resolver and name_resolver.fuzzy_pairs:
+        fuzzy_path = excluded_path.replace("_excluded.csv", "_fuzzy_names.csv")
+        name_resolver.export_fuzzy_pairs(fuzzy_path)
+        print(f"  類似名としてまとめた法人名: {fuzzy_path}（{len(name_resolver.fuzzy_pairs)}件。確認用）")
+    if data_format == "parquet":
+        writer = convert_csv_to_parquet(output_path, RECORD_COLUMN_TYPES)
+        print(f"  最終データ保存: {writer.path}")
+        writer.timestamps.print_report(note="Parquetでは空の値として保存します")
 
     # Step 3: 除外データを保存（監査用）
     if excluded_records:
@@ -67,12 +200,30 @@ def cleanse_and_validate(input_path, output_path, excluded_path):
             writer.writeheader()
             writer.writerows(excluded_records)
         print(f"  除外データ保存: {excluded_path}")
+        if data_format == "parquet":
+            writer = convert_csv_to_parquet(excluded_path, EXCLUDED_COLUMN_TYPES)
+            print(f"  除外データ保存: {writer.path}")
 
     # 一時ファイルを削除
     if os.path.exists(temp_validated):
         os.remove(temp_validated)
 
 
+def build_prefilter(args):
+    """
+    コマンドライン引数から前段フィルタを生成（ソースごとに件数を集計するため毎回生成する）
+
+    Args:
+        args: コマンドライン引数
+
+    Returns:
+        PreFilter: 前段フィルタ（--prefilter 未指定ならNone）
+    """
+    if not args.prefilter:
+        return None
+    return PreFilter.from_path(args.prefilter_model)
+
+
 def main():
     """
     人事データと小売データのクレンジングを実行
@@ -80,6 +231,45 @@ def main():
     処理順序:
     1. LLM商談判定 → 2. 企業統合
     """
+    parser = argparse.ArgumentParser(description="商談ログのLLM検証とクレンジング")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="前回から追加・変更されたレコードのみを検証・再統合する（data/manifest/ に判定結果を保存）"
+    )
+    parser.add_argument(
+        "--micro-batch",
+        action="store_true",
+        help="複数のログを1回のリクエストにまとめて判定する（件数はトークン予算から自動決定）"
+    )
+    parser.add_argument(
+        "--prefilter",
+        action="store_true",
+        help="ルールと学習済みモデルで明らかなものをローカルで判定し、曖昧なものだけLLMに送る"
+    )
+    parser.add_argument(
+        "--prefilter-model",
+        default=DEFAULT_MODEL_PATH,
+        help=f"前段フィルタのモデルファイル（scripts/train_prefilter.py で作成、デフォルト: {DEFAULT_MODEL_PATH}）"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="同じ・ほぼ同じ活動内容をまとめ、代表の1件だけをLLMで判定して結果を展開する"
+    )
+    parser.add_argument(
+        "--normalize-names",
+        action="store_true",
+        help="表記ゆれ（株式会社/(株)、全角/半角、1文字違いなど）のある法人名を1社にまとめて統合する"
+    )
+    parser.add_argument(
+        "--format",
+        choices=DATA_FORMATS,
+        default=DEFAULT_DATA_FORMAT,
+        help="parquet: 元データにParquetがあれば使い、有効データ・除外データをCSVに加えてParquetにも出力する"
+    )
+    args = parser.parse_args()
+
     print("=" * 60)
     print("商談ログデータの処理")
     print("処理順序: LLM商談判定 → 企業統合")
@@ -87,24 +277,40 @@ def main():
 
     # 人事データのクレンジング
     print("\n【人事データ】")
-    hr_input = "data/raw/人事/人事.csv"
+    hr_input = resolve_input_path("data/raw/人事/人事.csv", args.format)
     hr_output = "data/cleaned/人事_cleaned.csv"
     hr_excluded = "data/excluded/人事_excluded.csv"
+    hr_manifest = "data/manifest/人事_manifest.json" if args.incremental else None
 
     if os.path.exists(hr_input):
-        cleanse_and_validate(hr_input, hr_output, hr_excluded)
+        cleanse_and_validate(
+            hr_input, hr_output, hr_excluded, hr_manifest,
+            micro_batch=args.micro_batch,
+            prefilter=build_prefilter(args),
+            dedup=args.dedup,
+            normalize_names=args.normalize_names,
+            data_format=args.format
+        )
     else:
         print(f"⚠ ファイルが見つかりません: {hr_input}")
 
     # 小売データのクレンジング
     print("\n" + "=" * 60)
     print("【小売データ】")
-    retail_input = "data/raw/小売/小売.csv"
+    retail_input = resolve_input_path("data/raw/小売/小売.csv", args.format)
     retail_output = "data/cleaned/小売_cleaned.csv"
     retail_excluded = "data/excluded/小売_excluded.csv"
+    retail_manifest = "data/manifest/小売_manifest.json" if args.incremental else None
 
     if os.path.exists(retail_input):
-        cleanse_and_validate(retail_input, retail_output, retail_excluded)
+        cleanse_and_validate(
+            retail_input, retail_output, retail_excluded, retail_manifest,
+            micro_batch=args.micro_batch,
+            prefilter=build_prefilter(args),
+            dedup=args.dedup,
+            normalize_names=args.normalize_names,
+            data_format=args.format
+        )
     else:
         print(f"⚠ ファイルが見つかりません: {retail_input}")
 
@@ -0,0 +1,17 @@
+import os
+import sys
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.analysis_runner import run_cli
+from src.utils.analysis_tasks import HR_UNIFIED_TASK
+
+
+def main():
+    """人事データの訴求ポイント分析と課題分類を1回のAPI呼び出しでまとめて実行"""
+    run_cli(HR_UNIFIED_TASK)
+
+
+if __name__ == "__main__":
+    main()
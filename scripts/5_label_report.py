@@ -0,0 +1,226 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import numpy as np
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.label_stats import LabelMatrix, TREND_FREQUENCIES
+from src.utils.table_io import DATA_FORMATS, DEFAULT_DATA_FORMAT, resolve_input_path
+
+DEFAULT_APPEAL_PATH = "results/analysis_results_hr.csv"
+DEFAULT_CHALLENGE_PATH = "results/challenge_classification.csv"
+DEFAULT_OUTPUT_DIR = "results/report"
+
+
+def write_table(path, header, rows):
+    """
+    集計表をCSVに書き出す
+
+    Args:
+        path: 出力CSVファイルパス
+        header: ヘッダー行
+        rows: データ行のイテラブル
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_matrix(path, row_labels, column_labels, matrix, digits=None):
+    """
+    ラベル × ラベルの行列をクロス集計表としてCSVに書き出す
+
+    Args:
+        path: 出力CSVファイルパス
+        row_labels: 行側のラベル名
+        column_labels: 列側のラベル名
+        matrix: (行側のラベル数, 列側のラベル数) の行列
+        digits: 小数の桁数（Noneなら整数として書き出す。nanは空欄）
+    """
+    def format_value(value):
+        if digits is None:
+            return int(value)
+        return "" if np.isnan(value) else round(float(value), digits)
+
+    write_table(
+        path,
+        [""] + list(column_labels),
+        ([label] + [format_value(value) for value in row] for label, row in zip(row_labels, matrix))
+    )
+
+
+def load_matrices(args):
+    """
+    訴求ポイント・課題分類の分析結果を読み込み、ラベル行列を横に連結する
+
+    Args:
+        args: コマンドライン引数
+
+    Returns:
+        tuple: (連結したLabelMatrix, 読み込んだ分析結果ごとのLabelMatrixのリスト)
+    """
+    matrices = []
+    for csv_path in (args.appeal, args.challenge):
+        if not csv_path:
+            continue
+        path = resolve_input_path(csv_path, args.format)
+        if not os.path.exists(path):
+            print(f"⚠ ファイルが見つかりません: {path}")
+            continue
+        matrix = LabelMatrix.load(path, with_companies=True)
+        print(f"読み込み: {path}（{len(matrix)}行 × {len(matrix.labels)}ラベル）")
+        matrices.append(matrix)
+
+    if not matrices:
+        return None, []
+
+    combined = matrices[0]
+    for matrix in matrices[1:]:
+        combined = combined.hstack(matrix)
+    return combined, matrices
+
+
+def top_pairs(labels, cooccurrence, lift, min_support, limit):
+    """
+    リフト値の高いラベルの組み合わせを取得
+
+    Args:
+        labels: ラベル名のリスト
+        cooccurrence: ラベル × ラベルの共起件数
+        lift: ラベル × ラベルのリフト値
+        min_support: 対象とする共起件数の下限
+        limit: 取得する組み合わせの数
+
+    Returns:
+        list: (ラベルA, ラベルB, 共起件数, リフト値) のリスト（リフト値の高い順）
+    """
+    rows, columns = np.triu_indices(len(labels), k=1)
+    candidates = (cooccurrence[rows, columns] >= min_support) & ~np.isnan(lift[rows, columns])
+    rows, columns = rows[candidates], columns[candidates]
+    order = np.argsort(-lift[rows, columns], kind="stable")[:limit]
+    return [
+        (labels[i], labels[j], int(cooccurrence[i, j]), float(lift[i, j]))
+        for i, j in zip(rows[order], columns[order])
+    ]
+
+
+def main():
+    """
+    分析結果のラベルを集計してレポートを出力
+
+    ラベルごとの件数、ラベル間の共起件数・リフト値、期間ごとの推移をCSVに書き出し、
+    要約をコンソールに表示します。
+    """
+    parser = argparse.ArgumentParser(description="分析結果のラベル集計レポート")
+    parser.add_argument(
+        "--appeal",
+        default=DEFAULT_APPEAL_PATH,
+        help=f"訴求ポイントの分析結果（デフォルト: {DEFAULT_APPEAL_PATH}。空文字で読み込まない）"
+    )
+    parser.add_argument(
+        "--challenge",
+        default=DEFAULT_CHALLENGE_PATH,
+        help=f"課題分類の結果（デフォルト: {DEFAULT_CHALLENGE_PATH}。空文字で読み込まない）"
+    )
+    parser.add_argument(
+        "--format",
+        choices=DATA_FORMATS,
+        default=DEFAULT_DATA_FORMAT,
+        help="parquet: 分析結果のParquetがあればParquetを読み込む"
+    )
+    parser.add_argument(
+        "--freq",
+        choices=TREND_FREQUENCIES,
+        default="M",
+        help="推移の集計単位（Y: 年、M: 月、D: 日。デフォルト: M）"
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=DEFAULT_OUTPUT_DIR,
+        help=f"集計表の出力先（デフォルト: {DEFAULT_OUTPUT_DIR}）"
+    )
+    parser.add_argument(
+        "--min-support",
+        type=int,
+        default=10,
+        help="要約に表示する組み合わせの共起件数の下限（デフォルト: 10）"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="要約に表示する組み合わせの数（デフォルト: 10）"
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("ラベル集計レポート")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    matrix, matrices = load_matrices(args)
+    if matrix is None:
+        print("⚠ 集計対象の分析結果がありません")
+        return
+    loaded = time.perf_counter()
+
+    total = len(matrix)
+    counts = matrix.counts()
+    rates = matrix.rates()
+    cooccurrence = matrix.cooccurrence()
+    lift = matrix.lift()
+    periods, period_totals, period_counts = matrix.trend(args.freq)
+    computed = time.perf_counter()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    write_table(
+        os.path.join(args.output_dir, "label_counts.csv"),
+        ["ラベル", "件数", "割合"],
+        ([label, int(count), round(float(rate), 4)] for label, count, rate in zip(matrix.labels, counts, rates))
+    )
+    write_matrix(os.path.join(args.output_dir, "cooccurrence.csv"), matrix.labels, matrix.labels, cooccurrence)
+    write_matrix(os.path.join(args.output_dir, "lift.csv"), matrix.labels, matrix.labels, lift, digits=3)
+    if len(matrices) == 2:
+        appeal, challenge = matrices
+        write_matrix(
+            os.path.join(args.output_dir, "lift_appeal_challenge.csv"),
+            appeal.labels, challenge.labels, appeal.lift(challenge), digits=3
+        )
+    write_table(
+        os.path.join(args.output_dir, f"trend_{args.freq}.csv"),
+        ["期間", "件数"] + matrix.labels,
+        (
+            [str(period), int(period_total)] + [int(count) for count in row]
+            for period, period_total, row in zip(periods, period_totals, period_counts)
+        )
+    )
+
+    print(f"\n対象: {total}行 × {len(matrix.labels)}ラベル")
+    print("\n【ラベルごとの件数】")
+    for index in np.argsort(-counts, kind="stable"):
+        print(f"  {matrix.labels[index]}: {int(counts[index])}件（{rates[index]:.1%}）")
+
+    pairs = top_pairs(matrix.labels, cooccurrence, lift, args.min_support, args.top)
+    print(f"\n【リフト値の高い組み合わせ】（共起{args.min_support}件以上）")
+    if not pairs:
+        print("  該当なし")
+    for label_a, label_b, support, pair_lift in pairs:
+        print(f"  {label_a} × {label_b}: リフト {pair_lift:.2f}（{support}件）")
+
+    undated = total - int(period_totals.sum())
+    print(f"\n【推移】{len(periods)}期間", end="")
+    print(f"（更新日時が空・解析できない {undated}行は除く）" if undated else "")
+    if len(periods):
+        print(f"  {periods[0]} 〜 {periods[-1]}")
+
+    print(f"\n読み込み: {loaded - start:.2f}秒 / 集計: {computed - loaded:.2f}秒")
+    print(f"✓ 集計表を出力しました: {args.output_dir}/")
+
+
+if __name__ == "__main__":
+    main()
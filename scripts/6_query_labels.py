@@ -0,0 +1,148 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import numpy as np
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.label_store import LabelStore, DEFAULT_STORE_PATH
+from src.utils.table_io import DATA_FORMATS, DEFAULT_DATA_FORMAT, resolve_input_path
+
+DEFAULT_APPEAL_PATH = "results/analysis_results_hr.csv"
+DEFAULT_CHALLENGE_PATH = "results/challenge_classification.csv"
+
+
+def open_store(args):
+    """
+    ラベルストアを開く（ないか、分析結果のほうが新しければ作り直して保存する）
+
+    Args:
+        args: コマンドライン引数
+
+    Returns:
+        LabelStore: ラベルストア（分析結果がなければNone）
+    """
+    paths = []
+    for csv_path in (args.appeal, args.challenge):
+        if not csv_path:
+            continue
+        path = resolve_input_path(csv_path, args.format)
+        if os.path.exists(path):
+            paths.append(path)
+        else:
+            print(f"⚠ ファイルが見つかりません: {path}")
+
+    if os.path.exists(args.store) and not args.rebuild \
+            and all(os.path.getmtime(path) <= os.path.getmtime(args.store) for path in paths):
+        return LabelStore.load(args.store)
+
+    if not paths:
+        return None
+
+    start = time.perf_counter()
+    store = LabelStore.build(paths)
+    directory = os.path.dirname(args.store)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    store.save(args.store)
+    print(f"ラベルストアを作成しました: {args.store}（{len(store)}行 × {len(store.labels)}ラベル、"
+          f"{time.perf_counter() - start:.1f}秒）")
+    return store
+
+
+def run_query(store, expression, args):
+    """
+    条件に該当する法人を表示（--output 指定時はCSVにも書き出す）
+
+    Args:
+        store: LabelStore
+        expression: ラベルの条件式（空なら期間だけで絞り込む）
+        args: コマンドライン引数
+    """
+    try:
+        start = time.perf_counter()
+        result = store.query(expression or None, args.date_from, args.date_to)
+        elapsed = time.perf_counter() - start
+    except ValueError as e:
+        print(f"⚠ {e}")
+        return
+
+    print(f"該当: {result.count}件 / 全{len(store)}件（{elapsed * 1000:.1f}ms）")
+    for company in result.companies(limit=args.limit):
+        print(f"  {company}")
+    if result.count > args.limit:
+        print(f"  ...ほか{result.count - args.limit}件")
+
+    if args.output:
+        rows = result.rows()
+        timestamps = np.datetime_as_string(store.timestamps[rows], unit="m")
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["法人名", "更新日時"])
+            for row, timestamp in zip(rows, timestamps):
+                writer.writerow([store.company(row), "" if timestamp == "NaT" else timestamp.replace("T", " ")])
+        print(f"✓ 該当した{result.count}件を出力しました: {args.output}")
+
+
+def main():
+    """
+    ラベルの条件（AND / OR / NOT）と期間で法人を絞り込む
+
+    条件式を省略すると対話モードになり、1行ずつ条件を入力して絞り込めます。
+    """
+    parser = argparse.ArgumentParser(description="分析結果のラベルで法人を絞り込む")
+    parser.add_argument(
+        "expression",
+        nargs="?",
+        help='条件式（例: "シフトの欠員 AND 前払いニーズ AND NOT 福利厚生"。省略すると対話モード）'
+    )
+    parser.add_argument("--from", dest="date_from", help="更新日時の開始（YYYY-MM-DD [HH:MM]、この日時を含む）")
+    parser.add_argument("--to", dest="date_to", help="更新日時の終了（YYYY-MM-DD [HH:MM]、日付だけならその日の終わりまで）")
+    parser.add_argument("--limit", type=int, default=20, help="表示する法人の数（デフォルト: 20）")
+    parser.add_argument("--output", help="該当したすべての法人を書き出すCSVファイル")
+    parser.add_argument(
+        "--appeal",
+        default=DEFAULT_APPEAL_PATH,
+        help=f"訴求ポイントの分析結果（デフォルト: {DEFAULT_APPEAL_PATH}。空文字で読み込まない）"
+    )
+    parser.add_argument(
+        "--challenge",
+        default=DEFAULT_CHALLENGE_PATH,
+        help=f"課題分類の結果（デフォルト: {DEFAULT_CHALLENGE_PATH}。空文字で読み込まない）"
+    )
+    parser.add_argument(
+        "--format",
+        choices=DATA_FORMATS,
+        default=DEFAULT_DATA_FORMAT,
+        help="parquet: 分析結果のParquetがあればParquetから作成する"
+    )
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help=f"ラベルストアの保存先（デフォルト: {DEFAULT_STORE_PATH}）")
+    parser.add_argument("--rebuild", action="store_true", help="分析結果からラベルストアを作り直す")
+    args = parser.parse_args()
+
+    store = open_store(args)
+    if store is None:
+        print("⚠ 分析結果がありません。先に分析スクリプトを実行してください")
+        return
+
+    if args.expression is not None:
+        run_query(store, args.expression, args)
+        return
+
+    print(f"ラベル: {' / '.join(store.labels)}")
+    print("条件式を入力してください（AND / OR / NOT と括弧が使えます。空行で終了）")
+    while True:
+        try:
+            expression = input("条件> ").strip()
+        except EOFError:
+            break
+        if not expression:
+            break
+        run_query(store, expression, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import os
+import sys
+import time
+import argparse
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.embeddings import create_embedder, EMBEDDING_BACKENDS, DEFAULT_EMBEDDING_BACKEND
+from src.utils.embedding_index import EmbeddingIndex, DEFAULT_INDEX_DIR, DEFAULT_NPROBE
+from src.utils.table_io import DATA_FORMATS, DEFAULT_DATA_FORMAT, iter_records, resolve_input_path
+
+SOURCES = ["人事", "小売"]
+
+# 検索結果に表示する活動内容の文字数
+SNIPPET_LENGTH = 120
+
+
+def update_index(index, embedder, data_format):
+    """
+    クレンジング済みデータの新しい行をインデックスに追加
+
+    Args:
+        index: EmbeddingIndex
+        embedder: 埋め込みクラスのインスタンス
+        data_format: "csv" または "parquet"
+    """
+    for source in SOURCES:
+        path = resolve_input_path(f"data/cleaned/{source}_cleaned.csv", data_format)
+        if not os.path.exists(path):
+            print(f"⚠ ファイルが見つかりません: {path}")
+            continue
+
+        start = time.perf_counter()
+        stats = index.update(source, iter_records(path), embedder)
+        print(
+            f"【{source}】追加: {stats['added']}件（埋め込み: {stats['embedded']}件, 同じ内容の再利用: {stats['reused']}件）, "
+            f"検索対象から除外: {stats['deactivated']}件（{time.perf_counter() - start:.1f}秒）"
+        )
+    ivf_note = f"、IVF: {len(index.ivf.centroids)}リスト" if index.ivf is not None else ""
+    print(f"インデックス: {len(index)}行（検索対象: {int((~index.inactive).sum())}行{ivf_note}）")
+
+
+def print_results(index, results):
+    """
+    検索結果を表示
+
+    Args:
+        index: EmbeddingIndex
+        results: (行番号, 類似度) のリスト
+    """
+    if not results:
+        print("  該当なし")
+    for rank, (row_id, score) in enumerate(results, 1):
+        row = index.row(row_id)
+        snippet = row["活動内容"].replace("\n", " ")
+        if len(snippet) > SNIPPET_LENGTH:
+            snippet = snippet[:SNIPPET_LENGTH] + "…"
+        print(f"{rank:>2}. [{score:.3f}] {row['法人名']}（{row['更新日時']}, {row['source']}）")
+        print(f"    {snippet}")
+
+
+def search(index, embedder, args, text=None, company=None):
+    """
+    テキストまたは法人のログに近いログを検索して表示
+
+    Args:
+        index: EmbeddingIndex
+        embedder: 埋め込みクラスのインスタンス
+        args: コマンドライン引数
+        text: 検索テキスト
+        company: この法人のログに近いログを探す（textより優先）
+    """
+    exclude = []
+    start = time.perf_counter()
+    if company:
+        exclude = index.rows_of_company(company)
+        if not exclude:
+            print(f"⚠ インデックスに法人がありません: {company}")
+            return
+        query = index.vectors[exclude].sum(axis=0)
+    else:
+        query = embedder.embed([text])[0]
+    embedded = time.perf_counter()
+
+    results = index.search(query, k=args.top, nprobe=args.nprobe, exclude=exclude)
+    searched = time.perf_counter()
+    print(f"検索: {(searched - embedded) * 1000:.1f}ms（クエリの埋め込み: {(embedded - start) * 1000:.0f}ms）")
+    print_results(index, results)
+
+
+def main():
+    """
+    活動内容の意味検索
+
+    クレンジング済みデータの活動内容を埋め込んでインデックスを作り、テキストや法人のログに近いログを検索します。
+    検索テキストも --like も指定しないと対話モードになります。
+    """
+    parser = argparse.ArgumentParser(description="活動内容の意味検索")
+    parser.add_argument("query", nargs="?", help="検索テキスト（例: 早朝のシフトの人手不足）")
+    parser.add_argument("--like", metavar="法人名", help="この法人のログに近いログを検索する")
+    parser.add_argument("--top", type=int, default=10, help="表示する件数（デフォルト: 10）")
+    parser.add_argument(
+        "--nprobe",
+        type=int,
+        default=DEFAULT_NPROBE,
+        help=f"IVFで調べるリスト数（多いほど正確・遅い。デフォルト: {DEFAULT_NPROBE}）"
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="クレンジング済みデータの新しい行を埋め込んでインデックスに追加する"
+    )
+    parser.add_argument("--rebuild", action="store_true", help="インデックスを削除して作り直す（--update を含む）")
+    parser.add_argument(
+        "--backend",
+        choices=EMBEDDING_BACKENDS,
+        default=DEFAULT_EMBEDDING_BACKEND,
+        help=f"埋め込みの方式（デフォルト: {DEFAULT_EMBEDDING_BACKEND}）"
+    )
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR, help=f"インデックスの保存先（デフォルト: {DEFAULT_INDEX_DIR}）")
+    parser.add_argument(
+        "--format",
+        choices=DATA_FORMATS,
+        default=DEFAULT_DATA_FORMAT,
+        help="parquet: クレンジング済みデータのParquetがあればParquetを読み込む"
+    )
+    args = parser.parse_args()
+
+    if args.rebuild:
+        EmbeddingIndex.remove(args.index_dir)
+
+    embedder = create_embedder(args.backend)
+    try:
+        index = EmbeddingIndex.open(args.index_dir, embedder)
+    except ValueError as e:
+        print(f"⚠ {e}（--rebuild）")
+        return
+
+    try:
+        if args.update or args.rebuild or not len(index):
+            update_index(index, embedder, args.format)
+
+        if args.like or args.query:
+            search(index, embedder, args, text=args.query, company=args.like)
+            return
+        if args.update or args.rebuild:
+            return
+
+        print("検索テキストを入力してください（「法人:法人名」でその法人のログに近いログを検索。空行で終了）")
+        while True:
+            try:
+                text = input("検索> ").strip()
+            except EOFError:
+                break
+            if not text:
+                break
+            if text.startswith("法人:"):
+                search(index, embedder, args, company=text[len("法人:"):].strip())
+            else:
+                search(index, embedder, args, text=text)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
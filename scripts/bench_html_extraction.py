@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.html_parser import DEFAULT_SCHEMA, extract_records_from_html, stream_records_from_html
+
+
+def generate_export(path, rows, columns=40, seed=0):
+    """
+    kintoneのレコード一覧を模した合成HTMLを作成
+
+    対象の3フィールド以外にダミーの列を並べ、列の並び順は行ごとに少しずつ変える。
+
+    Args:
+        path: 出力HTMLファイルパス
+        rows: 行数
+        columns: 1行あたりの列数
+        seed: 乱数シード
+    """
+    rng = random.Random(seed)
+    field_cells = {
+        '更新日時': lambda i: f'<span>2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} {i % 24:02d}:00</span>',
+        '法人名': lambda i: f'<div><span>株式会社サンプル{i % 2000}</span></div>',
+        '活動内容': lambda i: (
+            f'<div>商談 &amp; ヒアリング {i}<br>  次回は採用計画を確認  {"内容" * rng.randint(5, 120)}</div>'
+            if i % 23 else ''
+        )
+    }
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<html><head><meta charset="utf-8"></head><body>\n')
+        f.write('<table class="recordlist-gaia"><tbody>\n')
+        for i in range(rows):
+            cells = [
+                f'<td class="recordlist-cell-gaia value-{6446000 + k}"><div>項目{k}</div></td>'
+                for k in range(columns - len(field_cells))
+            ]
+            for field, make_text in field_cells.items():
+                cells.insert(
+                    rng.randint(0, len(cells)),
+                    f'<td class="recordlist-cell-gaia {DEFAULT_SCHEMA.field_classes[field]}">{make_text(i)}<!-- --></td>'
+                )
+            f.write(f'<tr class="recordlist-row-gaia">{"".join(cells)}</tr>\n')
+        f.write('</tbody></table></body></html>\n')
+
+
+def measure(label, extract):
+    """
+    抽出処理の時間を計測
+
+    Args:
+        label: 表示名
+        extract: レコードのリストを返す関数
+
+    Returns:
+        list: 抽出されたレコード
+    """
+    started_at = time.perf_counter()
+    records = extract()
+    print(f"{label}: {len(records)}件 ({time.perf_counter() - started_at:.2f}秒)")
+    return records
+
+
+def stream_to_list(html_file):
+    """ストリーミング抽出の結果をリストで返す"""
+    records = []
+    stream_records_from_html(html_file, records.append)
+    return records
+
+
+def main():
+    """HTMLからのレコード抽出（BeautifulSoup版とストリーミング版）の速度と結果を比較"""
+    parser = argparse.ArgumentParser(description="HTML抽出のベンチマーク")
+    parser.add_argument("--rows", type=int, default=50000, help="合成HTMLの行数（デフォルト: 50000）")
+    parser.add_argument("--columns", type=int, default=40, help="1行あたりの列数（デフォルト: 40）")
+    parser.add_argument("--html", help="合成HTMLの代わりに使う既存のHTMLファイル")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        html_file = args.html
+        if not html_file:
+            html_file = os.path.join(work_dir, "bench.html")
+            generate_export(html_file, args.rows, args.columns)
+
+        size_mb = os.path.getsize(html_file) / 1024 / 1024
+        print(f"対象: {html_file} ({size_mb:.1f}MB)\n")
+
+        streamed = measure("ストリーミング", lambda: stream_to_list(html_file))
+        legacy = measure("BeautifulSoup", lambda: extract_records_from_html(html_file))
+
+    if streamed == legacy:
+        print("\n✓ 抽出結果は一致しました")
+    else:
+        print("\n✗ 抽出結果が一致しません")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.analysis_tasks import TASKS, CHALLENGE_CLASSIFICATION_TASK
+from src.utils.embeddings import create_embedder, EMBEDDING_BACKENDS, DEFAULT_EMBEDDING_BACKEND
+from src.utils.embedding_index import EmbeddingIndex, DEFAULT_INDEX_DIR
+from src.utils.cleansing_manifest import fingerprint_record
+from src.utils.label_propagation import (
+    LabelPropagator, LogisticRegressionModel, AutoLabeledRows, DEFAULT_MIN_PRECISION, auto_labeled_path,
+    choose_thresholds, content_vectors, hash_fraction, label_metrics, print_label_metrics, propagation_model_path
+)
+from src.utils.table_io import DATA_FORMATS, DEFAULT_DATA_FORMAT, iter_records, resolve_input_path
+
+# ラベル伝播を使えるタスク（出力が1つでセクションがないもの）
+PROPAGATION_TASKS = [name for name, task in TASKS.items() if task.propagation_labels is not None]
+
+# 評価用データを閾値の決定用と評価用に分けるハッシュの接頭辞（学習用・評価用の分割とは独立させる）
+CALIBRATION_SALT = "calibration:"
+
+
+def load_labeled_rows(task, output_path, auto_labeled):
+    """
+    分析結果からLLMが付けたラベルを読み込む
+
+    ラベル伝播でローカルに付けた行と空の活動内容は使わない。同じ活動内容は最初の行だけを使う。
+
+    Args:
+        task: AnalysisTask
+        output_path: 分析結果のパス
+        auto_labeled: AutoLabeledRows
+
+    Returns:
+        tuple: (活動内容のリスト, (件数, ラベル数) の0/1行列)
+    """
+    labels = task.propagation_labels
+    contents = []
+    rows = []
+    seen = set()
+    skipped = 0
+    for record in iter_records(output_path):
+        content = record.get('活動内容') or ""
+        if fingerprint_record(record) in auto_labeled:
+            skipped += 1
+            continue
+        if not content.strip() or content in seen:
+            continue
+        seen.add(content)
+        contents.append(content)
+        rows.append([int(record.get(label) or 0) == 1 for label in labels])
+    if skipped:
+        print(f"ラベル伝播でローカルに付けた {skipped}件は学習に使いません")
+    return contents, np.array(rows, dtype=np.uint8).reshape(len(rows), len(labels))
+
+
+def print_thresholds(labels, upper, lower, label_counts):
+    """
+    ラベルごとの閾値を表示
+
+    Args:
+        labels: ラベル名のリスト
+        upper: 上側の閾値
+        lower: 下側の閾値
+        label_counts: 閾値の決定用データでのラベルごとの正例の件数
+    """
+    for label, high, low, count in zip(labels, upper, lower, label_counts):
+        high_text = f"{high:.3f}以上で1" if np.isfinite(high) else "1にしない"
+        low_text = f"{low:.3f}以下で0" if np.isfinite(low) else "0にしない"
+        print(f"  {label}: {high_text} / {low_text}（正例 {int(count)}件）")
+
+
+def main():
+    """
+    LLMが付けたラベルからラベル伝播のモデルを学習し、評価用データでの適合率・再現率を報告
+
+    評価用データは閾値の決定用と評価用に分け、閾値を決めたデータとは別のデータで精度を報告します。
+
+    活動内容の埋め込みはインデックス（scripts/7_search_logs.py と共通）から取り、ないものは埋め込んで追加します。
+    """
+    parser = argparse.ArgumentParser(description="ラベル伝播のモデル学習と評価")
+    parser.add_argument(
+        "--task",
+        choices=PROPAGATION_TASKS,
+        default=CHALLENGE_CLASSIFICATION_TASK.name,
+        help=f"学習するタスク（デフォルト: {CHALLENGE_CLASSIFICATION_TASK.name}）"
+    )
+    parser.add_argument("--holdout", type=float, default=0.2, help="評価用データの割合（デフォルト: 0.2）")
+    parser.add_argument(
+        "--calibration",
+        type=float,
+        default=0.5,
+        help="評価用データのうち閾値の決定に使う割合（残りで精度を評価。デフォルト: 0.5）"
+    )
+    parser.add_argument(
+        "--min-precision",
+        type=float,
+        default=DEFAULT_MIN_PRECISION,
+        help=f"ローカルで付けるラベルに求める適合率（正例・負例とも。デフォルト: {DEFAULT_MIN_PRECISION}）"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=EMBEDDING_BACKENDS,
+        default=DEFAULT_EMBEDDING_BACKEND,
+        help=f"埋め込みの方式（デフォルト: {DEFAULT_EMBEDDING_BACKEND}）"
+    )
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR, help=f"インデックスの保存先（デフォルト: {DEFAULT_INDEX_DIR}）")
+    parser.add_argument(
+        "--format",
+        choices=DATA_FORMATS,
+        default=DEFAULT_DATA_FORMAT,
+        help="parquet: 分析結果・クレンジング済みデータのParquetがあればParquetを読み込む"
+    )
+    parser.add_argument("--output", help="モデルの保存先（デフォルト: data/models/<タスク名>_propagation.npz）")
+    args = parser.parse_args()
+
+    task = TASKS[args.task]
+    model_path = args.output or propagation_model_path(task.name)
+    output_path = resolve_input_path(task.outputs[0].path, args.format)
+    if not os.path.exists(output_path):
+        print(f"⚠ 分析結果が見つかりません: {output_path}（先に分析スクリプトを実行してください）")
+        return
+
+    contents, labels = load_labeled_rows(task, output_path, AutoLabeledRows(auto_labeled_path(model_path)))
+    holdout = np.array([hash_fraction(content) < args.holdout for content in contents], dtype=bool)
+    calibration = holdout & np.array(
+        [hash_fraction(content, CALIBRATION_SALT) < args.calibration for content in contents], dtype=bool
+    )
+    evaluation = holdout & ~calibration
+    print(
+        f"学習用: {int((~holdout).sum())}件 / 閾値の決定用: {int(calibration.sum())}件 / "
+        f"評価用: {int(evaluation.sum())}件"
+    )
+    if holdout.all() or not calibration.any() or not evaluation.any():
+        print("⚠ 学習用・閾値の決定用・評価用のすべてのデータが必要です")
+        return
+
+    embedder = create_embedder(args.backend)
+    try:
+        index = EmbeddingIndex.open(args.index_dir, embedder)
+    except ValueError as e:
+        print(f"⚠ {e}")
+        return
+    try:
+        start = time.perf_counter()
+        input_path = resolve_input_path(task.input_path, args.format)
+        if os.path.exists(input_path):
+            index.update(task.source, iter_records(input_path), embedder)
+        vectors = content_vectors(index, contents, embedder)
+        print(f"埋め込み: {vectors.shape[0]}件 × {vectors.shape[1]}次元（{time.perf_counter() - start:.1f}秒）")
+    finally:
+        index.close()
+
+    start = time.perf_counter()
+    model = LogisticRegressionModel().fit(vectors[~holdout], labels[~holdout])
+    print(f"学習: {time.perf_counter() - start:.1f}秒")
+
+    calibration_labels = labels[calibration]
+    upper, lower = choose_thresholds(model.predict_proba(vectors[calibration]), calibration_labels, args.min_precision)
+    print(f"\n【閾値（閾値の決定用データで適合率 {args.min_precision} 以上）】")
+    print_thresholds(task.propagation_labels, upper, lower, calibration_labels.sum(axis=0))
+
+    probabilities = model.predict_proba(vectors[evaluation])
+    test_labels = labels[evaluation]
+    print("\n【評価用データ: 確率0.5で判定した場合】")
+    print_label_metrics(task.propagation_labels, label_metrics(probabilities >= 0.5, test_labels))
+
+    propagator = LabelPropagator(task.propagation_labels, model, upper, lower, embedder.name)
+    predicted = propagator.predict(vectors[evaluation])
+    confident = np.array([result is not None for result in predicted], dtype=bool)
+    print(f"\n【評価用データ: 閾値で判定した場合】")
+    print(f"  ローカル判定（API呼び出し回避）: {int(confident.sum())}件 / {len(predicted)}件 ({100 * confident.mean():.1f}%)")
+    if confident.any():
+        local_labels = np.array([
+            [result[label] for label in task.propagation_labels] for result in predicted if result is not None
+        ])
+        print_label_metrics(task.propagation_labels, label_metrics(local_labels, test_labels[confident]))
+
+    # 閾値と精度は学習用データだけで学習したモデルのものなので、そのモデルを保存する
+    # （全データで学習し直すと確率が変わり、閾値の適合率が保証されなくなる）
+    propagator.save(model_path)
+    print(f"\n✓ モデル保存: {model_path}")
+
+
+if __name__ == "__main__":
+    main()
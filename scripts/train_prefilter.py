@@ -0,0 +1,218 @@
+import os
+import sys
+import hashlib
+import argparse
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.chunking import HISTORY_SEPARATOR
+from src.utils.cleansing_manifest import CleansingManifest, fingerprint_record
+from src.utils.content_validator import VALIDATION_ERROR_REASON, MIN_CONTENT_LENGTH
+from src.utils.prefilter import (
+    NaiveBayesClassifier, PreFilter, DEFAULT_MODEL_PATH, DEFAULT_THRESHOLD, is_local_verdict
+)
+from src.utils.table_io import DATA_FORMATS, DEFAULT_DATA_FORMAT, iter_records, resolve_input_path
+
+SOURCES = ["人事", "小売"]
+
+
+def usable_verdict(verdict):
+    """
+    学習に使えるLLMの判定かどうか（APIエラーの仮判定・前段フィルタのローカル判定は使わない）
+
+    Args:
+        verdict: {"is_valid": bool, "reason": str}
+
+    Returns:
+        bool: 使える場合はTrue
+    """
+    return verdict['reason'] != VALIDATION_ERROR_REASON and not is_local_verdict(verdict)
+
+
+def split_merged_contents(record):
+    """
+    統合済みレコードの活動内容を元のログごとに分ける（merge_corporation_records の逆）
+
+    Args:
+        record: クレンジング済みのレコード
+
+    Returns:
+        list: 元のログの活動内容（前後の空白は除去済み）のリスト
+    """
+    entries = (record.get('活動内容') or "").split(HISTORY_SEPARATOR)
+    if len(entries) == 1:
+        return [entries[0].strip()]
+    # 複数のログがある場合は先頭行に "[日時]" が付いている
+    return [entry.split("\n", 1)[1].strip() if "\n" in entry else "" for entry in entries]
+
+
+def load_labeled_contents(source, data_format=DEFAULT_DATA_FORMAT):
+    """
+    前回のクレンジング結果からLLMの判定を復元して学習データを作成
+
+    差分モードのマニフェストがあれば、元データの各行の指紋で保存済みのLLM判定を使う。
+    ない場合は、除外データにある活動内容を除外（False）、クレンジング済みデータに統合されている活動内容を
+    有効（True）とし、どちらにもない行（未検証の行）は使わない。
+    空・極端に短い内容、APIエラーの仮判定、前段フィルタでローカル判定したものは使わない
+    （マニフェストがない場合、有効側のローカル判定は区別できないため、差分モードの結果を使う方が正確）。
+
+    Args:
+        source: ソース名（"人事" / "小売"）
+        data_format: "parquet" の場合はParquetがあればParquetを読み込む
+
+    Returns:
+        dict: 活動内容 → ラベル（bool）
+    """
+    raw_path = resolve_input_path(f"data/raw/{source}/{source}.csv", data_format)
+    excluded_path = resolve_input_path(f"data/excluded/{source}_excluded.csv", data_format)
+    cleaned_path = resolve_input_path(f"data/cleaned/{source}_cleaned.csv", data_format)
+    manifest_path = f"data/manifest/{source}_manifest.json"
+    if not os.path.exists(raw_path):
+        print(f"⚠ {source}: 元データが見つかりません（{raw_path}）")
+        return {}
+
+    labels = {}
+    if os.path.exists(manifest_path):
+        manifest = CleansingManifest(manifest_path)
+        for record in iter_records(raw_path):
+            verdict = manifest.get_verdict(fingerprint_record(record))
+            if verdict is not None and usable_verdict(verdict):
+                labels[record['活動内容']] = verdict['is_valid']
+    elif os.path.exists(excluded_path) and os.path.exists(cleaned_path):
+        skipped = set()
+        for record in iter_records(excluded_path):
+            if usable_verdict({"is_valid": False, "reason": record.get('除外理由') or ""}):
+                labels[record['活動内容']] = False
+            else:
+                skipped.add(record['活動内容'])
+
+        cleaned_contents = set()
+        for record in iter_records(cleaned_path):
+            cleaned_contents.update(split_merged_contents(record))
+
+        for record in iter_records(raw_path):
+            content = record.get('活動内容') or ""
+            if content in labels or content in skipped or content.strip() not in cleaned_contents:
+                continue
+            labels[content] = True
+    else:
+        print(
+            f"⚠ {source}: マニフェスト（{manifest_path}）または除外データ・クレンジング済みデータ"
+            f"（{excluded_path}, {cleaned_path}）が見つかりません"
+        )
+        return {}
+
+    # 空・短い内容はLLMに送らない判定なので学習に使わない
+    return {content: label for content, label in labels.items() if len(content.strip()) >= MIN_CONTENT_LENGTH}
+
+
+def is_holdout(content, holdout_ratio):
+    """
+    活動内容のハッシュで評価用データかどうかを決める（実行ごとに同じ分割になる）
+
+    Args:
+        content: 活動内容
+        holdout_ratio: 評価用データの割合
+
+    Returns:
+        bool: 評価用ならTrue
+    """
+    bucket = int(hashlib.sha256(content.encode('utf-8')).hexdigest()[:8], 16) % 1000
+    return bucket < holdout_ratio * 1000
+
+
+def evaluate(prefilter, contents, labels):
+    """
+    評価用データで前段フィルタの判定とLLMの判定の一致を集計
+
+    Args:
+        prefilter: PreFilter
+        contents: 活動内容のリスト
+        labels: LLMの判定（bool）のリスト
+
+    Returns:
+        dict: 集計結果
+    """
+    result = {"total": len(contents), "decided": 0, "agreed": 0, "false_excluded": 0, "false_valid": 0}
+    for content, label in zip(contents, labels):
+        verdict = prefilter.classify(content)
+        if verdict is None:
+            continue
+        result["decided"] += 1
+        if verdict['is_valid'] == label:
+            result["agreed"] += 1
+        elif label:
+            # LLMは有効と判定したがローカルで除外（商談ログの取りこぼし）
+            result["false_excluded"] += 1
+        else:
+            result["false_valid"] += 1
+    return result
+
+
+def print_evaluation(title, result):
+    """評価結果を表示"""
+    total = result["total"] or 1
+    decided = result["decided"] or 1
+    print(f"\n【{title}】")
+    print(f"  評価件数: {result['total']}件")
+    print(f"  ローカル判定（API呼び出し回避）: {result['decided']}件 ({100 * result['decided'] / total:.1f}%)")
+    print(f"  LLMとの一致率: {100 * result['agreed'] / decided:.1f}% ({result['agreed']}/{result['decided']})")
+    print(f"  誤って除外: {result['false_excluded']}件 / 誤って有効: {result['false_valid']}件")
+
+
+def main():
+    """過去のLLM判定から前段フィルタのモデルを学習し、評価用データでの一致率を報告"""
+    parser = argparse.ArgumentParser(description="前段フィルタのモデル学習と評価")
+    parser.add_argument("--sources", nargs="+", default=SOURCES, help="学習に使うソース（デフォルト: 人事 小売）")
+    parser.add_argument("--holdout", type=float, default=0.2, help="評価用データの割合（デフォルト: 0.2）")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"モデルの判定を採用する確率の下限（デフォルト: {DEFAULT_THRESHOLD}）"
+    )
+    parser.add_argument(
+        "--format",
+        choices=DATA_FORMATS,
+        default=DEFAULT_DATA_FORMAT,
+        help="parquet: 元データ・除外データ・クレンジング済みデータのParquetがあればParquetを読み込む"
+    )
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH, help=f"モデルの保存先（デフォルト: {DEFAULT_MODEL_PATH}）")
+    args = parser.parse_args()
+
+    labeled = {}
+    for source in args.sources:
+        source_labels = load_labeled_contents(source, args.format)
+        valid_count = sum(source_labels.values())
+        print(f"{source}: 有効 {valid_count}件 / 除外 {len(source_labels) - valid_count}件")
+        labeled.update(source_labels)
+
+    if not labeled or all(labeled.values()) or not any(labeled.values()):
+        print("⚠ 有効・除外の両方の学習データが必要です")
+        return
+
+    train = [(content, label) for content, label in labeled.items() if not is_holdout(content, args.holdout)]
+    test = [(content, label) for content, label in labeled.items() if is_holdout(content, args.holdout)]
+    print(f"\n学習用: {len(train)}件 / 評価用: {len(test)}件")
+
+    model = NaiveBayesClassifier()
+    model.train([content for content, _ in train], [label for _, label in train])
+
+    test_contents = [content for content, _ in test]
+    test_labels = [label for _, label in test]
+    print_evaluation("ルールのみ", evaluate(PreFilter(), test_contents, test_labels))
+    print_evaluation(
+        f"ルール + モデル（閾値 {args.threshold}）",
+        evaluate(PreFilter(model=model, threshold=args.threshold), test_contents, test_labels)
+    )
+
+    # 保存するモデルは全データで学習し直す
+    model = NaiveBayesClassifier()
+    model.train(list(labeled.keys()), list(labeled.values()))
+    model.save(args.output)
+    print(f"\n✓ モデル保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
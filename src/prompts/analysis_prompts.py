@@ -1,6 +1,7 @@
 """
 商談ログ分析用のプロンプトテンプレート
 """
+import json
 
 # 課題定義（課題分類用）
 CHALLENGE_DEFINITIONS = [
@@ -66,36 +67,67 @@ CHALLENGE_DEFINITIONS = [
     }
 ]
 
+# 分析観点のラベル（小売版）
+RETAIL_APPEAL_LABELS = [
+    "リクルートブランド",
+    "人材課題の解決",
+    "福利厚生に効くこと",
+    "前払い・即払いサービスであること",
+    "デジタル給与対応であること",
+    "その他"
+]
 
-class AnalysisPrompts:
-    """分析用プロンプトを管理するクラス（小売版）"""
+# 分析観点のラベル（人事版）
+HR_APPEAL_LABELS = [
+    "リクルートブランドから",
+    "人材課題の解決方法として",
+    "福利厚生として",
+    "前払い・即払いサービスを元から検討していたから",
+    "デジタル給与対応であるから"
+]
 
-    @staticmethod
-    def get_system_prompt():
-        """
-        システムプロンプトを取得
+# 課題分類のラベル
+CHALLENGE_LABELS = [definition["challenge"] for definition in CHALLENGE_DEFINITIONS]
 
-        Returns:
-            str: システムプロンプト
-        """
-        return "あなたは営業分析のエキスパートです。給与前払い・即払いサービスの商談ログを分析し、プロダクトのどの要素が顧客に刺さったか、何が商談のきっかけになったかを特定します。"
+# プロンプトに埋め込む課題定義（JSON形式の文字列。全リクエストで共通なので一度だけ作る）
+CHALLENGE_DEFINITIONS_JSON = json.dumps(CHALLENGE_DEFINITIONS, ensure_ascii=False, indent=2)
 
-    @staticmethod
-    def get_user_prompt(activity_content):
-        """
-        ユーザープロンプトを取得
 
-        Args:
-            activity_content: 分析対象の活動内容
+def label_schema(labels):
+    """
+    回答形式の例に載せるラベルの行（JSONオブジェクトの中身）
 
-        Returns:
-            str: ユーザープロンプト
-        """
-        return f"""
-以下の営業商談ログを読んで、リクルート社の給与前払い・即払いサービスを提案する際に使えそうな要素が含まれているかを判断してください。
+    Args:
+        labels: ラベル名のリスト
+
+    Returns:
+        str: 「"ラベル": 1 または 0」を1行ずつ並べた文字列
+    """
+    return ",\n".join(f'    "{label}": 1 または 0' for label in labels)
+
+
+def build_user_prompt(instructions, activity_content):
+    """
+    全ログで共通の指示の後ろに商談ログを付けてユーザープロンプトを作る
+
+    ログごとに変わる部分を末尾に置くことで、APIのプロンプトキャッシュ（先頭が一致する部分）が効くようにする。
+
+    Args:
+        instructions: 全ログで共通の指示
+        activity_content: 分析対象の活動内容
+
+    Returns:
+        str: ユーザープロンプト
+    """
+    return f"{instructions}\n商談ログ:\n{activity_content}\n"
+
+
+class AnalysisPrompts:
+    """分析用プロンプトを管理するクラス（小売版）"""
 
-商談ログ:
-{activity_content}
+    # 全ログで共通の指示（商談ログは build_user_prompt で末尾に付ける）
+    INSTRUCTIONS = """
+最後に示す営業商談ログを読んで、リクルート社の給与前払い・即払いサービスを提案する際に使えそうな要素が含まれているかを判断してください。
 
 以下の観点で、この商談内容に該当する要素があるかを厳密に判定してください。
 該当する要素が明確に読み取れる場合のみ1を返し、不明確な場合や関係ない内容の場合は0を返してください。
@@ -110,20 +142,16 @@ class AnalysisPrompts:
 重要: 商談内容と関係ない観点は必ず0にしてください。推測や一般論ではなく、商談ログに明確に書かれている内容のみで判断してください。
 
 JSON形式で以下のように回答してください（1=該当する、0=該当しない）:
-{{
+{
   "リクルートブランド": 1 または 0,
   "人材課題の解決": 1 または 0,
   "福利厚生に効くこと": 1 または 0,
   "前払い・即払いサービスであること": 1 または 0,
   "デジタル給与対応であること": 1 または 0,
   "その他": 1 または 0
-}}
+}
 """
 
-
-class HRAnalysisPrompts:
-    """分析用プロンプトを管理するクラス（人事版）"""
-
     @staticmethod
     def get_system_prompt():
         """
@@ -137,7 +165,7 @@ class HRAnalysisPrompts:
     @staticmethod
     def get_user_prompt(activity_content):
         """
-        ユーザープロンプトを取得（人事版）
+        ユーザープロンプトを取得
 
         Args:
             activity_content: 分析対象の活動内容
@@ -145,11 +173,15 @@ class HRAnalysisPrompts:
         Returns:
             str: ユーザープロンプト
         """
-        return f"""
-以下の営業商談ログを読んで、リクルート社の給与前払い・即払いサービスを提案する際に使えそうな要素が含まれているかを判断してください。
+        return build_user_prompt(AnalysisPrompts.INSTRUCTIONS, activity_content)
 
-商談ログ:
-{activity_content}
+
+class HRAnalysisPrompts:
+    """分析用プロンプトを管理するクラス（人事版）"""
+
+    # 全ログで共通の指示（商談ログは build_user_prompt で末尾に付ける）
+    INSTRUCTIONS = """
+最後に示す営業商談ログを読んで、リクルート社の給与前払い・即払いサービスを提案する際に使えそうな要素が含まれているかを判断してください。
 
 以下の観点で、この商談内容に該当する要素があるかを厳密に判定してください。
 該当する要素が明確に読み取れる場合のみ1を返し、不明確な場合や関係ない内容の場合は0を返してください。
@@ -164,19 +196,15 @@ class HRAnalysisPrompts:
 重要: 商談内容と関係ない観点は必ず0にしてください。推測や一般論ではなく、商談ログに明確に書かれている内容のみで判断してください。
 
 JSON形式で以下のように回答してください（1=該当する、0=該当しない）:
-{{
+{
   "リクルートブランドから": 1 または 0,
   "人材課題の解決方法として": 1 または 0,
   "福利厚生として": 1 または 0,
   "前払い・即払いサービスを元から検討していたから": 1 または 0,
   "デジタル給与対応であるから": 1 または 0
-}}
+}
 """
 
-
-class ChallengeClassificationPrompts:
-    """課題分類用プロンプトを管理するクラス"""
-
     @staticmethod
     def get_system_prompt():
         """
@@ -185,12 +213,12 @@ class ChallengeClassificationPrompts:
         Returns:
             str: システムプロンプト
         """
-        return "あなたは人材・労務課題の分析エキスパートです。営業商談ログから、顧客が抱えている人材・労務上の課題を特定し、定義された課題カテゴリに分類します。"
+        return "あなたは営業分析のエキスパートです。給与前払い・即払いサービスの商談ログを分析し、プロダクトのどの要素が顧客に刺さったか、何が商談のきっかけになったかを特定します。"
 
     @staticmethod
     def get_user_prompt(activity_content):
         """
-        ユーザープロンプトを取得（課題分類用）
+        ユーザープロンプトを取得（人事版）
 
         Args:
             activity_content: 分析対象の活動内容
@@ -198,21 +226,21 @@ class ChallengeClassificationPrompts:
         Returns:
             str: ユーザープロンプト
         """
-        # 課題定義をJSON形式の文字列に変換
-        import json
-        challenges_json = json.dumps(CHALLENGE_DEFINITIONS, ensure_ascii=False, indent=2)
+        return build_user_prompt(HRAnalysisPrompts.INSTRUCTIONS, activity_content)
 
-        return f"""
-以下の営業商談ログを読んで、顧客が抱えている課題を特定してください。
 
-商談ログ:
-{activity_content}
+class ChallengeClassificationPrompts:
+    """課題分類用プロンプトを管理するクラス"""
+
+    # 全ログで共通の指示と課題定義（商談ログは build_user_prompt で末尾に付ける）
+    INSTRUCTIONS = f"""
+最後に示す営業商談ログを読んで、顧客が抱えている課題を特定してください。
 
 以下の課題定義に基づいて、該当する課題があるかを厳密に判定してください。
 該当する課題が明確に読み取れる場合のみ1を返し、不明確な場合や関係ない内容の場合は0を返してください。
 
 課題定義:
-{challenges_json}
+{CHALLENGE_DEFINITIONS_JSON}
 
 重要: 商談内容と関係ない課題は必ず0にしてください。推測や一般論ではなく、商談ログに明確に書かれている内容のみで判断してください。
 
@@ -232,3 +260,86 @@ JSON形式で以下のように回答してください（1=該当する、0=該
   "前払いニーズ": 1 または 0
 }}
 """
+
+    @staticmethod
+    def get_system_prompt():
+        """
+        システムプロンプトを取得
+
+        Returns:
+            str: システムプロンプト
+        """
+        return "あなたは人材・労務課題の分析エキスパートです。営業商談ログから、顧客が抱えている人材・労務上の課題を特定し、定義された課題カテゴリに分類します。"
+
+    @staticmethod
+    def get_user_prompt(activity_content):
+        """
+        ユーザープロンプトを取得（課題分類用）
+
+        Args:
+            activity_content: 分析対象の活動内容
+
+        Returns:
+            str: ユーザープロンプト
+        """
+        return build_user_prompt(ChallengeClassificationPrompts.INSTRUCTIONS, activity_content)
+
+
+class UnifiedHRAnalysisPrompts:
+    """訴求ポイント分析（人事版）と課題分類を1回のリクエストで行うプロンプト"""
+
+    # 回答JSONのセクション名
+    APPEAL_KEY = "訴求ポイント"
+    CHALLENGE_KEY = "課題"
+
+    # 全ログで共通の指示・課題定義・回答形式（商談ログは build_user_prompt で末尾に付ける）
+    INSTRUCTIONS = f"""
+最後に示す営業商談ログを読んで、(A) リクルート社の給与前払い・即払いサービスを提案する際に使えそうな要素と、(B) 顧客が抱えている課題を判定してください。
+
+該当する要素・課題が明確に読み取れる場合のみ1を返し、不明確な場合や関係ない内容の場合は0を返してください。
+
+(A) 訴求ポイントの観点:
+1. リクルートブランドから: リクルートのブランド力や知名度が重要な要素になっていることが明確に読み取れる場合。
+2. 人材課題の解決方法として: 人材確保、採用、定着、離職防止などの人材に関する課題が商談内容に明確に含まれている場合
+3. 福利厚生として: 従業員の福利厚生や満足度向上についてが商談内容に明確に含まれている場合
+4. 前払い・即払いサービスを元から検討していたから: 前払い・即払い自体を元々検討していた。それが明確に読み取れる場合のみ。
+5. デジタル給与対応であるから: デジタル給与のニーズが商談内容に明確に含まれている場合
+
+(B) 課題定義:
+{CHALLENGE_DEFINITIONS_JSON}
+
+重要: 商談内容と関係ない観点・課題は必ず0にしてください。推測や一般論ではなく、商談ログに明確に書かれている内容のみで判断してください。
+
+JSON形式で以下のように回答してください（1=該当する、0=該当しない）:
+{{
+  "{APPEAL_KEY}": {{
+{label_schema(HR_APPEAL_LABELS)}
+  }},
+  "{CHALLENGE_KEY}": {{
+{label_schema(CHALLENGE_LABELS)}
+  }}
+}}
+"""
+
+    @staticmethod
+    def get_system_prompt():
+        """
+        システムプロンプトを取得
+
+        Returns:
+            str: システムプロンプト
+        """
+        return "あなたは営業分析と人材・労務課題の分析のエキスパートです。給与前払い・即払いサービスの商談ログを分析し、プロダクトのどの要素が顧客に刺さったかと、顧客が抱えている人材・労務上の課題を特定します。"
+
+    @staticmethod
+    def get_user_prompt(activity_content):
+        """
+        ユーザープロンプトを取得（訴求ポイント＋課題分類）
+
+        Args:
+            activity_content: 分析対象の活動内容
+
+        Returns:
+            str: ユーザープロンプト
+        """
+        return build_user_prompt(UnifiedHRAnalysisPrompts.INSTRUCTIONS, activity_content)
@@ -0,0 +1,818 @@
+import os
+import sys
+import csv
+import time
+import asyncio
+import argparse
+from collections import deque
+from src.utils.openai_utils import AsyncOpenAIClient
+from src.utils.micro_batch import MicroBatcher
+from src.utils.batch_jobs import BatchJobRunner
+from src.utils.dedup import DuplicateIndex
+from src.utils.chunking import HistoryChunker, or_reduce
+from src.utils.cleansing_manifest import fingerprint_record
+from src.utils.run_journal import RunJournal
+from src.utils.label_propagation import LabelPropagator, DEFAULT_AUDIT_RATE, propagation_model_path
+from src.utils.table_io import (
+    DATA_FORMATS, DEFAULT_DATA_FORMAT, RECORD_COLUMN_TYPES, ParquetRecordWriter, iter_records, count_records,
+    parquet_path, resolve_input_path
+)
+
+# 入力・出力CSVの共通列
+BASE_COLUMNS = ["更新日時", "法人名", "活動内容"]
+CONTENT_COLUMN = "活動内容"
+
+# 書き込み待ちにできる行数の上限（処理中の行をこれ以上ためずに先頭の完了を待つ）
+DEFAULT_MAX_PENDING = int(os.getenv("ANALYSIS_MAX_PENDING", "500"))
+
+# 出力CSVをディスクに書き出す間隔（行数・秒数のどちらかに達したらflush）
+DEFAULT_FLUSH_ROWS = int(os.getenv("ANALYSIS_FLUSH_ROWS", "100"))
+DEFAULT_FLUSH_SECONDS = 10
+
+# マイクロバッチで1回の MicroBatcher.run にまとめる行数
+MICRO_BATCH_WINDOW = 200
+
+
+class AnalysisOutput:
+    """
+    分析結果の出力先CSV
+
+    section を指定した場合は回答のそのキーの中（入れ子のdict）からラベル列を取り出す。
+    """
+
+    def __init__(self, path, labels, section=None):
+        """
+        Args:
+            path: 出力CSVファイルパス
+            labels: ラベル列のリスト
+            section: 回答のセクション名（Noneなら回答の直下）
+        """
+        self.path = path
+        self.labels = list(labels)
+        self.section = section
+
+    @property
+    def fieldnames(self):
+        """出力CSVの列"""
+        return BASE_COLUMNS + self.labels
+
+    @property
+    def column_types(self):
+        """出力Parquetの列の型（ラベル列はint8）"""
+        return {**RECORD_COLUMN_TYPES, **{label: "label" for label in self.labels}}
+
+    def build_row(self, row, result):
+        """
+        入力行と分析結果から出力行を作る（ラベルがない場合は0）
+
+        Args:
+            row: 入力行（dict）
+            result: 分析結果（dict）
+
+        Returns:
+            dict: 出力行
+        """
+        labels = result[self.section] if self.section else result
+        return {
+            **{column: row[column] for column in BASE_COLUMNS},
+            **{label: labels.get(label, 0) for label in self.labels}
+        }
+
+
+class AnalysisTask:
+    """
+    分析タスクの定義（プロンプト・ラベル・エラー時の値・入出力パス）
+
+    出力が1つでセクションがない場合は回答の直下のラベルを、セクションがある場合は
+    各セクションがdictであることを回答の必須条件にする。
+    """
+
+    def __init__(self, name, prompts, default_response, input_path, outputs, verb="分析", title=None,
+                 output_tokens_per_item=None, source=None):
+        """
+        Args:
+            name: タスク名（Batch APIのジョブ名に使用）
+            prompts: get_system_prompt() / get_user_prompt(content) を持つプロンプト
+            default_response: エラー時のデフォルト応答を返す関数
+            input_path: 入力CSVファイルパス（クレンジング済みデータ）
+            outputs: AnalysisOutput のリスト
+            verb: 表示用の処理名（"分析" / "分類"）
+            title: 完了時に表示する処理名（Noneなら verb）
+            output_tokens_per_item: マイクロバッチでの1件分の回答のトークン数の見積もり
+            source: 入力データのソース名（"人事" / "小売"。埋め込みインデックスで使用）
+        """
+        self.name = name
+        self.prompts = prompts
+        self.default_response = default_response
+        self.input_path = input_path
+        self.outputs = list(outputs)
+        self.verb = verb
+        self.title = title or verb
+        self.output_tokens_per_item = output_tokens_per_item
+        self.source = source
+        self.sections = [output.section for output in self.outputs if output.section]
+
+    @property
+    def propagation_labels(self):
+        """ラベル伝播で判定できるラベル（出力が1つでセクションがないタスクのみ。それ以外はNone）"""
+        if len(self.outputs) == 1 and not self.sections:
+            return self.outputs[0].labels
+        return None
+
+    def mock_response(self, body=None):
+        """
+        Batch APIのローカルバックエンド用の仮の回答（回答形式のすべてのラベルを0にする）
+
+        Args:
+            body: チャットリクエストのbody（使わない。LocalBatchBackend の responder と同じ引数）
+
+        Returns:
+            dict: セクションがある場合はセクションごとの入れ子のdict
+        """
+        answer = {}
+        for output in self.outputs:
+            labels = {label: 0 for label in output.labels}
+            if output.section:
+                answer[output.section] = labels
+            else:
+                answer.update(labels)
+        return answer
+
+    @property
+    def required_keys(self):
+        """1件分の回答に必須のキー"""
+        if self.sections:
+            return self.sections
+        return [label for output in self.outputs for label in output.labels]
+
+    def is_complete(self, result):
+        """
+        回答が結果として使える形式かどうか
+
+        Args:
+            result: APIの回答（dict、失敗時はNone）
+
+        Returns:
+            bool: 使える場合はTrue
+        """
+        if not isinstance(result, dict):
+            return False
+        return all(isinstance(result.get(section), dict) for section in self.sections)
+
+    def matched_labels(self, result):
+        """
+        該当（1）の項目名を取得
+
+        Args:
+            result: 分析結果（dict）
+
+        Returns:
+            list: 該当した項目名のリスト
+        """
+        if self.sections:
+            items = {}
+            for section in self.sections:
+                items.update(result[section])
+        else:
+            items = result
+        return [key for key, value in items.items() if value == 1]
+
+
+class ResultWriter:
+    """
+    分析結果を出力CSVに逐次書き込むクラス
+
+    最初の行を書くときに出力ファイルを開いてヘッダーを書き、以降は行ごとに追記する。
+    一定の行数・時間ごとにflushするため、途中で中断してもそれまでの結果はファイルに残る。
+    data_format が "parquet" の場合は同じ結果を型付きのParquet（ラベル列はint8）にも書き込む。
+    """
+
+    def __init__(self, outputs, flush_rows=DEFAULT_FLUSH_ROWS, flush_seconds=DEFAULT_FLUSH_SECONDS,
+                 data_format="csv"):
+        """
+        Args:
+            outputs: AnalysisOutput のリスト
+            flush_rows: flushする間隔（行数）
+            flush_seconds: flushする間隔（秒）
+            data_format: "csv" または "parquet"
+        """
+        self.outputs = outputs
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.data_format = data_format
+        self.count = 0
+        self._files = []
+        self._writers = []
+        self._parquet_writers = []
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, row, result):
+        """
+        1行分の結果を各出力CSVに書き込む
+
+        Args:
+            row: 入力行（dict）
+            result: 分析結果（dict）
+        """
+        if not self._writers:
+            self._open()
+
+        for i, output in enumerate(self.outputs):
+            output_row = output.build_row(row, result)
+            self._writers[i].writerow(output_row)
+            if self._parquet_writers:
+                self._parquet_writers[i].write(output_row)
+        self.count += 1
+
+        self._unflushed += 1
+        if self._unflushed >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def _open(self):
+        """出力ファイルを開いてヘッダーを書き込む"""
+        for output in self.outputs:
+            output_dir = os.path.dirname(output.path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            f = open(output.path, 'w', encoding='utf-8', newline='')
+            writer = csv.DictWriter(f, fieldnames=output.fieldnames)
+            writer.writeheader()
+            self._files.append(f)
+            self._writers.append(writer)
+            if self.data_format == "parquet":
+                self._parquet_writers.append(ParquetRecordWriter(parquet_path(output.path), output.column_types))
+
+    def flush(self):
+        """書き込んだ内容をディスクに書き出す"""
+        for f in self._files:
+            f.flush()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """出力ファイルを閉じる"""
+        for f in self._files:
+            f.close()
+        for parquet_writer in self._parquet_writers:
+            parquet_writer.close()
+        self._files = []
+        self._parquet_writers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class AnalysisRunner:
+    """
+    分析タスクを実行するクラス
+
+    入力CSVを1行ずつ読み込んで並行して分析し、完了した行から入力順に出力CSVへ追記する。
+    処理中の行は max_pending 件までしかためないため、メモリ使用量はデータ件数に依存しない
+    （dedup 時は代表ごとの結果を保持するため、重複のない活動内容の件数に比例する）。
+    journal を指定した場合は成功した行の結果を記録し、記録済みの行はAPIを呼ばずに記録の結果を使う。
+    propagator を指定した場合は、埋め込みから確信度の高いラベルが決まる行はAPIを呼ばずにその結果を使う。
+    """
+
+    def __init__(self, task, client=None, micro_batch=False, dedup=False, chunker=None,
+                 max_pending=DEFAULT_MAX_PENDING, flush_rows=DEFAULT_FLUSH_ROWS, journal=None,
+                 data_format=DEFAULT_DATA_FORMAT, propagator=None):
+        """
+        Args:
+            task: AnalysisTask
+            client: AsyncOpenAIClient（Noneなら最初にAPIを呼ぶときに生成）
+            micro_batch: Trueの場合は複数のログを1回のリクエストにまとめて分析
+            dedup: Trueの場合は同じ・ほぼ同じ活動内容は代表の1件だけを分析
+            chunker: HistoryChunker（Noneなら生成）
+            max_pending: 書き込み待ちにできる行数の上限
+            flush_rows: 出力CSVをflushする間隔（行数）
+            journal: RunJournal（Noneならチェックポイントを使わない）
+            data_format: "parquet" の場合は入力にParquetがあれば使い、結果をParquetにも出力
+            propagator: LabelPropagator（prepare 済み。Noneならすべての行をLLMで分析）
+        """
+        self.task = task
+        self.journal = journal
+        self.propagator = propagator
+        self.data_format = data_format
+        self.input_path = resolve_input_path(task.input_path, data_format)
+        self.chunker = chunker or HistoryChunker()
+        self.duplicates = DuplicateIndex() if dedup else None
+        self.micro_batch = micro_batch
+        self.max_pending = max_pending
+        self.flush_rows = flush_rows
+        self.stats = {"rows": 0, "analyzed": 0, "split": 0, "chunks": 0, "failed": 0}
+        self._client = client
+        self._batcher = None
+        self._group_futures = {}
+        self._local_groups = set()   # dedup 時にローカル判定の結果を出力するグループ番号
+        self._tasks = set()
+
+    @property
+    def client(self):
+        """
+        AsyncOpenAIClient（Batch APIのローカルバックエンドのようにAPIを呼ばない実行では生成しない）
+        """
+        if self._client is None:
+            self._client = AsyncOpenAIClient()
+        return self._client
+
+    @property
+    def batcher(self):
+        """MicroBatcher（マイクロバッチを使わない場合はNone）"""
+        if self.micro_batch and self._batcher is None:
+            self._batcher = MicroBatcher(
+                self.client,
+                self.task.prompts,
+                required_keys=self.task.required_keys,
+                output_tokens_per_item=self.task.output_tokens_per_item
+            )
+        return self._batcher
+
+    async def run(self):
+        """
+        入力CSVの全行を分析して出力CSVに書き込む
+
+        Returns:
+            int: 出力した行数
+        """
+        block_size = MICRO_BATCH_WINDOW if self.batcher else 1
+        pending = deque()
+
+        with self._open_writer() as writer:
+            block = []
+            for row in iter_records(self.input_path):
+                block.append(row)
+                if len(block) < block_size:
+                    continue
+                pending.extend(zip(block, self._dispatch(block)))
+                block = []
+
+                # 先頭の行が完了していれば書き込み、上限に達していれば先頭の完了を待つ
+                while pending and (len(pending) > self.max_pending or pending[0][1].done()):
+                    row, future = pending.popleft()
+                    self._write(writer, row, await future)
+
+            if block:
+                pending.extend(zip(block, self._dispatch(block)))
+            while pending:
+                row, future = pending.popleft()
+                self._write(writer, row, await future)
+
+            return writer.count
+
+    def run_batch_api(self, backend_name):
+        """
+        Batch APIで分析して出力CSVに書き込む
+
+        リクエストファイルを作るため、分析対象（dedup 後）の活動内容はメモリに読み込む。
+
+        Args:
+            backend_name: "openai" または "local"
+
+        Returns:
+            int: 出力した行数
+        """
+        results = []          # グループ番号 → (分析結果, 成功したか)。未分析の間はNone
+        targets = []          # (グループ番号, 活動内容, 行の指紋)
+        assignments = []
+        for row in iter_records(self.input_path):
+            content = row[CONTENT_COLUMN]
+            if self.duplicates is None:
+                group, is_new = len(results), True
+            else:
+                group, is_new = self.duplicates.add(content)
+            assignments.append(group)
+            if not is_new:
+                self._mark_duplicate(row, group)
+                continue
+
+            key = fingerprint_record(row) if self.journal or self.propagator else None
+            recorded = self.journal.get(key) if self.journal else None
+            local, audit = self._classify_locally(content, key, group) if recorded is None else (None, False)
+            if recorded is not None:
+                results.append((recorded, True))
+            elif local is not None and not audit:
+                results.append((local, True))
+                self._record(key, (local, True))
+            else:
+                results.append(None)
+                targets.append((group, content, key, local if audit else None))
+
+        plan = self.chunker.plan([content for _, content, _, _ in targets])
+        self._count_plan(plan)
+
+        if plan.contents:
+            runner = BatchJobRunner.from_backend_name(
+                backend_name,
+                cache=self._client.cache if self._client is not None else None,
+                responder=self.task.mock_response
+            )
+            raw_results = runner.run(
+                self.task.name, self.task.prompts, plan.contents, required_keys=self.task.required_keys
+            )
+            outcomes = self._reduce_chunks(plan, raw_results)
+            for (group, _, key, local), outcome in zip(targets, outcomes):
+                results[group] = outcome
+                self._record(key, outcome)
+                self._audit(local, outcome)
+
+        with self._open_writer() as writer:
+            for row, group in zip(iter_records(self.input_path), assignments):
+                self._write(writer, row, results[group])
+            return writer.count
+
+    def _open_writer(self):
+        """出力用の ResultWriter を作る"""
+        return ResultWriter(self.task.outputs, flush_rows=self.flush_rows, data_format=self.data_format)
+
+    def _dispatch(self, rows):
+        """
+        行の分析を開始し、行ごとの結果を返すFutureを作る
+
+        dedup 時に既出の活動内容は代表のFutureを共有する。チェックポイントに記録済みの行とラベル伝播で
+        判定できた行は、その結果で完了したFutureを使う。マイクロバッチでは新しい活動内容をまとめて1つのタスクで分析する。
+
+        Args:
+            rows: 入力行のリスト
+
+        Returns:
+            list: 行ごとの (分析結果, 成功したか) を返すFutureのリスト
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        block = []
+
+        for row in rows:
+            content = row[CONTENT_COLUMN]
+            group = None
+            if self.duplicates is not None:
+                group, is_new = self.duplicates.add(content)
+                if not is_new:
+                    self._mark_duplicate(row, group)
+                    futures.append(self._group_futures[group])
+                    continue
+
+            key = fingerprint_record(row) if self.journal or self.propagator else None
+            recorded = self.journal.get(key) if self.journal else None
+            local, audit = self._classify_locally(content, key, group) if recorded is None else (None, False)
+            if recorded is not None:
+                future = loop.create_future()
+                future.set_result((recorded, True))
+            elif local is not None and not audit:
+                future = loop.create_future()
+                future.set_result((local, True))
+            elif self.batcher:
+                future = loop.create_future()
+                block.append((content, future))
+            else:
+                future = self._spawn(self._analyze_content(content))
+
+            if self.journal and recorded is None:
+                future.add_done_callback(lambda done, key=key: self._record_future(key, done))
+            if audit:
+                future.add_done_callback(lambda done, local=local: self._audit_future(local, done))
+
+            if group is not None:
+                self._group_futures[group] = future
+            futures.append(future)
+
+        if block:
+            self._spawn(self._analyze_block(block))
+        return futures
+
+    def _classify_locally(self, content, key, group=None):
+        """
+        ラベル伝播で判定し、ローカル判定・LLM判定のどちらで出力するかを記録
+
+        Args:
+            content: 活動内容
+            key: 行の指紋
+            group: dedup 時のグループ番号（同じ活動内容の行にも同じ判定方法を記録するため）
+
+        Returns:
+            tuple: (ローカルで判定した結果（ラベル伝播を使わない・曖昧な場合はNone）,
+                    LLMにも送って確認するか)
+        """
+        if self.propagator is None:
+            return None, False
+        local = self.propagator.classify(content)
+        audit = local is not None and self.propagator.should_audit(key)
+        decided = local is not None and not audit
+        self.propagator.mark(key, decided)
+        if decided and group is not None:
+            self._local_groups.add(group)
+        return local, audit
+
+    def _mark_duplicate(self, row, group):
+        """
+        dedup で代表の結果を使う行にも、代表と同じ判定方法（ローカル判定・LLM判定）を記録
+
+        記録しないとローカル判定の結果を出力した重複行が次回のラベル伝播の学習に混ざる。
+
+        Args:
+            row: 入力行
+            group: 活動内容のグループ番号
+        """
+        if self.propagator is not None:
+            self.propagator.mark(fingerprint_record(row), group in self._local_groups)
+
+    def _audit(self, local, outcome):
+        """
+        ローカルの判定とLLMの結果を比較（確認対象の行でLLMが成功した場合のみ）
+
+        Args:
+            local: ローカルで判定した結果（確認対象でなければNone）
+            outcome: LLMの (分析結果, 成功したか)
+        """
+        result, complete = outcome
+        if local is not None and complete:
+            self.propagator.audit(local, result)
+
+    def _audit_future(self, local, future):
+        """完了したFutureの結果でローカルの判定を確認"""
+        if not future.cancelled() and future.exception() is None:
+            self._audit(local, future.result())
+
+    def _record(self, key, outcome):
+        """
+        成功した行の結果をチェックポイントに記録（エラーの行は記録せず次回の実行で再試行する）
+
+        Args:
+            key: 行の指紋
+            outcome: (分析結果, 成功したか)
+        """
+        result, complete = outcome
+        if self.journal and complete:
+            self.journal.record(key, result)
+
+    def _record_future(self, key, future):
+        """完了したFutureの結果をチェックポイントに記録"""
+        if not future.cancelled() and future.exception() is None:
+            self._record(key, future.result())
+
+    def _spawn(self, coroutine):
+        """タスクを開始し、完了まで参照を保持する"""
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _analyze_content(self, content):
+        """
+        1件の活動内容を分析（長い履歴はチャンクに分けて並行して分析）
+
+        Args:
+            content: 活動内容
+
+        Returns:
+            tuple: (分析結果, すべてのチャンクが成功したか)
+        """
+        chunks = self.chunker.split(content)
+        self._count_chunks(len(chunks))
+
+        system_prompt = self.task.prompts.get_system_prompt()
+        raw_results = await asyncio.gather(*(
+            self.client.analyze_with_prompt(
+                system_prompt, self.task.prompts.get_user_prompt(chunk), required_keys=self.task.required_keys
+            )
+            for chunk in chunks
+        ))
+        return self._combine(raw_results)
+
+    async def _analyze_block(self, block):
+        """
+        複数の活動内容をマイクロバッチでまとめて分析し、各Futureに結果を設定
+
+        Args:
+            block: (活動内容, Future) のリスト
+        """
+        futures = [future for _, future in block]
+        try:
+            plan = self.chunker.plan([content for content, _ in block])
+            self._count_plan(plan)
+            raw_results = await self.batcher.run(plan.contents)
+            for future, result in zip(futures, self._reduce_chunks(plan, raw_results)):
+                future.set_result(result)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _reduce_chunks(self, plan, raw_results):
+        """
+        チャンクごとの回答を元の要素ごとにまとめる
+
+        Args:
+            plan: ChunkPlan
+            raw_results: チャンクごとの回答（失敗時はNone）
+
+        Returns:
+            list: 元の要素ごとの (分析結果, 成功したか)
+        """
+        return [self._combine(group) for group in plan.group(raw_results)]
+
+    def _combine(self, raw_results):
+        """
+        1件分のチャンクの回答をまとめる（エラー・形式不正のチャンクはデフォルト値として扱う）
+
+        Args:
+            raw_results: チャンクごとの回答
+
+        Returns:
+            tuple: (分析結果, すべてのチャンクが成功したか)
+        """
+        complete = all(self.task.is_complete(result) for result in raw_results)
+        results = [
+            result if self.task.is_complete(result) else self.task.default_response()
+            for result in raw_results
+        ]
+        return (results[0] if len(results) == 1 else or_reduce(results)), complete
+
+    def _count_plan(self, plan):
+        """分割の統計を更新（ChunkPlan のすべての要素）"""
+        for chunk_count in plan.chunk_counts():
+            self._count_chunks(chunk_count)
+
+    def _count_chunks(self, chunk_count):
+        """分割の統計を更新（1件の活動内容のチャンク数）"""
+        self.stats["analyzed"] += 1
+        self.stats["chunks"] += chunk_count
+        if chunk_count > 1:
+            self.stats["split"] += 1
+
+    def _write(self, writer, row, outcome):
+        """
+        1行分の結果を書き込んで表示
+
+        Args:
+            writer: ResultWriter
+            row: 入力行
+            outcome: (分析結果, 成功したか)
+        """
+        result, complete = outcome
+        writer.write(row, result)
+        self.stats["rows"] += 1
+        if not complete:
+            self.stats["failed"] += 1
+
+        print(f"\n処理結果: {writer.count}件目 - {row['法人名']}")
+        print(f"{self.task.verb}完了: {row['法人名']}")
+        for key in self.task.matched_labels(result):
+            print(f"  - {key}: 該当")
+
+    def print_stats(self):
+        """分割・重複集約・マイクロバッチ・エラー・APIリクエストの統計を表示"""
+        if self.stats["split"]:
+            print(
+                f"長い履歴の分割: {self.stats['split']}件を分割し、"
+                f"{self.stats['analyzed']}件 → {self.stats['chunks']}チャンクで分析"
+            )
+        if self.duplicates is not None:
+            self.duplicates.print_stats()
+        if self._batcher is not None:
+            self._batcher.print_stats()
+        if self.journal is not None:
+            self.journal.print_stats()
+        if self.propagator is not None:
+            self.propagator.print_stats()
+        if self.stats["failed"]:
+            print(f"⚠ エラーのためデフォルト値で出力: {self.stats['failed']}件")
+        if self._client is not None:
+            self._client.print_stats()
+
+
+def open_propagator(task, args):
+    """
+    ラベル伝播のモデルを読み込み、分析対象の行の埋め込みを用意する
+
+    Args:
+        task: AnalysisTask
+        args: コマンドライン引数
+
+    Returns:
+        LabelPropagator: ラベル伝播（モデルがない・使えない場合はNone）
+    """
+    model_path = propagation_model_path(task.name)
+    if not os.path.exists(model_path):
+        print(
+            f"⚠ ラベル伝播のモデルがありません: {model_path}（scripts/train_label_propagation.py で学習）。"
+            f"すべての行をLLMで{task.verb}します"
+        )
+        return None
+
+    propagator = LabelPropagator.load(model_path, audit_rate=args.audit_rate)
+    if propagator.labels != task.propagation_labels:
+        print(f"⚠ ラベル伝播のモデルのラベルがタスクと一致しません（学習し直してください）。すべての行をLLMで{task.verb}します")
+        return None
+
+    start = time.perf_counter()
+    try:
+        stats = propagator.prepare(task.source, iter_records(resolve_input_path(task.input_path, args.format)))
+    except ValueError as e:
+        print(f"⚠ {e}。すべての行をLLMで{task.verb}します")
+        return None
+    print(
+        f"ラベル伝播: 埋め込みを準備しました（新たに埋め込み: {stats['embedded']}件, "
+        f"{time.perf_counter() - start:.1f}秒）"
+    )
+    return propagator
+
+
+def run_cli(task):
+    """
+    コマンドライン引数を解釈して分析タスクを実行
+
+    Args:
+        task: AnalysisTask
+    """
+    parser = argparse.ArgumentParser(description=f"{task.title}（{task.input_path}）")
+    parser.add_argument(
+        "--micro-batch",
+        action="store_true",
+        help="複数のログを1回のリクエストにまとめて送信する（件数はトークン予算から自動決定）"
+    )
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="Batch APIでまとめて実行する（完了までポーリングして結果を取り込む。夜間の全件再実行向け）"
+    )
+    parser.add_argument(
+        "--batch-backend",
+        choices=["openai", "local"],
+        default="openai",
+        help="Batch APIのバックエンド（local: オフライン検証用のファイルベース代替）"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="同じ・ほぼ同じ活動内容をまとめ、代表の1件だけを分析して結果を展開する"
+    )
+    parser.add_argument(
+        "--format",
+        choices=DATA_FORMATS,
+        default=DEFAULT_DATA_FORMAT,
+        help="parquet: 入力にParquetがあれば使い、結果をCSVに加えてParquet（ラベル列はint8）にも出力する"
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="前回の中断時のチェックポイントを破棄して最初から実行する"
+    )
+    if task.propagation_labels is not None:
+        parser.add_argument(
+            "--propagate",
+            action="store_true",
+            help="過去のLLMのラベルで学習したモデルで、確信度の高い行はAPIを呼ばずにラベルを付ける"
+                 "（事前に scripts/train_label_propagation.py で学習）"
+        )
+        parser.add_argument(
+            "--audit-rate",
+            type=float,
+            default=DEFAULT_AUDIT_RATE,
+            help=f"--propagate でローカルで判定した行をLLMにも送って精度を確認する割合（デフォルト: {DEFAULT_AUDIT_RATE}）"
+        )
+    args = parser.parse_args()
+
+    journal = RunJournal.for_task(task)
+    propagator = None
+    if getattr(args, "propagate", False):
+        propagator = open_propagator(task, args)
+    runner = AnalysisRunner(
+        task, micro_batch=args.micro_batch, dedup=args.dedup, journal=journal, data_format=args.format,
+        propagator=propagator
+    )
+    print(f"{task.verb}対象: {count_records(runner.input_path)}件")
+
+    if args.fresh:
+        journal.clear()
+    elif journal.recorded:
+        print(f"チェックポイント: 前回の中断時の記録 {journal.recorded}件から再開します（--fresh で最初から実行）")
+
+    try:
+        if args.batch_api:
+            total = runner.run_batch_api(args.batch_backend)
+        else:
+            total = asyncio.run(runner.run())
+    except KeyboardInterrupt:
+        journal.close()
+        if propagator is not None:
+            propagator.close()
+        print(f"\n中断しました。同じコマンドを再実行すると完了済みの行を飛ばして再開します（{journal.path}）")
+        sys.exit(130)
+
+    output_paths = " と ".join(output.path for output in task.outputs)
+    print(f"\n\n{task.title}完了！結果を {output_paths} に保存しました。")
+    print(f"総件数: {total}件")
+    runner.print_stats()
+
+    # 全行が成功した場合だけ記録を削除する（エラーの行は次回の実行で再試行する）
+    if runner.stats["failed"]:
+        print(f"チェックポイント: エラーの {runner.stats['failed']}件は次回の実行で再試行します（{journal.path}）")
+    else:
+        journal.clear()
+    journal.close()
+    if propagator is not None:
+        propagator.close()
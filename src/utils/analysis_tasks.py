@@ -0,0 +1,70 @@
+from src.utils.openai_utils import DefaultResponseMixin
+from src.utils.analysis_runner import AnalysisTask, AnalysisOutput
+from src.prompts.analysis_prompts import (
+    AnalysisPrompts,
+    HRAnalysisPrompts,
+    ChallengeClassificationPrompts,
+    UnifiedHRAnalysisPrompts,
+    RETAIL_APPEAL_LABELS,
+    HR_APPEAL_LABELS,
+    CHALLENGE_LABELS,
+)
+
+# エラー時のデフォルト応答
+_defaults = DefaultResponseMixin()
+
+# 小売データの訴求ポイント分析
+RETAIL_ANALYSIS_TASK = AnalysisTask(
+    name="analysis_retail",
+    prompts=AnalysisPrompts(),
+    default_response=_defaults.get_default_error_response,
+    input_path="data/cleaned/小売_cleaned.csv",
+    source="小売",
+    outputs=[AnalysisOutput("results/analysis_results.csv", RETAIL_APPEAL_LABELS)]
+)
+
+# 人事データの訴求ポイント分析
+HR_ANALYSIS_TASK = AnalysisTask(
+    name="analysis_hr",
+    prompts=HRAnalysisPrompts(),
+    default_response=_defaults.get_hr_default_error_response,
+    input_path="data/cleaned/人事_cleaned.csv",
+    source="人事",
+    outputs=[AnalysisOutput("results/analysis_results_hr.csv", HR_APPEAL_LABELS)]
+)
+
+# 人事データの課題分類
+CHALLENGE_CLASSIFICATION_TASK = AnalysisTask(
+    name="challenge_classification",
+    prompts=ChallengeClassificationPrompts(),
+    default_response=_defaults.get_challenge_default_error_response,
+    input_path="data/cleaned/人事_cleaned.csv",
+    source="人事",
+    outputs=[AnalysisOutput("results/challenge_classification.csv", CHALLENGE_LABELS)],
+    verb="分類",
+    title="課題分類"
+)
+
+# 人事データの訴求ポイント分析＋課題分類（1回のリクエストで両方を判定し、2つのCSVに出力）
+HR_UNIFIED_TASK = AnalysisTask(
+    name="analysis_hr_unified",
+    prompts=UnifiedHRAnalysisPrompts(),
+    default_response=_defaults.get_unified_default_error_response,
+    input_path="data/cleaned/人事_cleaned.csv",
+    source="人事",
+    outputs=[
+        AnalysisOutput(
+            "results/analysis_results_hr.csv", HR_APPEAL_LABELS, section=UnifiedHRAnalysisPrompts.APPEAL_KEY
+        ),
+        AnalysisOutput(
+            "results/challenge_classification.csv", CHALLENGE_LABELS, section=UnifiedHRAnalysisPrompts.CHALLENGE_KEY
+        ),
+    ],
+    output_tokens_per_item=250
+)
+
+# タスク名 → タスク定義
+TASKS = {
+    task.name: task
+    for task in (RETAIL_ANALYSIS_TASK, HR_ANALYSIS_TASK, CHALLENGE_CLASSIFICATION_TASK, HR_UNIFIED_TASK)
+}
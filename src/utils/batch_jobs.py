@@ -0,0 +1,442 @@
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+from src.utils.response_cache import ResponseCache
+from src.utils.openai_utils import PromptCacheStats
+
+# バッチファイルの保存先
+DEFAULT_BATCH_DIR = "data/batch"
+
+# 完了扱いにするステータス（expired/cancelled は途中までの結果を取り込む）
+FINISHED_STATUSES = ("completed", "expired", "cancelled")
+FAILED_STATUSES = ("failed",)
+
+
+def build_batch_requests(prompt_pairs, model="gpt-4o-mini", temperature=0.3):
+    """
+    Batch API用のリクエスト行を作成
+
+    Args:
+        prompt_pairs: (custom_id, system_prompt, user_prompt) のリスト
+        model: 使用するモデル名
+        temperature: 生成の温度パラメータ
+
+    Returns:
+        list: JSONLの各行に対応するdictのリスト
+    """
+    return [
+        {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                "response_format": {"type": "json_object"},
+                "temperature": temperature
+            }
+        }
+        for custom_id, system_prompt, user_prompt in prompt_pairs
+    ]
+
+
+def write_jsonl(lines, path):
+    """
+    dictのリストをJSONLファイルに書き込む
+
+    Args:
+        lines: dictのリスト
+        path: 出力ファイルパス
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+def parse_batch_output(text):
+    """
+    Batch APIの出力JSONLを custom_id ごとの分析結果に変換
+
+    Args:
+        text: 出力ファイルの内容
+
+    Returns:
+        dict: custom_id → 分析結果（エラー・JSON不正の行はNone）
+    """
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        custom_id = item.get("custom_id")
+        response = item.get("response") or {}
+
+        if item.get("error") or response.get("status_code") != 200:
+            results[custom_id] = None
+            continue
+
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[custom_id] = json.loads(content)
+        except (KeyError, IndexError, TypeError, json.JSONDecodeError):
+            results[custom_id] = None
+
+    return results
+
+
+def parse_batch_usage(text):
+    """
+    Batch APIの出力JSONLから入力トークン数とプロンプトキャッシュに当たったトークン数を集計
+
+    Args:
+        text: 出力ファイルの内容
+
+    Returns:
+        PromptCacheStats: 集計（usage のない行は数えない）
+    """
+    usage = PromptCacheStats()
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        body = (json.loads(line).get("response") or {}).get("body") or {}
+        counts = body.get("usage")
+        if counts:
+            details = counts.get("prompt_tokens_details") or {}
+            usage.add(counts.get("prompt_tokens"), details.get("cached_tokens"))
+    return usage
+
+
+class OpenAIBatchBackend:
+    """OpenAI Batch APIのバックエンド"""
+
+    poll_interval = 60
+
+    def __init__(self, client=None):
+        """
+        Args:
+            client: openai.OpenAI（Noneの場合は環境変数のAPIキーで生成）
+        """
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = client
+
+    def submit(self, input_path):
+        """
+        リクエストファイルをアップロードしてバッチを作成
+
+        Args:
+            input_path: リクエストJSONLのパス
+
+        Returns:
+            str: バッチID
+        """
+        with open(input_path, 'rb') as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    def retrieve(self, batch_id):
+        """
+        バッチの状態を取得
+
+        Args:
+            batch_id: バッチID
+
+        Returns:
+            dict: {"status", "output_file_id", "completed", "total"}
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "status": batch.status,
+            "output_file_id": batch.output_file_id,
+            "completed": counts.completed if counts else 0,
+            "total": counts.total if counts else 0
+        }
+
+    def download(self, file_id):
+        """
+        出力ファイルの内容を取得
+
+        Args:
+            file_id: ファイルID
+
+        Returns:
+            str: ファイルの内容
+        """
+        return self.client.files.content(file_id).text
+
+
+def mock_responder(body):
+    """
+    ローカルバックエンド用の応答生成（プロンプトの回答形式に含まれる項目をすべて0/falseで返す）
+
+    Args:
+        body: チャットリクエストのbody
+
+    Returns:
+        dict: 回答JSON
+    """
+    user_prompt = body["messages"][-1]["content"]
+    result = {key: 0 for key in re.findall(r'"([^"\n]+)": 1 または 0', user_prompt)}
+    if '"is_valid"' in user_prompt:
+        result.update({"is_valid": True, "reason": "ローカルバックエンドの仮判定"})
+    return result
+
+
+class LocalBatchBackend:
+    """
+    ファイルベースのBatch API代替（オフライン検証用）
+
+    submit でリクエストファイルを作業ディレクトリにコピーし、retrieve のたびに
+    validating → in_progress → completed と状態を進める。完了時に responder で各リクエストの
+    回答を作り、Batch APIと同じ形式の出力JSONLを書き出す。
+    """
+
+    poll_interval = 0
+
+    def __init__(self, root=os.path.join(DEFAULT_BATCH_DIR, "local"), responder=mock_responder):
+        """
+        Args:
+            root: 作業ディレクトリ
+            responder: リクエストbodyから回答JSON（dict）を作る関数
+        """
+        self.root = root
+        self.responder = responder
+
+    def _status_path(self, batch_id):
+        """状態ファイルのパス"""
+        return os.path.join(self.root, batch_id, "status.json")
+
+    def _write_status(self, batch_id, status):
+        """状態ファイルを書き込む"""
+        with open(self._status_path(batch_id), 'w', encoding='utf-8') as f:
+            json.dump(status, f, ensure_ascii=False)
+
+    def submit(self, input_path):
+        """
+        リクエストファイルを作業ディレクトリにコピーしてバッチを作成
+
+        Args:
+            input_path: リクエストJSONLのパス
+
+        Returns:
+            str: バッチID
+        """
+        batch_id = f"batch_local_{uuid.uuid4().hex[:12]}"
+        os.makedirs(os.path.join(self.root, batch_id), exist_ok=True)
+        shutil.copy(input_path, os.path.join(self.root, batch_id, "input.jsonl"))
+        self._write_status(batch_id, {"status": "validating", "output_file_id": None})
+        return batch_id
+
+    def retrieve(self, batch_id):
+        """
+        バッチの状態を取得（呼び出しごとに状態を1段階進める）
+
+        Args:
+            batch_id: バッチID
+
+        Returns:
+            dict: {"status", "output_file_id", "completed", "total"}
+        """
+        with open(self._status_path(batch_id), 'r', encoding='utf-8') as f:
+            status = json.load(f)
+
+        if status["status"] == "validating":
+            status["status"] = "in_progress"
+        elif status["status"] == "in_progress":
+            status["output_file_id"] = self._process(batch_id)
+            status["status"] = "completed"
+        self._write_status(batch_id, status)
+
+        return {"status": status["status"], "output_file_id": status["output_file_id"], "completed": 0, "total": 0}
+
+    def _process(self, batch_id):
+        """入力JSONLの各リクエストに回答して出力JSONLを書き出す"""
+        input_path = os.path.join(self.root, batch_id, "input.jsonl")
+        output_path = os.path.join(self.root, batch_id, "output.jsonl")
+
+        with open(input_path, 'r', encoding='utf-8') as fin, open(output_path, 'w', encoding='utf-8') as fout:
+            for line in fin:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                content = json.dumps(self.responder(request["body"]), ensure_ascii=False)
+                fout.write(json.dumps({
+                    "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "request_id": uuid.uuid4().hex,
+                        "body": {
+                            "object": "chat.completion",
+                            "model": request["body"]["model"],
+                            "choices": [{
+                                "index": 0,
+                                "message": {"role": "assistant", "content": content},
+                                "finish_reason": "stop"
+                            }]
+                        }
+                    },
+                    "error": None
+                }, ensure_ascii=False) + "\n")
+
+        return output_path
+
+    def download(self, file_id):
+        """
+        出力ファイルの内容を取得
+
+        Args:
+            file_id: 出力ファイルのパス
+
+        Returns:
+            str: ファイルの内容
+        """
+        with open(file_id, 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+class BatchJobRunner:
+    """
+    分析リクエストをBatch APIでまとめて実行するクラス
+
+    キャッシュ済みのリクエストはバッチに含めず、取得した結果はキャッシュにも保存する。
+    """
+
+    def __init__(self, backend, work_dir=DEFAULT_BATCH_DIR, cache=None, use_cache=True,
+                 model="gpt-4o-mini", temperature=0.3):
+        """
+        Args:
+            backend: OpenAIBatchBackend または LocalBatchBackend
+            work_dir: リクエスト・結果ファイルの保存先
+            cache: ResponseCache（Noneの場合は環境変数の設定で生成）
+            use_cache: キャッシュを使用するかどうか
+            model: 使用するモデル名
+            temperature: 生成の温度パラメータ
+        """
+        self.backend = backend
+        self.work_dir = work_dir
+        self.cache = (cache or ResponseCache.from_env()) if use_cache else None
+        self.model = model
+        self.temperature = temperature
+
+    @classmethod
+    def from_backend_name(cls, name, responder=None, **kwargs):
+        """
+        バックエンド名から生成
+
+        ローカルバックエンドの仮の回答が本番のキャッシュに混ざらないよう、local ではキャッシュを使わない。
+
+        Args:
+            name: "openai" または "local"
+            responder: local の場合の回答を作る関数（Noneなら mock_responder。入れ子の回答形式のタスクは指定する）
+
+        Returns:
+            BatchJobRunner: ランナー
+        """
+        if name == "local":
+            return cls(LocalBatchBackend(responder=responder or mock_responder), **{**kwargs, "use_cache": False})
+        return cls(OpenAIBatchBackend(), **kwargs)
+
+    def run(self, job_name, prompts, contents, required_keys=None):
+        """
+        全ログをバッチで分析し、入力順の結果を返す
+
+        Args:
+            job_name: ジョブ名（ファイル名に使用）
+            prompts: get_system_prompt() / get_user_prompt(content) を持つプロンプト
+            contents: 活動内容のリスト
+            required_keys: 1件分の回答に必須のキー（欠けている回答はキャッシュに保存しない）
+
+        Returns:
+            list: 入力順の分析結果（失敗した要素はNone）
+        """
+        system_prompt = prompts.get_system_prompt()
+        results = [None] * len(contents)
+        pending = []
+
+        for i, content in enumerate(contents):
+            user_prompt = prompts.get_user_prompt(content)
+            key = ResponseCache.make_key(self.model, self.temperature, system_prompt, user_prompt)
+            cached = self.cache.get(key, required_keys) if self.cache else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, key, user_prompt))
+
+        print(f"バッチ対象: {len(pending)}件（キャッシュ済み: {len(contents) - len(pending)}件）")
+        if not pending:
+            return results
+
+        input_path = os.path.join(self.work_dir, f"{job_name}_requests.jsonl")
+        write_jsonl(
+            build_batch_requests(
+                [(f"row-{i}", system_prompt, user_prompt) for i, _, user_prompt in pending],
+                model=self.model,
+                temperature=self.temperature
+            ),
+            input_path
+        )
+
+        batch_id = self.backend.submit(input_path)
+        print(f"バッチ送信: {batch_id}（{input_path}）")
+
+        info = self._wait(batch_id)
+        if not info["output_file_id"]:
+            raise RuntimeError(f"バッチの出力がありません: {batch_id}（status: {info['status']}）")
+
+        output_text = self.backend.download(info["output_file_id"])
+        with open(os.path.join(self.work_dir, f"{job_name}_results.jsonl"), 'w', encoding='utf-8') as f:
+            f.write(output_text)
+
+        output = parse_batch_output(output_text)
+        failed = 0
+        for i, key, _ in pending:
+            result = output.get(f"row-{i}")
+            results[i] = result
+            if result is None:
+                failed += 1
+            elif self.cache:
+                self.cache.put(key, result, required_keys)
+
+        print(f"バッチ完了: 成功 {len(pending) - failed}件 / 失敗 {failed}件")
+        parse_batch_usage(output_text).print_stats()
+        return results
+
+    def _wait(self, batch_id):
+        """
+        バッチの完了を待つ
+
+        Args:
+            batch_id: バッチID
+
+        Returns:
+            dict: 完了時のバッチ情報
+        """
+        while True:
+            info = self.backend.retrieve(batch_id)
+            if info["status"] in FINISHED_STATUSES:
+                return info
+            if info["status"] in FAILED_STATUSES:
+                raise RuntimeError(f"バッチが失敗しました: {batch_id}")
+
+            if info["total"]:
+                print(f"  状態: {info['status']} ({info['completed']}/{info['total']})")
+            else:
+                print(f"  状態: {info['status']}")
+            time.sleep(self.backend.poll_interval)
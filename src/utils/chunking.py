@@ -0,0 +1,225 @@
+import os
+from src.utils.rate_limiter import estimate_tokens
+
+# 統合済みの活動内容でログを区切る文字列（data_cleaner の統合処理と同じ）
+HISTORY_SEPARATOR = "\n\n---\n\n"
+
+# 1回のリクエストに含める活動内容のトークン数の上限
+DEFAULT_CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "4000"))
+
+
+class TokenCounter:
+    """
+    テキストのトークン数を数えるクラス
+
+    tiktoken がインストールされていればモデルのエンコーディングで数え、
+    なければ estimate_tokens の近似値を使う。
+    """
+
+    def __init__(self, model="gpt-4o-mini"):
+        """
+        Args:
+            model: エンコーディングを選ぶためのモデル名
+        """
+        try:
+            import tiktoken
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("o200k_base")
+        except ImportError:
+            self.encoding = None
+
+    def count(self, text):
+        """
+        トークン数を数える
+
+        Args:
+            text: テキスト
+
+        Returns:
+            int: トークン数
+        """
+        if self.encoding:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return estimate_tokens(text)
+
+
+def or_reduce(results):
+    """
+    チャンクごとの分析結果を1件にまとめる（0/1の項目はいずれかが1なら1）
+
+    入れ子のdict（統合版の "訴求ポイント" / "課題" など）は項目ごとに再帰的にまとめる。
+    0/1以外の値は最初のチャンクの値を使う。
+
+    Args:
+        results: 分析結果（dict）のリスト
+
+    Returns:
+        dict: まとめた分析結果
+    """
+    merged = {}
+    for result in results:
+        for key, value in result.items():
+            if key not in merged:
+                merged[key] = or_reduce([value]) if isinstance(value, dict) else value
+            elif isinstance(value, dict) and isinstance(merged[key], dict):
+                merged[key] = or_reduce([merged[key], value])
+            elif value == 1 and merged[key] == 0:
+                merged[key] = 1
+    return merged
+
+
+class ChunkPlan:
+    """
+    活動内容をチャンクに分けた結果
+
+    contents は分析に送るチャンクの一覧、owners は各チャンクの元の要素のインデックス。
+    """
+
+    def __init__(self, contents, owners, total):
+        self.contents = contents
+        self.owners = owners
+        self.total = total
+
+    def group(self, results):
+        """
+        チャンクごとの結果を元の要素ごとのリストに分ける
+
+        Args:
+            results: チャンクごとの結果（contents と同じ順。失敗したチャンクの None もそのまま入る）
+
+        Returns:
+            list: 元の要素の順の、チャンクの結果のリスト
+        """
+        grouped = [[] for _ in range(self.total)]
+        for owner, result in zip(self.owners, results):
+            grouped[owner].append(result)
+        return grouped
+
+    def chunk_counts(self):
+        """
+        元の要素ごとのチャンク数
+
+        Returns:
+            list: 元の要素の順のチャンク数
+        """
+        counts = [0] * self.total
+        for owner in self.owners:
+            counts[owner] += 1
+        return counts
+
+
+class HistoryChunker:
+    """
+    統合済みの長い活動内容をトークン予算内のチャンクに分けるクラス
+
+    ログの区切り（"---"）の位置で分け、連続するログを予算に収まる範囲でまとめる。
+    1件のログだけで予算を超える場合は、日時の見出しを各チャンクに付けて行単位（さらに文字数）で分ける。
+    """
+
+    def __init__(self, max_tokens=DEFAULT_CHUNK_TOKENS, counter=None):
+        """
+        Args:
+            max_tokens: 1チャンクのトークン数の上限
+            counter: TokenCounter（Noneなら生成）
+        """
+        self.max_tokens = max_tokens
+        self.counter = counter or TokenCounter()
+        self.separator_tokens = self.counter.count(HISTORY_SEPARATOR)
+
+    def plan(self, contents):
+        """
+        活動内容のリストをチャンクに分ける
+
+        Args:
+            contents: 活動内容のリスト
+
+        Returns:
+            ChunkPlan: 分割結果
+        """
+        chunks = []
+        owners = []
+        for i, content in enumerate(contents):
+            for chunk in self.split(content):
+                chunks.append(chunk)
+                owners.append(i)
+        return ChunkPlan(chunks, owners, len(contents))
+
+    def split(self, content):
+        """
+        1件の活動内容をチャンクに分ける
+
+        Args:
+            content: 活動内容
+
+        Returns:
+            list: チャンクのリスト（予算内ならそのまま1件）
+        """
+        if self.counter.count(content) <= self.max_tokens:
+            return [content]
+
+        pieces = []
+        for entry in content.split(HISTORY_SEPARATOR):
+            if self.counter.count(entry) > self.max_tokens:
+                pieces.extend(self._split_entry(entry))
+            else:
+                pieces.append(entry)
+
+        return self._pack(pieces, HISTORY_SEPARATOR, self.separator_tokens, self.max_tokens)
+
+    def _pack(self, pieces, separator, separator_tokens, budget):
+        """
+        連続する要素を予算に収まる範囲でまとめる
+
+        Args:
+            pieces: 要素のリスト（それぞれ予算内）
+            separator: 要素を連結する文字列
+            separator_tokens: 区切り文字列のトークン数
+            budget: 1チャンクのトークン数の上限
+
+        Returns:
+            list: チャンクのリスト
+        """
+        chunks = []
+        current = []
+        current_tokens = 0
+        for piece in pieces:
+            tokens = self.counter.count(piece)
+            if current and current_tokens + separator_tokens + tokens > budget:
+                chunks.append(separator.join(current))
+                current = []
+                current_tokens = 0
+            current_tokens += tokens + (separator_tokens if current else 0)
+            current.append(piece)
+        if current:
+            chunks.append(separator.join(current))
+        return chunks
+
+    def _split_entry(self, entry):
+        """
+        予算を超える1件のログを行単位（1行が長すぎる場合は文字数）で分ける
+
+        Args:
+            entry: 1件分のログ（先頭行が "[日時]" の場合は各チャンクに付ける）
+
+        Returns:
+            list: 分割したログのリスト
+        """
+        lines = entry.split("\n")
+        header = ""
+        if len(lines) > 1 and lines[0].startswith("[") and lines[0].endswith("]"):
+            header, lines = lines[0] + "\n", lines[1:]
+        budget = self.max_tokens - self.counter.count(header)
+
+        pieces = []
+        for line in lines:
+            tokens = self.counter.count(line)
+            if tokens <= budget:
+                pieces.append(line)
+                continue
+            # 1行が長すぎる場合は文字数で分ける（トークン数の比率から1チャンクの文字数を決める）
+            step = max(1, len(line) * budget // tokens)
+            pieces.extend(line[start:start + step] for start in range(0, len(line), step))
+
+        return [header + chunk for chunk in self._pack(pieces, "\n", self.counter.count("\n"), budget)]
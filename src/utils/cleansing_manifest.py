@@ -0,0 +1,139 @@
+import os
+import json
+import hashlib
+
+
+def fingerprint_record(record):
+    """
+    レコードの指紋（更新日時・法人名・活動内容のハッシュ）を計算
+
+    Args:
+        record: レコード（dict形式）
+
+    Returns:
+        str: SHA-256のハッシュ値
+    """
+    payload = json.dumps(
+        [record.get('更新日時', ''), record.get('法人名', ''), record.get('活動内容', '')],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def group_signature(fingerprints):
+    """
+    法人ごとのレコード構成を表す署名を計算
+
+    統合では更新日時が同じレコードを入力順に並べるため、同じレコードの集合でも入力順が変われば
+    統合結果が変わりうる。署名も入力順に依存させ、順序が変わった法人は再統合する。
+
+    Args:
+        fingerprints: その法人に属するレコードの指紋リスト（入力順）
+
+    Returns:
+        str: SHA-256のハッシュ値
+    """
+    return hashlib.sha256("\n".join(fingerprints).encode('utf-8')).hexdigest()
+
+
+class CleansingManifest:
+    """
+    差分クレンジング用のマニフェスト（JSON）
+
+    - verdicts: レコード指紋 → LLM判定結果
+    - groups: 法人名 → {"signature": レコード構成の署名, "record": 統合済みレコード}
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        """
+        マニフェストを読み込む（ファイルがなければ空で開始）
+
+        Args:
+            path: マニフェストファイルのパス
+        """
+        self.path = path
+        self.verdicts = {}
+        self.groups = {}
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self.verdicts = data.get('verdicts', {})
+                self.groups = data.get('groups', {})
+
+    def get_verdict(self, fingerprint):
+        """
+        過去の判定結果を取得
+
+        Args:
+            fingerprint: レコードの指紋
+
+        Returns:
+            dict: 判定結果（未判定ならNone）
+        """
+        return self.verdicts.get(fingerprint)
+
+    def set_verdict(self, fingerprint, verdict):
+        """
+        判定結果を記録
+
+        Args:
+            fingerprint: レコードの指紋
+            verdict: {"is_valid": bool, "reason": str}
+        """
+        self.verdicts[fingerprint] = {"is_valid": verdict['is_valid'], "reason": verdict.get('reason', '')}
+
+    def get_merged(self, corp_name, signature):
+        """
+        構成が変わっていない法人の統合済みレコードを取得
+
+        Args:
+            corp_name: 法人名
+            signature: 現在のレコード構成の署名
+
+        Returns:
+            dict: 統合済みレコード（構成が変わった・未登録ならNone）
+        """
+        group = self.groups.get(corp_name)
+        if group and group['signature'] == signature:
+            return group['record']
+        return None
+
+    def set_merged(self, corp_name, signature, record):
+        """
+        統合済みレコードを記録
+
+        Args:
+            corp_name: 法人名
+            signature: レコード構成の署名
+            record: 統合済みレコード
+        """
+        self.groups[corp_name] = {"signature": signature, "record": record}
+
+    def prune(self, fingerprints, corp_names):
+        """
+        今回の入力に存在しないエントリを削除
+
+        Args:
+            fingerprints: 今回の入力レコードの指紋の集合
+            corp_names: 今回の有効レコードの法人名の集合
+        """
+        self.verdicts = {fp: v for fp, v in self.verdicts.items() if fp in fingerprints}
+        self.groups = {name: g for name, g in self.groups.items() if name in corp_names}
+
+    def save(self):
+        """マニフェストを書き込む（一時ファイル経由で置き換え）"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {"version": self.VERSION, "verdicts": self.verdicts, "groups": self.groups},
+                f, ensure_ascii=False
+            )
+        os.replace(tmp_path, self.path)
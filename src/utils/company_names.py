@@ -0,0 +1,272 @@
+import re
+import csv
+import unicodedata
+from collections import Counter, defaultdict
+
+# 法人格（前後どちらに付いていても除去する。長いものから順に照合）
+CORPORATE_DESIGNATORS = sorted([
+    "株式会社", "有限会社", "合同会社", "合資会社", "合名会社",
+    "一般社団法人", "一般財団法人", "公益社団法人", "公益財団法人",
+    "社会福祉法人", "医療法人社団", "医療法人財団", "医療法人", "学校法人",
+    "特定非営利活動法人", "npo法人", "独立行政法人", "社会医療法人",
+    "カブシキガイシャ", "ユウゲンガイシャ",
+    "(株)", "(有)", "(合)", "(資)", "(名)", "(社)", "(財)", "(医)", "(福)", "(学)",
+], key=len, reverse=True)
+
+# 英語表記の法人格（末尾のみ。英数字の直後は名前の一部（zinc, hamcorp など）とみなして除去しない）
+ENGLISH_DESIGNATOR_PATTERN = re.compile(
+    r"(?<![a-z0-9])(co\.?,?\s*ltd\.?|inc\.?|corp\.?|corporation|k\.?k\.?|llc|ltd\.?)\s*$"
+)
+
+# 記号・空白（名寄せのキーからは除去する）
+SYMBOL_PATTERN = re.compile(r"[\s\-‐‑–—―・･.,，。、'\"「」『』\[\]【】&＆/／]+")
+
+# 小書きのカナ → 並字（登記上の表記「ツ」「イ」と通称の「ッ」「ィ」をそろえる）
+SMALL_KANA_TABLE = str.maketrans("ァィゥェォッャュョヮヵヶ", "アイウエオツヤユヨワカケ")
+
+# 類似名の照合を行う最小文字数（短い名前は1文字違いでも別会社のことが多い）
+DEFAULT_MIN_FUZZY_LENGTH = 5
+
+# 綴りの揺れとみなす文字（カタカナ・長音・英字）。漢字や数字の1文字違い（第一/第二、東/西など）は
+# 別の会社のことが多いため、同じ日時の活動ログがある場合だけまとめる
+SPELLING_VARIANT_PATTERN = re.compile(r"^[ァ-ヺーa-z]*$")
+
+# 類似名としてまとめた組を表示する件数の上限（すべての組は export_fuzzy_pairs で出力する）
+MAX_PRINTED_FUZZY_PAIRS = 20
+
+# 1つのブロックで比較する候補数の上限（ありふれたキーで比較が膨らむのを防ぐ）
+MAX_BLOCK_SIZE = 50
+
+
+def normalize_company_name(name):
+    """
+    名寄せ用に法人名を正規化
+
+    - NFKC（全角英数・半角カナを統一、㈱ → (株)）と小文字化
+    - 法人格（株式会社・(株)・Co., Ltd. など）の除去
+    - ひらがなをカタカナに統一し、小書きのカナを並字にそろえる
+    - 空白・記号の除去
+
+    Args:
+        name: 法人名
+
+    Returns:
+        str: 正規化した名前（法人格だけの場合は正規化前の文字列から空白を除いたもの）
+    """
+    text = unicodedata.normalize("NFKC", name or "").lower()
+
+    # 英語表記の法人格は語の区切りを見て判定するため、空白を除く前に除去する
+    stripped = re.sub(r"\s+", "", ENGLISH_DESIGNATOR_PATTERN.sub("", text))
+    text = re.sub(r"\s+", "", text)
+    for designator in CORPORATE_DESIGNATORS:
+        stripped = stripped.replace(designator, "")
+
+    # ひらがな → カタカナ
+    stripped = "".join(chr(ord(c) + 0x60) if "ぁ" <= c <= "ゖ" else c for c in stripped)
+    stripped = stripped.translate(SMALL_KANA_TABLE)
+    stripped = SYMBOL_PATTERN.sub("", stripped)
+
+    return stripped or text
+
+
+def deletion_keys(key):
+    """
+    ブロッキング用のキー（文字列自身と、1文字を削除した文字列）
+
+    編集距離1以内の2つの文字列は必ず共通のキーを持つ。
+
+    Args:
+        key: 正規化した名前
+
+    Returns:
+        set: キーの集合
+    """
+    return {key} | {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def edited_characters(a, b):
+    """
+    編集距離が1以内の2つの文字列で、置換・挿入された文字
+
+    Args:
+        a: 文字列
+        b: 文字列
+
+    Returns:
+        str: 違う文字（一致する場合は空文字、編集距離が2以上の場合はNone）
+    """
+    if abs(len(a) - len(b)) > 1:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if i == len(b):
+        return ""
+    if len(a) == len(b):
+        return a[i] + b[i] if a[i + 1:] == b[i + 1:] else None
+    return b[i] if a[i:] == b[i + 1:] else None
+
+
+def within_one_edit(a, b):
+    """
+    2つの文字列の編集距離が1以内かどうか
+
+    Args:
+        a: 文字列
+        b: 文字列
+
+    Returns:
+        bool: 1以内ならTrue
+    """
+    return edited_characters(a, b) is not None
+
+
+class CompanyNameResolver:
+    """
+    表記ゆれのある法人名を1つの企業にまとめるクラス
+
+    - 正規化した名前が一致するものは同じ企業
+    - 正規化した名前が min_fuzzy_length 文字以上の場合は、1文字違い（編集距離1）の名前も同じ企業にする。
+      1文字削除したキーでブロックを作り、同じブロックの代表とだけ比較するため件数にほぼ比例して処理できる
+    - ただし1文字違いだけでは別会社（東京第一物産/東京第二物産など）をまとめてしまうため、
+      違う文字がカナ・英字（綴りの揺れ）であるか、同じ更新日時の活動ログがあることも条件にする
+    - 類似名としてまとめた組は fuzzy_pairs に残し、print_stats / export_fuzzy_pairs で確認できる
+    - 企業の表示名は、その企業の中で最も出現回数の多い法人名（同数なら先に現れたもの）
+    """
+
+    def __init__(self, fuzzy=True, min_fuzzy_length=DEFAULT_MIN_FUZZY_LENGTH):
+        """
+        Args:
+            fuzzy: 1文字違いの名前もまとめるかどうか
+            min_fuzzy_length: 類似名の照合を行う最小文字数
+        """
+        self.fuzzy = fuzzy
+        self.min_fuzzy_length = min_fuzzy_length
+        self.stats = {"names": 0, "entities": 0, "normalized": 0, "fuzzy": 0}
+        self.fuzzy_pairs = []
+
+    def resolve(self, names, timestamps=None):
+        """
+        法人名 → 企業の表示名 の対応を作る
+
+        Args:
+            names: 法人名のリスト（重複あり。出現回数を表示名の選択に使う）
+            timestamps: names と同じ順の更新日時のリスト（Noneなら日時は類似名の判定に使わない）
+
+        Returns:
+            dict: 法人名 → 企業の表示名
+        """
+        counts = Counter(names)
+        name_timestamps = defaultdict(set)
+        if timestamps is not None:
+            for name, timestamp in zip(names, timestamps):
+                if timestamp:
+                    name_timestamps[name].add(timestamp)
+
+        entity_of_key = {}    # 正規化した名前 → 企業番号
+        entity_keys = []      # 企業番号 → 代表の正規化した名前
+        entity_timestamps = []  # 企業番号 → その企業の法人名の更新日時
+        blocks = {}           # ブロッキングのキー → 企業番号のリスト
+        entity_of_name = {}
+        normalized_merges = 0
+        fuzzy_pairs = []
+
+        # 出現回数の多い順に処理し、よく使われる表記を代表にする
+        for name in sorted(counts, key=lambda n: -counts[n]):
+            key = normalize_company_name(name)
+            entity = entity_of_key.get(key)
+
+            if entity is not None:
+                normalized_merges += 1
+            else:
+                fuzzy_target = self.fuzzy and len(key) >= self.min_fuzzy_length
+                keys = deletion_keys(key) if fuzzy_target else ()
+                signal = None
+                if fuzzy_target:
+                    entity, signal = self._find_similar(
+                        key, keys, blocks, entity_keys, name_timestamps[name], entity_timestamps
+                    )
+
+                if entity is not None:
+                    fuzzy_pairs.append((name, entity, signal))
+                else:
+                    entity = len(entity_keys)
+                    entity_keys.append(key)
+                    entity_timestamps.append(set())
+                    for block_key in keys:
+                        blocks.setdefault(block_key, []).append(entity)
+                entity_of_key[key] = entity
+
+            entity_of_name[name] = entity
+            entity_timestamps[entity] |= name_timestamps[name]
+
+        # 表示名は最初に割り当てられた（最も出現回数の多い）法人名
+        display_names = {}
+        for name, entity in entity_of_name.items():
+            display_names.setdefault(entity, name)
+
+        self.stats = {
+            "names": len(counts),
+            "entities": len(entity_keys),
+            "normalized": normalized_merges,
+            "fuzzy": len(fuzzy_pairs)
+        }
+        self.fuzzy_pairs = [(name, display_names[entity], signal) for name, entity, signal in fuzzy_pairs]
+        return {name: display_names[entity] for name, entity in entity_of_name.items()}
+
+    def _find_similar(self, key, keys, blocks, entity_keys, timestamps, entity_timestamps):
+        """
+        ブロック内の代表から、編集距離1以内で綴りの揺れか同じ日時のログがあるものを探す
+
+        Args:
+            key: 正規化した名前
+            keys: ブロッキングのキー
+            blocks: ブロッキングのキー → 企業番号のリスト
+            entity_keys: 企業番号 → 代表の正規化した名前
+            timestamps: その法人名の更新日時の集合
+            entity_timestamps: 企業番号 → その企業の法人名の更新日時の集合
+
+        Returns:
+            tuple: (最も早く登録された企業番号, まとめた根拠)。見つからない場合は (None, None)
+        """
+        candidates = set()
+        for block_key in keys:
+            block = blocks.get(block_key, ())
+            if len(block) <= MAX_BLOCK_SIZE:
+                candidates.update(block)
+
+        for entity in sorted(candidates):
+            edited = edited_characters(key, entity_keys[entity])
+            if edited is None:
+                continue
+            if SPELLING_VARIANT_PATTERN.match(edited):
+                return entity, "綴りの揺れ"
+            if timestamps & entity_timestamps[entity]:
+                return entity, "同じ日時のログ"
+        return None, None
+
+    def print_stats(self):
+        """名寄せの結果と、類似名としてまとめた組を表示"""
+        print(
+            f"法人名の名寄せ: {self.stats['names']}種類 → {self.stats['entities']}社 "
+            f"(表記ゆれ: {self.stats['normalized']}件, 類似名: {self.stats['fuzzy']}件)"
+        )
+        for name, display_name, signal in self.fuzzy_pairs[:MAX_PRINTED_FUZZY_PAIRS]:
+            print(f"  類似名: {name} → {display_name}（{signal}）")
+        if len(self.fuzzy_pairs) > MAX_PRINTED_FUZZY_PAIRS:
+            print(f"  ...ほか{len(self.fuzzy_pairs) - MAX_PRINTED_FUZZY_PAIRS}件")
+
+    def export_fuzzy_pairs(self, path):
+        """
+        類似名としてまとめた組をCSVに出力（確認用）
+
+        Args:
+            path: 出力CSVファイルパス
+        """
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['法人名', 'まとめた先の法人名', '根拠'])
+            writer.writerows(self.fuzzy_pairs)
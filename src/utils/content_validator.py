@@ -1,12 +1,50 @@
-import json
-from utils.openai_utils import OpenAIClient
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.utils.openai_utils import OpenAIClient, AsyncOpenAIClient
+from src.utils.micro_batch import MicroBatcher
+
+# 同時に送信するリクエスト数のデフォルト値
+DEFAULT_MAX_WORKERS = int(os.getenv("VALIDATION_MAX_WORKERS", "8"))
+
+# API呼び出しに失敗して保守的に有効と判定した場合の理由
+VALIDATION_ERROR_REASON = "検証エラーのため有効と判定"
+
+# これより短い内容はLLMに送らず除外する
+MIN_CONTENT_LENGTH = 10
+
+# 全ログで共通の判定基準・回答形式（プロンプトキャッシュが効くよう、活動内容はこの後ろに付ける）
+VALIDATION_INSTRUCTIONS = """
+最後に示す活動内容が、営業商談のログとして適切かどうかを判定してください。
+
+判定基準：
+- 商談の実質的な内容（顧客の課題、提案、ヒアリング結果など）が含まれていれば「適切」
+- メールの文面のみ、日程調整のみ、自動通知などは「不適切」
+
+JSON形式で以下のように回答してください：
+{
+  "is_valid": true または false,
+  "reason": "判定理由を簡潔に（30文字以内）"
+}
+"""
 
 
 class ContentValidator:
     """LLMを使って活動内容が商談ログとして適切かどうかを検証"""
 
-    def __init__(self):
+    def __init__(self, max_workers=None, prefilter=None, deduplicator=None):
+        """
+        バリデーターを初期化
+
+        Args:
+            max_workers: 同時に実行するAPIリクエスト数（Noneの場合は環境変数 VALIDATION_MAX_WORKERS、未設定なら8）
+            prefilter: LLMの前段で明らかなものを判定する PreFilter（Noneなら使わない）
+            deduplicator: 同じ・ほぼ同じ活動内容をまとめる NearDuplicateDetector（Noneなら全件を個別に判定）
+        """
         self.client = OpenAIClient()
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.prefilter = prefilter
+        self.deduplicator = deduplicator
 
     def get_system_prompt(self):
         """
@@ -42,21 +80,9 @@ class ContentValidator:
         Returns:
             str: ユーザープロンプト
         """
-        return f"""
-以下の活動内容が、営業商談のログとして適切かどうかを判定してください。
-
+        return f"""{VALIDATION_INSTRUCTIONS}
 活動内容:
 {activity_content}
-
-判定基準：
-- 商談の実質的な内容（顧客の課題、提案、ヒアリング結果など）が含まれていれば「適切」
-- メールの文面のみ、日程調整のみ、自動通知などは「不適切」
-
-JSON形式で以下のように回答してください：
-{{
-  "is_valid": true または false,
-  "reason": "判定理由を簡潔に（30文字以内）"
-}}
 """
 
     def validate_content(self, activity_content):
@@ -69,12 +95,10 @@ JSON形式で以下のように回答してください：
         Returns:
             dict: {"is_valid": bool, "reason": str}
         """
-        # 空白チェック
-        if not activity_content or len(activity_content.strip()) < 10:
-            return {
-                "is_valid": False,
-                "reason": "内容が空またはあまりにも短い"
-            }
+        # 空白チェック・前段フィルタ
+        local_result = self._check_local(activity_content)
+        if local_result:
+            return local_result
 
         system_prompt = self.get_system_prompt()
         user_prompt = self.get_user_prompt(activity_content)
@@ -83,7 +107,8 @@ JSON形式で以下のように回答してください：
             result = self.client.analyze_with_prompt(
                 system_prompt,
                 user_prompt,
-                temperature=0.1  # より確実な判定のため低めに設定
+                temperature=0.1,  # より確実な判定のため低めに設定
+                required_keys=["is_valid"]
             )
 
             if result and "is_valid" in result:
@@ -92,7 +117,7 @@ JSON形式で以下のように回答してください：
                 # エラー時は保守的に有効と判定
                 return {
                     "is_valid": True,
-                    "reason": "検証エラーのため有効と判定"
+                    "reason": VALIDATION_ERROR_REASON
                 }
 
         except Exception as e:
@@ -100,43 +125,208 @@ JSON形式で以下のように回答してください：
             # エラー時は保守的に有効と判定
             return {
                 "is_valid": True,
-                "reason": "検証エラーのため有効と判定"
+                "reason": VALIDATION_ERROR_REASON
             }
 
-    def validate_batch(self, records, show_progress=True):
+    def _check_trivial(self, activity_content):
         """
-        複数のレコードを一括検証
+        LLMに送るまでもなく判定できる内容（空・極端に短い）をチェック
+
+        Args:
+            activity_content: 検証対象の活動内容
+
+        Returns:
+            dict: 判定結果（LLMでの判定が必要な場合はNone）
+        """
+        if not activity_content or len(activity_content.strip()) < MIN_CONTENT_LENGTH:
+            return {
+                "is_valid": False,
+                "reason": "内容が空またはあまりにも短い"
+            }
+        return None
+
+    def _check_local(self, activity_content):
+        """
+        LLMに送らずに判定できるかをチェック（空・極端に短い内容と、前段フィルタで判定できる内容）
+
+        Args:
+            activity_content: 検証対象の活動内容
+
+        Returns:
+            dict: 判定結果（LLMでの判定が必要な場合はNone）
+        """
+        trivial_result = self._check_trivial(activity_content)
+        if trivial_result or not self.prefilter:
+            return trivial_result
+        return self.prefilter.classify(activity_content)
+
+    def validate_records(self, records, show_progress=True, max_workers=None, micro_batch=False):
+        """
+        複数のレコードを検証し、入力順の判定結果を返す
+
+        スレッドプールで最大 max_workers 件のリクエストを同時に送信する。
+        完了順は前後するが、返却するリストは入力順を保持する。
+        deduplicator がある場合は重複グループの代表だけを判定し、同じグループに結果を展開する。
 
         Args:
             records: 検証対象のレコードリスト（dict形式）
             show_progress: 進捗表示するかどうか
+            max_workers: 同時実行数（Noneの場合はインスタンスの設定値、1なら逐次実行）
+            micro_batch: Trueの場合は複数のログを1回のリクエストにまとめて判定
 
         Returns:
-            tuple: (valid_records, excluded_records)
+            list: 各レコードの判定結果 {"is_valid": bool, "reason": str}
         """
-        valid_records = []
-        excluded_records = []
+        if self.deduplicator:
+            groups = self.deduplicator.group([record.get('活動内容', '') for record in records])
+            if show_progress:
+                groups.print_stats()
+            verdicts = self._validate_unique_records(groups.select(records), show_progress, max_workers, micro_batch)
+            return [dict(verdict) for verdict in groups.expand(verdicts)]
+
+        return self._validate_unique_records(records, show_progress, max_workers, micro_batch)
+
+    def _validate_unique_records(self, records, show_progress, max_workers, micro_batch):
+        """
+        複数のレコードを個別に検証し、入力順の判定結果を返す
+
+        Args:
+            records: 検証対象のレコードリスト（dict形式）
+            show_progress: 進捗表示するかどうか
+            max_workers: 同時実行数（Noneの場合はインスタンスの設定値）
+            micro_batch: Trueの場合は複数のログを1回のリクエストにまとめて判定
+
+        Returns:
+            list: 各レコードの判定結果 {"is_valid": bool, "reason": str}
+        """
+        if micro_batch:
+            return self._validate_records_micro_batch(records, show_progress)
 
+        max_workers = max_workers or self.max_workers
+        total = len(records)
+        verdicts = [None] * total
+
+        if max_workers <= 1:
+            for i, record in enumerate(records):
+                verdicts[i] = self.validate_content(record.get('活動内容', ''))
+                if show_progress:
+                    self._print_progress(i + 1, total, record)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self.validate_content, record.get('活動内容', '')): i
+                    for i, record in enumerate(records)
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    i = futures[future]
+                    verdicts[i] = future.result()
+                    if show_progress:
+                        self._print_progress(done, total, records[i])
+
+        if show_progress:
+            print()  # 改行
+
+        return verdicts
+
+    def _validate_records_micro_batch(self, records, show_progress):
+        """
+        複数のログを1回のリクエストにまとめて判定（マイクロバッチ）
+
+        Args:
+            records: 検証対象のレコードリスト（dict形式）
+            show_progress: 進捗表示するかどうか
+
+        Returns:
+            list: 各レコードの判定結果 {"is_valid": bool, "reason": str}
+        """
         total = len(records)
+        verdicts = [None] * total
+        pending = []
 
-        for i, record in enumerate(records, 1):
+        for i, record in enumerate(records):
+            verdicts[i] = self._check_local(record.get('活動内容', ''))
+            if verdicts[i] is None:
+                pending.append(i)
+
+        done = [total - len(pending)]
+
+        def on_progress(count):
+            done[0] += count
             if show_progress:
-                # より詳細な進捗表示
-                corp_name = record.get('法人名', 'Unknown')
-                progress_bar = "=" * int(30 * i / total)
-                progress_pct = int(100 * i / total)
-                print(f"  [{progress_bar:<30}] {progress_pct}% ({i}/{total}) - {corp_name[:20]}", end="\r")
+                self._print_progress(done[0], total, None)
 
-            validation_result = self.validate_content(record.get('活動内容', ''))
+        batcher = MicroBatcher(
+            AsyncOpenAIClient(cache=self.client.cache, usage=self.client.usage),
+            self,
+            required_keys=["is_valid", "reason"],
+            temperature=0.1,
+            output_tokens_per_item=60
+        )
+        results = asyncio.run(batcher.run([records[i]['活動内容'] for i in pending], on_progress))
 
-            if validation_result['is_valid']:
-                valid_records.append(record)
-            else:
-                # 除外理由を追加
-                record['除外理由'] = validation_result['reason']
-                excluded_records.append(record)
+        for i, result in zip(pending, results):
+            # エラー時は保守的に有効と判定
+            verdicts[i] = result or {"is_valid": True, "reason": VALIDATION_ERROR_REASON}
 
         if show_progress:
             print()  # 改行
+            batcher.print_stats()
+
+        return verdicts
+
+    def validate_batch(self, records, show_progress=True, max_workers=None, micro_batch=False):
+        """
+        複数のレコードを一括検証
+
+        Args:
+            records: 検証対象のレコードリスト（dict形式）
+            show_progress: 進捗表示するかどうか
+            max_workers: 同時実行数（Noneの場合はインスタンスの設定値、1なら逐次実行）
+            micro_batch: Trueの場合は複数のログを1回のリクエストにまとめて判定
+
+        Returns:
+            tuple: (valid_records, excluded_records)
+        """
+        verdicts = self.validate_records(
+            records, show_progress=show_progress, max_workers=max_workers, micro_batch=micro_batch
+        )
+        return split_by_verdicts(records, verdicts)
+
+    def _print_progress(self, done, total, record):
+        """
+        進捗バーを表示
+
+        Args:
+            done: 完了件数
+            total: 全件数
+            record: 直近に完了したレコード（Noneなら法人名を表示しない）
+        """
+        corp_name = record.get('法人名', 'Unknown') if record else ""
+        progress_bar = "=" * int(30 * done / total)
+        progress_pct = int(100 * done / total)
+        print(f"  [{progress_bar:<30}] {progress_pct}% ({done}/{total}) - {corp_name[:20]}", end="\r")
+
+
+def split_by_verdicts(records, verdicts):
+    """
+    判定結果に従ってレコードを有効・除外に振り分ける（入力順を保持）
+
+    Args:
+        records: レコードリスト
+        verdicts: 各レコードの判定結果
+
+    Returns:
+        tuple: (valid_records, excluded_records)
+    """
+    valid_records = []
+    excluded_records = []
+
+    for record, validation_result in zip(records, verdicts):
+        if validation_result['is_valid']:
+            valid_records.append(record)
+        else:
+            # 除外理由を追加
+            record['除外理由'] = validation_result.get('reason', '')
+            excluded_records.append(record)
 
-        return valid_records, excluded_records
+    return valid_records, excluded_records
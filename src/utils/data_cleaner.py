@@ -1,6 +1,13 @@
+import os
 import csv
-from collections import defaultdict
+import heapq
+import tempfile
 from datetime import datetime
+from operator import itemgetter
+from src.utils.timestamp_parser import TimestampParser, parse_timestamp
+
+# 統合処理でメモリに保持するデータ量の上限（超えた分はソート済みの一時ファイルに書き出す）
+DEFAULT_MAX_BUFFER_BYTES = int(os.getenv("MERGE_MAX_BUFFER_MB", "256")) * 1024 * 1024
 
 
 def parse_datetime(dt_str):
@@ -11,81 +18,73 @@ def parse_datetime(dt_str):
         dt_str: 日時文字列 (例: "2025-10-02 16:00")
 
     Returns:
-        datetime: datetimeオブジェクト
+        datetime: datetimeオブジェクト（解析できない場合は datetime.min）
     """
-    try:
-        return datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-    except ValueError:
-        # フォーマットが異なる場合の処理
-        try:
-            return datetime.strptime(dt_str, "%Y-%m-%d")
-        except ValueError:
-            return datetime.min
+    return parse_timestamp(dt_str) or datetime.min
 
 
-def merge_duplicate_corporations(input_csv_path, output_csv_path):
+def merge_corporation_records(corp_name, records):
     """
-    同じ法人名のレコードをマージする
-
-    - 同じ法人名のレコードを1つにまとめる
-    - 更新日時は最新のものを使用
-    - 活動内容は時系列順に結合
+    1社分のレコードを1件に統合
 
     Args:
-        input_csv_path: 入力CSVファイルパス
-        output_csv_path: 出力CSVファイルパス
-    """
-    # 法人名ごとにレコードを収集
-    corp_records = defaultdict(list)
+        corp_name: 法人名
+        records: その法人のレコードリスト（入力順）
 
-    with open(input_csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            corp_name = row['法人名']
-            corp_records[corp_name].append(row)
+    Returns:
+        dict: 統合後のレコード
+    """
+    # 日時でソート（古い順）
+    records = sorted(records, key=lambda x: parse_datetime(x['更新日時']))
+    return _build_merged_record(corp_name, records)
 
-    print(f"入力レコード数: {sum(len(records) for records in corp_records.values())}件")
-    print(f"ユニーク法人数: {len(corp_records)}社")
 
-    # マージ処理
-    merged_records = []
-    duplicate_count = 0
+def _build_merged_record(corp_name, records):
+    """
+    日時の古い順に並んだ1社分のレコードを1件に統合
 
-    for corp_name, records in corp_records.items():
-        if len(records) > 1:
-            duplicate_count += 1
+    Args:
+        corp_name: 法人名
+        records: その法人のレコードリスト（日時の古い順）
 
-        # 日時でソート（古い順）
-        records.sort(key=lambda x: parse_datetime(x['更新日時']))
+    Returns:
+        dict: 統合後のレコード
+    """
+    # 最新の日時を取得
+    latest_datetime = records[-1]['更新日時']
 
-        # 最新の日時を取得
-        latest_datetime = records[-1]['更新日時']
+    # 活動内容を結合（時系列順）
+    activities = []
+    for i, record in enumerate(records, 1):
+        dt = record['更新日時']
+        content = record['活動内容'].strip()
 
-        # 活動内容を結合（時系列順）
-        activities = []
-        for i, record in enumerate(records, 1):
-            dt = record['更新日時']
-            content = record['活動内容'].strip()
+        if len(records) > 1:
+            # 複数のログがある場合は日時を付与
+            activities.append(f"[{dt}]\n{content}")
+        else:
+            activities.append(content)
 
-            if len(records) > 1:
-                # 複数のログがある場合は日時を付与
-                activities.append(f"[{dt}]\n{content}")
-            else:
-                activities.append(content)
+    merged_activity = "\n\n---\n\n".join(activities)
 
-        merged_activity = "\n\n---\n\n".join(activities)
+    # マージされたレコードを作成
+    return {
+        '更新日時': latest_datetime,
+        '法人名': corp_name,
+        '活動内容': merged_activity
+    }
 
-        # マージされたレコードを作成
-        merged_record = {
-            '更新日時': latest_datetime,
-            '法人名': corp_name,
-            '活動内容': merged_activity
-        }
 
-        merged_records.append(merged_record)
+def write_merged_records(merged_records, output_csv_path):
+    """
+    統合済みレコードを更新日時の新しい順に並べてCSVに書き込む
 
+    Args:
+        merged_records: 統合済みレコードのリスト
+        output_csv_path: 出力CSVファイルパス
+    """
     # 更新日時でソート（新しい順）
-    merged_records.sort(key=lambda x: parse_datetime(x['更新日時']), reverse=True)
+    merged_records = sorted(merged_records, key=lambda x: parse_datetime(x['更新日時']), reverse=True)
 
     # CSVに書き込み
     with open(output_csv_path, 'w', encoding='utf-8', newline='') as f:
@@ -94,7 +93,190 @@ def merge_duplicate_corporations(input_csv_path, output_csv_path):
         writer.writeheader()
         writer.writerows(merged_records)
 
+
+def datetime_sort_value(dt):
+    """
+    datetimeを整数の並び順の値に変換（秒単位。datetime.min が最小）
+
+    Args:
+        dt: datetimeオブジェクト
+
+    Returns:
+        int: 並び順の値
+    """
+    return dt.toordinal() * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+
+
+class SortedRunMerger:
+    """
+    外部ソート用のバッファ
+
+    行（先頭 key_size 列が整数のキーのタプル）を溜め、上限を超えたらキー順に並べて一時ファイルに書き出す。
+    最後にメモリ上の残りと一時ファイルをk-wayマージしてキー順に返す。
+    """
+
+    def __init__(self, key_size, work_dir, max_buffer_bytes=DEFAULT_MAX_BUFFER_BYTES):
+        """
+        Args:
+            key_size: 行の先頭から何列をキーにするか
+            work_dir: 一時ファイルの作成先
+            max_buffer_bytes: メモリに保持するデータ量の上限（文字数の概算）
+        """
+        self.key_size = key_size
+        self.key = itemgetter(*range(key_size))
+        self.work_dir = work_dir
+        self.max_buffer_bytes = max_buffer_bytes
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.run_paths = []
+
+    def add(self, row, size):
+        """
+        行を追加
+
+        Args:
+            row: キーと値のタプル
+            size: 行のデータ量の概算
+        """
+        self.buffer.append(row)
+        self.buffer_bytes += size
+        if self.buffer_bytes > self.max_buffer_bytes:
+            self._spill()
+
+    def _spill(self):
+        """バッファをキー順に並べて一時ファイルに書き出す"""
+        self.buffer.sort(key=self.key)
+        fd, path = tempfile.mkstemp(prefix="merge_run_", suffix=".csv", dir=self.work_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerows(self.buffer)
+        self.run_paths.append(path)
+        self.buffer = []
+        self.buffer_bytes = 0
+
+    def _read_run(self, path):
+        """一時ファイルの行を読み戻す（キー列は整数に戻す）"""
+        key_size = self.key_size
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.reader(f):
+                yield tuple(int(value) for value in row[:key_size]) + tuple(row[key_size:])
+
+    def __iter__(self):
+        self.buffer.sort(key=self.key)
+        if not self.run_paths:
+            return iter(self.buffer)
+        runs = [self._read_run(path) for path in self.run_paths] + [iter(self.buffer)]
+        return heapq.merge(*runs, key=self.key)
+
+
+def merge_duplicate_corporations(input_csv_path, output_csv_path, max_buffer_bytes=DEFAULT_MAX_BUFFER_BYTES,
+                                 name_resolver=None):
+    """
+    同じ法人名のレコードをマージする
+
+    - 同じ法人名のレコードを1つにまとめる
+    - 更新日時は最新のものを使用
+    - 活動内容は時系列順に結合
+
+    各行の日時は1回だけ解析し、(法人の出現順, 日時, 行番号) のキーで並べ替えて法人ごとに統合する。
+    統合結果は (日時の新しい順, 法人の出現順) で並べて書き込む（同時刻は入力での出現順を保つ）。
+    データ量が max_buffer_bytes を超える場合は一時ファイルに分割し、k-wayマージで読み戻す。
+
+    Args:
+        input_csv_path: 入力CSVファイルパス
+        output_csv_path: 出力CSVファイルパス
+        max_buffer_bytes: メモリに保持するデータ量の上限
+        name_resolver: 表記ゆれのある法人名をまとめる CompanyNameResolver（Noneなら法人名の完全一致でまとめる）
+    """
+    name_map = None
+    if name_resolver:
+        # 法人名・更新日時の列だけを先に読み、表記ゆれの対応を作る
+        with open(input_csv_path, 'r', encoding='utf-8') as f:
+            rows = [(row['法人名'], row['更新日時']) for row in csv.DictReader(f)]
+        name_map = name_resolver.resolve([name for name, _ in rows], [timestamp for _, timestamp in rows])
+        name_resolver.print_stats()
+
+    corp_indexes = {}
+    corp_counts = []
+    timestamps = TimestampParser()
+    sort_values = {}
+    input_count = 0
+
+    work_dir = os.path.dirname(os.path.abspath(output_csv_path))
+    with tempfile.TemporaryDirectory(prefix="merge_", dir=work_dir) as temp_dir:
+        # 法人名ごとにレコードを収集（日時は文字列ごとに1回だけ解析）
+        records = SortedRunMerger(3, temp_dir, max_buffer_bytes)
+        with open(input_csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for seq, row in enumerate(reader):
+                corp_name = name_map[row['法人名']] if name_map else row['法人名']
+                dt_str = row['更新日時']
+
+                corp_index = corp_indexes.get(corp_name)
+                if corp_index is None:
+                    corp_index = corp_indexes[corp_name] = len(corp_counts)
+                    corp_counts.append(0)
+                corp_counts[corp_index] += 1
+
+                # 解析できない日時は最も古い日時として扱い、値はレポートに記録する
+                parsed = timestamps.parse(dt_str)
+                sort_value = sort_values.get(dt_str)
+                if sort_value is None:
+                    sort_value = sort_values[dt_str] = datetime_sort_value(parsed or datetime.min)
+
+                content = row['活動内容']
+                records.add((corp_index, sort_value, seq, dt_str, corp_name, content), len(content) + 64)
+                input_count += 1
+
+        print(f"入力レコード数: {input_count}件")
+        print(f"ユニーク法人数: {len(corp_counts)}社")
+        timestamps.print_report()
+
+        # マージ処理（キー順に読むと法人ごとに日時の古い順で並ぶ）
+        merged = SortedRunMerger(2, temp_dir, max_buffer_bytes)
+        group = []
+        for row in records:
+            if group and group[0][0] != row[0]:
+                _add_merged_group(merged, group)
+                group = []
+            group.append(row)
+        if group:
+            _add_merged_group(merged, group)
+
+        spilled = len(records.run_paths) + len(merged.run_paths)
+        if spilled:
+            print(f"メモリ上限を超えたため一時ファイルに分割して処理: {spilled}ファイル")
+
+        # 更新日時の新しい順に書き込み
+        with open(output_csv_path, 'w', encoding='utf-8', newline='') as f:
+            fieldnames = ['更新日時', '法人名', '活動内容']
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for _, _, dt_str, corp_name, content in merged:
+                writer.writerow({'更新日時': dt_str, '法人名': corp_name, '活動内容': content})
+
+    duplicate_count = sum(1 for count in corp_counts if count > 1)
+
     print(f"\n✓ クレンジング完了")
-    print(f"出力レコード数: {len(merged_records)}件")
+    print(f"出力レコード数: {len(corp_counts)}件")
     print(f"マージされた法人数: {duplicate_count}社")
     print(f"出力ファイル: {output_csv_path}")
+
+
+def _add_merged_group(merged, group):
+    """
+    1社分の行（日時の古い順）を統合して出力用のバッファに追加
+
+    Args:
+        merged: 出力用の SortedRunMerger
+        group: (法人の出現順, 日時の値, 行番号, 更新日時, 法人名, 活動内容) のリスト
+    """
+    corp_index = group[0][0]
+    record = _build_merged_record(
+        group[0][4],
+        [{'更新日時': dt_str, '活動内容': content} for _, _, _, dt_str, _, content in group]
+    )
+    # 新しい順に並べるため日時の値を負にする
+    merged.add(
+        (-group[-1][1], corp_index, record['更新日時'], record['法人名'], record['活動内容']),
+        len(record['活動内容']) + 64
+    )
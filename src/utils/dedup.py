@@ -0,0 +1,234 @@
+import re
+import zlib
+import hashlib
+import unicodedata
+import numpy as np
+
+# 近似重複とみなす推定Jaccard類似度の下限
+DEFAULT_THRESHOLD = 0.85
+
+# MinHashの署名長とLSHのバンド数（署名長 = バンド数 × 1バンドの行数）
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+
+# 文字n-gramの長さ（分かち書き不要で日本語に使える）
+DEFAULT_SHINGLE_SIZE = 4
+
+
+def normalize_for_dedup(text):
+    """
+    重複判定用にテキストを正規化（NFKC・小文字化・空白の除去）
+
+    Args:
+        text: テキスト
+
+    Returns:
+        str: 正規化したテキスト
+    """
+    return re.sub(r"\s+", "", unicodedata.normalize("NFKC", text or "").lower())
+
+
+class DuplicateGroups:
+    """
+    重複グループの割り当て結果
+
+    representatives は各グループの代表（入力中で最初に現れた要素）のインデックス、
+    assignments は各入力要素が属するグループ番号。
+    """
+
+    def __init__(self, representatives, assignments, near_duplicates=0):
+        self.representatives = representatives
+        self.assignments = assignments
+        self.near_duplicates = near_duplicates
+
+    def select(self, items):
+        """
+        代表の要素だけを取り出す
+
+        Args:
+            items: 入力と同じ並びのリスト
+
+        Returns:
+            list: 代表の要素のリスト（グループ番号順）
+        """
+        return [items[i] for i in self.representatives]
+
+    def expand(self, results):
+        """
+        代表の結果を同じグループの全要素に展開
+
+        Args:
+            results: 代表ごとの結果（グループ番号順）
+
+        Returns:
+            list: 入力順の結果
+        """
+        return [results[group] for group in self.assignments]
+
+    def print_stats(self):
+        """重複の集約結果を表示"""
+        total = len(self.assignments)
+        unique = len(self.representatives)
+        exact = total - unique - self.near_duplicates
+        print(
+            f"重複集約: {total}件 → {unique}件 "
+            f"(完全一致: {exact}件, 近似重複: {self.near_duplicates}件を代表の結果で補完)"
+        )
+
+
+class NearDuplicateDetector:
+    """
+    完全一致と近似重複（MinHash + LSH）で活動内容をグループ化するクラス
+
+    - 正規化したテキストのハッシュが一致するものは同じグループ
+    - それ以外は文字n-gramのMinHash署名をバンドに分けてバケットを引き、
+      候補の代表との推定Jaccard類似度が threshold 以上なら同じグループにする
+    - バケットには代表だけを登録するため、1件あたりの比較は候補数に比例し全件数に依存しない
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        """
+        Args:
+            threshold: 近似重複とみなす推定Jaccard類似度の下限
+            num_perm: MinHashの署名長
+            bands: LSHのバンド数（num_perm を割り切れる数）
+            shingle_size: 文字n-gramの長さ
+            seed: ハッシュ関数の乱数シード
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm（{num_perm}）は bands（{bands}）で割り切れる必要があります")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+
+        # multiply-shift 方式のハッシュ関数族（a は奇数）
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, normalized):
+        """
+        正規化済みテキストのMinHash署名を計算
+
+        Args:
+            normalized: 正規化したテキスト
+
+        Returns:
+            numpy.ndarray: uint32の署名（n-gramが作れない短いテキストはNone）
+        """
+        k = self.shingle_size
+        if len(normalized) < k:
+            return None
+
+        shingles = np.unique(np.fromiter(
+            (zlib.crc32(normalized[i:i + k].encode('utf-8')) for i in range(len(normalized) - k + 1)),
+            dtype=np.uint64
+        ))
+        hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def group(self, texts):
+        """
+        テキストを重複グループに分ける（入力順に処理し、最初に現れたものを代表にする）
+
+        Args:
+            texts: テキストのリスト
+
+        Returns:
+            DuplicateGroups: グループの割り当て
+        """
+        index = DuplicateIndex(self)
+        assignments = [index.add(text)[0] for text in texts]
+        return DuplicateGroups(index.representatives, assignments, index.near_duplicates)
+
+    def _find_similar(self, sig, band_keys, buckets, signatures):
+        """
+        LSHのバケットから類似度が閾値以上の代表を探す
+
+        Args:
+            sig: 署名
+            band_keys: 署名のバンドごとのキー
+            buckets: バケット
+            signatures: グループ番号 → 署名
+
+        Returns:
+            int: 最も早く登録されたグループ番号（見つからない場合はNone）
+        """
+        candidates = set()
+        for key in band_keys:
+            candidates.update(buckets.get(key, ()))
+
+        for group in sorted(candidates):
+            if np.mean(signatures[group] == sig) >= self.threshold:
+                return group
+        return None
+
+
+class DuplicateIndex:
+    """
+    テキストを1件ずつ受け取って重複グループを割り当てるインデックス
+
+    NearDuplicateDetector.group と同じ判定を入力順に逐次行う（全件をリストに読み込まずに処理する場合に使う）。
+    保持するのは代表ごとのハッシュと署名だけなので、メモリは代表の件数に比例する。
+    """
+
+    def __init__(self, detector=None):
+        """
+        Args:
+            detector: NearDuplicateDetector（Noneならデフォルト設定で生成）
+        """
+        self.detector = detector or NearDuplicateDetector()
+        self.representatives = []
+        self.near_duplicates = 0
+        self.total = 0
+        self._exact_index = {}    # 正規化テキストのハッシュ → グループ番号
+        self._buckets = {}        # (バンド番号, バンドの値) → グループ番号のリスト
+        self._signatures = {}     # グループ番号 → 署名
+
+    def add(self, text):
+        """
+        テキストをグループに割り当てる
+
+        Args:
+            text: テキスト
+
+        Returns:
+            tuple: (グループ番号, 新しいグループの代表ならTrue)
+        """
+        position = self.total
+        self.total += 1
+
+        normalized = normalize_for_dedup(text)
+        digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+
+        group = self._exact_index.get(digest)
+        if group is not None:
+            return group, False
+
+        detector = self.detector
+        sig = detector.signature(normalized)
+        band_keys = [] if sig is None else [
+            (band, chunk.tobytes()) for band, chunk in enumerate(sig.reshape(detector.bands, -1))
+        ]
+
+        group = detector._find_similar(sig, band_keys, self._buckets, self._signatures)
+        is_new = group is None
+        if is_new:
+            group = len(self.representatives)
+            self.representatives.append(position)
+            if sig is not None:
+                self._signatures[group] = sig
+                for key in band_keys:
+                    self._buckets.setdefault(key, []).append(group)
+        else:
+            self.near_duplicates += 1
+
+        self._exact_index[digest] = group
+        return group, is_new
+
+    def print_stats(self):
+        """重複の集約結果を表示（DuplicateGroups.print_stats と同じ形式）"""
+        DuplicateGroups(self.representatives, range(self.total), self.near_duplicates).print_stats()
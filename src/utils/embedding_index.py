@@ -0,0 +1,467 @@
+import os
+import json
+import shutil
+import sqlite3
+import hashlib
+import numpy as np
+from src.utils.cleansing_manifest import fingerprint_record
+from src.utils.embeddings import normalize_rows
+
+# 埋め込みインデックスのデフォルト保存先
+DEFAULT_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR", "data/embeddings")
+
+# 検索で調べるIVFのリスト数（多いほど正確・遅い）
+DEFAULT_NPROBE = 8
+
+# この行数まではIVFを使わず全件の内積で検索する
+IVF_MIN_ROWS = 20000
+
+# 学習時の行数のこの倍を超えたらIVFを学習し直す（それまでは追加行を最も近いリストに割り当てる）
+IVF_RETRAIN_RATIO = 2.0
+
+# k-meansの学習に使う行数の上限と反復回数（リスト数は行数の平方根、1リストあたり学習用の行を40件以上にする）
+IVF_TRAIN_SAMPLE = 50000
+IVF_MIN_TRAIN_PER_LIST = 40
+KMEANS_ITERATIONS = 10
+
+# 全件の内積を一度に計算する行数・埋め込みを一度に行う件数
+SCAN_BLOCK_ROWS = 100000
+DEFAULT_EMBED_BATCH = 256
+
+
+def content_hash(content):
+    """
+    活動内容のハッシュ（同じ内容の埋め込みを再利用するためのキー）
+
+    Args:
+        content: 活動内容
+
+    Returns:
+        str: SHA-256のハッシュ値
+    """
+    return hashlib.sha256((content or "").encode('utf-8')).hexdigest()
+
+
+def top_k(scores, k):
+    """
+    スコアの上位k件のインデックス
+
+    Args:
+        scores: スコアの配列
+        k: 件数
+
+    Returns:
+        numpy.ndarray: スコアの高い順のインデックス
+    """
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def spherical_kmeans(vectors, nlist, iterations=KMEANS_ITERATIONS, seed=0):
+    """
+    正規化したベクトルをコサイン類似度でk個のクラスタに分ける
+
+    Args:
+        vectors: (件数, 次元数) の正規化した配列
+        nlist: クラスタ数
+        iterations: 反復回数
+        seed: 乱数シード
+
+    Returns:
+        numpy.ndarray: (nlist, 次元数) の正規化した重心
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        clusters, starts = np.unique(assignments[order], return_index=True)
+        sums = np.add.reduceat(vectors[order], starts, axis=0)
+        # 空のクラスタは別の点で置き直す
+        empty = np.setdiff1d(np.arange(nlist), clusters)
+        centroids[clusters] = normalize_rows(sums)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), size=len(empty), replace=False)]
+    return centroids
+
+
+class InvertedLists:
+    """
+    IVF（転置リスト）の索引
+
+    centroids はリストの重心、assignments は各行が属するリスト番号。検索時は重心との類似度が高い
+    nprobe 個のリストに属する行だけを候補にする。
+    """
+
+    def __init__(self, centroids, assignments):
+        self.centroids = centroids
+        self.assignments = assignments
+        self._order = None
+        self._starts = None
+
+    def assign(self, vectors):
+        """
+        ベクトルを最も近いリストに割り当てる
+
+        Args:
+            vectors: (件数, 次元数) の正規化した配列
+
+        Returns:
+            numpy.ndarray: リスト番号の int32 配列
+        """
+        result = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), SCAN_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SCAN_BLOCK_ROWS])
+            result[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return result
+
+    def candidates(self, query, nprobe):
+        """
+        クエリに近いリストに属する行番号
+
+        Args:
+            query: 正規化したクエリベクトル
+            nprobe: 調べるリスト数
+
+        Returns:
+            numpy.ndarray: 行番号の配列
+        """
+        if self._order is None:
+            self._order = np.argsort(self.assignments, kind="stable")
+            self._starts = np.searchsorted(self.assignments[self._order], np.arange(len(self.centroids) + 1))
+        lists = top_k(self.centroids @ query, nprobe)
+        return np.concatenate([self._order[self._starts[i]:self._starts[i + 1]] for i in lists])
+
+
+class EmbeddingIndex:
+    """
+    活動内容の埋め込みインデックス
+
+    ベクトルは float32 の行列として vectors.f32 に追記し、読み込み時はメモリマップで開く。
+    行の情報（指紋・法人名・更新日時・活動内容）は rows.sqlite3 に保存し、行番号はベクトルの行と一致する。
+    行数が IVF_MIN_ROWS を超えるとk-meansでIVFを学習し、以降の追加行は最も近いリストに割り当てる。
+    クレンジング済みデータから消えた行（再統合で内容が変わった法人の古い履歴など）は検索対象から外す。
+    """
+
+    def __init__(self, directory, model, dim):
+        """
+        Args:
+            directory: 保存先ディレクトリ
+            model: 埋め込みモデルの名前（別のモデルで作ったインデックスは使わない）
+            dim: ベクトルの次元数
+        """
+        self.directory = directory
+        self.model = model
+        self.dim = dim
+        self.trained_count = 0
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(os.path.join(directory, "rows.sqlite3"))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rows (
+                id INTEGER PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                source TEXT NOT NULL,
+                company TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                content TEXT NOT NULL,
+                active INTEGER NOT NULL DEFAULT 1,
+                UNIQUE (source, fingerprint)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON rows (content_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_company ON rows (company)")
+        self._conn.commit()
+
+        meta_path = self._path("meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                self.trained_count = json.load(f).get("trained_count", 0)
+        self._save_meta()
+        self._recover()
+        self._load()
+
+    @classmethod
+    def open(cls, directory, embedder):
+        """
+        インデックスを開く（なければ作成する）
+
+        Args:
+            directory: 保存先ディレクトリ
+            embedder: 埋め込みクラスのインスタンス
+
+        Returns:
+            EmbeddingIndex: インデックス
+        """
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta["model"] != embedder.name:
+                raise ValueError(
+                    f"インデックスは {meta['model']} で作成されています（現在: {embedder.name}）。"
+                    "同じ方式を指定するか、作り直してください"
+                )
+            return cls(directory, meta["model"], meta["dim"])
+        dim = embedder.embed(["次元数の確認"]).shape[1]
+        return cls(directory, embedder.name, dim)
+
+    @staticmethod
+    def remove(directory):
+        """インデックスのファイルを削除（作り直すとき）"""
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+
+    def __len__(self):
+        return self.count
+
+    def update(self, source, records, embedder, batch_size=DEFAULT_EMBED_BATCH):
+        """
+        クレンジング済みデータの新しい行を埋め込んで追加し、データから消えた行を検索対象から外す
+
+        同じ活動内容がすでにインデックスにあれば、APIを呼ばずにそのベクトルを再利用する。
+
+        Args:
+            source: ソース名（"人事" / "小売"）
+            records: そのソースのクレンジング済みレコード全件のイテラブル
+            embedder: 埋め込みクラスのインスタンス（インデックスと同じ方式）
+            batch_size: 一度に埋め込む件数
+
+        Returns:
+            dict: added（追加した行数）/ embedded（埋め込んだ行数）/ reused（再利用した行数）/ deactivated（外した行数）
+        """
+        stats = {"added": 0, "embedded": 0, "reused": 0, "deactivated": 0}
+        known = {
+            fingerprint: (row_id, active)
+            for row_id, fingerprint, active in self._conn.execute(
+                "SELECT id, fingerprint, active FROM rows WHERE source = ?", (source,)
+            )
+        }
+        seen = set()
+        pending = []
+        for record in records:
+            fingerprint = fingerprint_record(record)
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            if fingerprint in known:
+                row_id, active = known[fingerprint]
+                if not active:
+                    self._conn.execute("UPDATE rows SET active = 1 WHERE id = ?", (row_id,))
+                    self.inactive[row_id] = False
+                continue
+            pending.append((fingerprint, record))
+            if len(pending) >= batch_size:
+                self._append(source, pending, embedder, stats)
+                pending = []
+        if pending:
+            self._append(source, pending, embedder, stats)
+
+        removed = [row_id for fingerprint, (row_id, active) in known.items() if active and fingerprint not in seen]
+        self._conn.executemany("UPDATE rows SET active = 0 WHERE id = ?", [(row_id,) for row_id in removed])
+        self._conn.commit()
+        self.inactive[removed] = True
+        stats["deactivated"] = len(removed)
+
+        self._maintain_ivf()
+        return stats
+
+    def search(self, query, k=10, nprobe=DEFAULT_NPROBE, exclude=()):
+        """
+        クエリベクトルに近い行を検索
+
+        Args:
+            query: クエリベクトル
+            k: 取得する件数
+            nprobe: 調べるIVFのリスト数（IVFがなければ全件を調べる）
+            exclude: 結果から除く行番号
+
+        Returns:
+            list: (行番号, コサイン類似度) のリスト（類似度の高い順）
+        """
+        query = normalize_rows(query)
+        if self.ivf is not None:
+            candidates = self.ivf.candidates(query, nprobe)
+            candidates = candidates[~self.inactive[candidates]]
+            if len(exclude):
+                candidates = candidates[~np.isin(candidates, exclude)]
+            candidates = np.sort(candidates)
+            scores = self.vectors[candidates] @ query
+        else:
+            candidates = np.arange(self.count)
+            scores = np.empty(self.count, dtype=np.float32)
+            for start in range(0, self.count, SCAN_BLOCK_ROWS):
+                scores[start:start + SCAN_BLOCK_ROWS] = self.vectors[start:start + SCAN_BLOCK_ROWS] @ query
+            keep = ~self.inactive
+            keep[list(exclude)] = False
+            candidates, scores = candidates[keep], scores[keep]
+
+        return [(int(candidates[i]), float(scores[i])) for i in top_k(scores, k)]
+
+    def rows_of_company(self, company):
+        """
+        法人名の検索対象の行番号
+
+        Args:
+            company: 法人名
+
+        Returns:
+            list: 行番号のリスト
+        """
+        return [row_id for (row_id,) in self._conn.execute(
+            "SELECT id FROM rows WHERE company = ? AND active = 1 ORDER BY id", (company,)
+        )]
+
+    def vector_for(self, content):
+        """
+        活動内容のベクトル（同じ内容の行があればそのベクトル）
+
+        Args:
+            content: 活動内容
+
+        Returns:
+            numpy.ndarray: ベクトル（インデックスにない内容はNone）
+        """
+        row = self._conn.execute(
+            "SELECT id FROM rows WHERE content_hash = ? LIMIT 1", (content_hash(content),)
+        ).fetchone()
+        return None if row is None else np.asarray(self.vectors[row[0]])
+
+    def row(self, row_id):
+        """
+        行の情報
+
+        Args:
+            row_id: 行番号
+
+        Returns:
+            dict: source / 法人名 / 更新日時 / 活動内容
+        """
+        source, company, updated_at, content = self._conn.execute(
+            "SELECT source, company, updated_at, content FROM rows WHERE id = ?", (row_id,)
+        ).fetchone()
+        return {"source": source, "法人名": company, "更新日時": updated_at, "活動内容": content}
+
+    def close(self):
+        """接続を閉じる"""
+        self._conn.close()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _save_meta(self):
+        with open(self._path("meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({"model": self.model, "dim": self.dim, "trained_count": self.trained_count}, f)
+
+    def _recover(self):
+        """中断で行の情報とベクトルの件数がずれた場合は、両方にある行までに揃える"""
+        row_bytes = self.dim * 4
+        vector_path = self._path("vectors.f32")
+        vector_rows = os.path.getsize(vector_path) // row_bytes if os.path.exists(vector_path) else 0
+        self._conn.execute("DELETE FROM rows WHERE id >= ?", (vector_rows,))
+        self._conn.commit()
+        count = self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+        if os.path.exists(vector_path) and vector_rows != count:
+            with open(vector_path, 'r+b') as f:
+                f.truncate(count * row_bytes)
+
+        assignment_path = self._path("ivf_assignments.i32")
+        if os.path.exists(assignment_path) and os.path.getsize(assignment_path) != count * 4:
+            # 割り当てが揃っていなければ学習し直す
+            os.remove(assignment_path)
+            self.trained_count = 0
+            self._save_meta()
+
+    def _load(self):
+        """ベクトル・IVF・検索対象外の行を読み込む"""
+        self._map_vectors(self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0])
+
+        self.inactive = np.zeros(self.count, dtype=bool)
+        inactive = [row_id for (row_id,) in self._conn.execute("SELECT id FROM rows WHERE active = 0")]
+        self.inactive[inactive] = True
+
+        self.ivf = None
+        if self.trained_count and os.path.exists(self._path("ivf_centroids.npy")):
+            assignments = np.fromfile(self._path("ivf_assignments.i32"), dtype=np.int32)
+            self.ivf = InvertedLists(np.load(self._path("ivf_centroids.npy")), assignments)
+
+    def _map_vectors(self, count):
+        """ベクトルのファイルを count 行の行列としてメモリマップで開く"""
+        self.count = count
+        if count:
+            self.vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(count, self.dim))
+        else:
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+
+    def _append(self, source, pending, embedder, stats):
+        """新しい行のベクトルを追記し、行の情報を保存する"""
+        hashes = [content_hash(record.get('活動内容')) for _, record in pending]
+        reusable = {}
+        for digest in set(hashes):
+            row = self._conn.execute("SELECT id FROM rows WHERE content_hash = ? LIMIT 1", (digest,)).fetchone()
+            if row is not None:
+                reusable[digest] = row[0]
+
+        # インデックスにない内容だけを（同じ内容は1回だけ）埋め込む
+        missing = {}
+        for i, digest in enumerate(hashes):
+            if digest not in reusable and digest not in missing:
+                missing[digest] = i
+        embedded = embedder.embed([pending[i][1].get('活動内容') for i in missing.values()]) if missing else None
+        position = {digest: j for j, digest in enumerate(missing)}
+
+        vectors = np.empty((len(pending), self.dim), dtype=np.float32)
+        for i, digest in enumerate(hashes):
+            if digest in reusable:
+                vectors[i] = self.vectors[reusable[digest]]
+            else:
+                vectors[i] = embedded[position[digest]]
+
+        with open(self._path("vectors.f32"), 'ab') as f:
+            f.write(vectors.tobytes())
+        self._conn.executemany(
+            "INSERT INTO rows (id, fingerprint, content_hash, source, company, updated_at, content) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (self.count + i, fingerprint, digest, source, record.get('法人名') or "",
+                 record.get('更新日時') or "", record.get('活動内容') or "")
+                for i, ((fingerprint, record), digest) in enumerate(zip(pending, hashes))
+            ]
+        )
+        self._conn.commit()
+
+        if self.ivf is not None:
+            assignments = self.ivf.assign(vectors)
+            with open(self._path("ivf_assignments.i32"), 'ab') as f:
+                f.write(assignments.tobytes())
+            self.ivf = InvertedLists(self.ivf.centroids, np.concatenate([self.ivf.assignments, assignments]))
+
+        self._map_vectors(self.count + len(pending))
+        self.inactive = np.concatenate([self.inactive, np.zeros(len(pending), dtype=bool)])
+        stats["added"] += len(pending)
+        stats["embedded"] += len(missing)
+        stats["reused"] += len(pending) - len(missing)
+
+    def _maintain_ivf(self):
+        """行数に応じてIVFを学習する（初回・学習時から行数が大きく増えたとき）"""
+        if self.count < IVF_MIN_ROWS:
+            return
+        if self.trained_count and self.count <= self.trained_count * IVF_RETRAIN_RATIO:
+            return
+
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(self.count, size=min(self.count, IVF_TRAIN_SAMPLE), replace=False))
+        nlist = max(1, min(int(np.sqrt(self.count)), len(sample) // IVF_MIN_TRAIN_PER_LIST))
+        centroids = spherical_kmeans(np.asarray(self.vectors[sample]), nlist)
+        assignments = InvertedLists(centroids, None).assign(self.vectors)
+
+        np.save(self._path("ivf_centroids.npy"), centroids)
+        assignments.tofile(self._path("ivf_assignments.i32"))
+        self.trained_count = self.count
+        self._save_meta()
+        self._load()
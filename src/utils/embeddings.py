@@ -0,0 +1,199 @@
+import os
+import zlib
+import numpy as np
+from openai import OpenAI
+from dotenv import load_dotenv
+from src.utils.chunking import HistoryChunker, TokenCounter
+from src.utils.prefilter import normalize_text
+
+# 環境変数を読み込む
+load_dotenv()
+
+# 埋め込みの方式（openai: OpenAIのAPI、local: sentence-transformers のローカルモデル、hashing: 文字n-gramのハッシュ）
+EMBEDDING_BACKENDS = ("openai", "local", "hashing")
+DEFAULT_EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+
+# 各方式のデフォルトのモデル
+DEFAULT_OPENAI_EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+DEFAULT_LOCAL_EMBEDDING_MODEL = os.getenv("EMBEDDING_LOCAL_MODEL", "intfloat/multilingual-e5-small")
+DEFAULT_HASHING_DIM = 512
+
+# 1件の入力のトークン数の上限（APIの上限 8191 より少し小さくする。超える履歴は分割して平均する）
+EMBEDDING_MAX_TOKENS = 8000
+
+# 1回のAPIリクエストに含める入力の件数・トークン数の上限
+EMBEDDING_BATCH_SIZE = 256
+EMBEDDING_BATCH_TOKENS = 200000
+
+
+def normalize_rows(vectors):
+    """
+    行ベクトルをL2ノルム1に正規化（内積がコサイン類似度になる）
+
+    Args:
+        vectors: (件数, 次元数) の配列
+
+    Returns:
+        numpy.ndarray: 正規化した float32 の配列（ノルム0の行は0のまま）
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class ChunkedEmbedder:
+    """
+    埋め込みの共通処理
+
+    トークン数の上限を超える統合済みの履歴は HistoryChunker でログの区切りごとに分け、
+    チャンクの埋め込みを平均して1件のベクトルにする。サブクラスは _embed_batch を実装する。
+    """
+
+    name = None
+    max_tokens = EMBEDDING_MAX_TOKENS
+
+    def embed(self, texts):
+        """
+        テキストのリストを埋め込む
+
+        Args:
+            texts: テキストのリスト
+
+        Returns:
+            numpy.ndarray: (件数, 次元数) の正規化した float32 の配列
+        """
+        texts = [text or "" for text in texts]
+        chunker = self._chunker()
+        plan = chunker.plan(texts) if chunker else None
+        contents = plan.contents if plan else texts
+        vectors = self._embed_batch(contents)
+        if plan is None or len(plan.contents) == plan.total:
+            return normalize_rows(vectors)
+
+        sums = np.zeros((plan.total, vectors.shape[1]), dtype=np.float32)
+        np.add.at(sums, np.asarray(plan.owners), vectors)
+        return normalize_rows(sums)
+
+    def _chunker(self):
+        return None
+
+    def _embed_batch(self, texts):
+        raise NotImplementedError
+
+
+class OpenAIEmbedder(ChunkedEmbedder):
+    """OpenAIのEmbeddings APIで埋め込むクラス（件数・トークン数の上限でリクエストを分ける）"""
+
+    def __init__(self, model=DEFAULT_OPENAI_EMBEDDING_MODEL, api_key=None):
+        """
+        Args:
+            model: 埋め込みモデル名
+            api_key: OpenAI APIキー（Noneの場合は環境変数から取得）
+        """
+        self.model = model
+        self.name = f"openai:{model}"
+        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"), max_retries=6)
+        self.counter = TokenCounter()
+        self.requests = 0
+
+    def _chunker(self):
+        return HistoryChunker(max_tokens=self.max_tokens, counter=self.counter)
+
+    def _embed_batch(self, texts):
+        vectors = []
+        batch = []
+        batch_tokens = 0
+        for text in texts:
+            # 空の入力はAPIがエラーにするため空白1文字にする
+            text = text or " "
+            tokens = self.counter.count(text)
+            if batch and (len(batch) >= EMBEDDING_BATCH_SIZE or batch_tokens + tokens > EMBEDDING_BATCH_TOKENS):
+                vectors.extend(self._request(batch))
+                batch = []
+                batch_tokens = 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            vectors.extend(self._request(batch))
+        return np.array(vectors, dtype=np.float32)
+
+    def _request(self, texts):
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        self.requests += 1
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class LocalEmbedder(ChunkedEmbedder):
+    """
+    sentence-transformers のモデルでCPU上で埋め込むクラス
+
+    sentence-transformers がインストールされている場合のみ使える（初回はモデルをダウンロードする）。
+    """
+
+    def __init__(self, model=DEFAULT_LOCAL_EMBEDDING_MODEL):
+        """
+        Args:
+            model: sentence-transformers のモデル名またはパス
+        """
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError(
+                "ローカルモデルでの埋め込みには sentence-transformers が必要です（pip install sentence-transformers）"
+            ) from None
+        self.model = SentenceTransformer(model, device="cpu")
+        self.name = f"local:{model}"
+        self.max_tokens = self.model.max_seq_length
+
+    def _chunker(self):
+        return HistoryChunker(max_tokens=self.max_tokens)
+
+    def _embed_batch(self, texts):
+        return self.model.encode(list(texts), batch_size=64, convert_to_numpy=True, show_progress_bar=False)
+
+
+class HashingEmbedder(ChunkedEmbedder):
+    """
+    文字bigram・trigramをハッシュで固定次元に割り当てる埋め込み（外部のモデル・APIを使わない）
+
+    意味の近さは捉えられないが、同じ語句を多く含むログを探す用途やオフラインでの確認に使える。
+    """
+
+    def __init__(self, dim=DEFAULT_HASHING_DIM):
+        """
+        Args:
+            dim: 次元数
+        """
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    def _embed_batch(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            normalized = normalize_text(text)
+            for size in (2, 3):
+                for start in range(len(normalized) - size + 1):
+                    code = zlib.crc32(normalized[start:start + size].encode('utf-8'))
+                    # 上位ビットで符号を決めて衝突の偏りを打ち消す
+                    vectors[i, code % self.dim] += 1.0 if code & 0x80000000 else -1.0
+        return np.sign(vectors) * np.log1p(np.abs(vectors))
+
+
+def create_embedder(backend=None):
+    """
+    埋め込みの方式を選んで生成
+
+    Args:
+        backend: "openai" / "local" / "hashing"（Noneなら EMBEDDING_BACKEND）
+
+    Returns:
+        ChunkedEmbedder: 埋め込みクラスのインスタンス
+    """
+    backend = backend or DEFAULT_EMBEDDING_BACKEND
+    if backend == "openai":
+        return OpenAIEmbedder()
+    if backend == "local":
+        return LocalEmbedder()
+    if backend == "hashing":
+        return HashingEmbedder()
+    raise ValueError(f"埋め込みの方式が不正です: {backend}（{', '.join(EMBEDDING_BACKENDS)} のいずれか）")
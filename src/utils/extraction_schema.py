@@ -0,0 +1,113 @@
+import os
+import re
+import glob
+import json
+
+# kintoneのレコード一覧の行クラス
+DEFAULT_ROW_CLASS = 'recordlist-row-gaia'
+
+# 列の型（text: 文字列、datetime: 日時の文字列。型は後段の読み込み時に使う）
+FIELD_TYPES = ("text", "datetime")
+
+# スキーマファイルの保存先
+DEFAULT_SCHEMA_DIR = "config/sources"
+
+
+class ExtractionSchema:
+    """
+    kintoneアプリごとのHTML抽出スキーマ
+
+    フィールドID（セルのクラス value-<ID>）・CSVの列名・型を宣言的に持つ。
+    クラス名の判定に使う正規表現は生成時に一度だけコンパイルし、全ファイルで使い回す。
+    """
+
+    def __init__(self, name, fields, row_class=DEFAULT_ROW_CLASS, html_dir=None, output_csv=None):
+        """
+        Args:
+            name: ソース名（例: "人事"）
+            fields: {"column": 列名, "field_id": フィールドID, "type": 型} のリスト（CSVの列順）
+            row_class: レコード行の<tr>のクラス
+            html_dir: HTMLファイルのディレクトリ
+            output_csv: 出力CSVファイルパス
+        """
+        if not fields:
+            raise ValueError(f"スキーマ {name} にフィールドがありません")
+
+        self.name = name
+        self.row_class = row_class
+        self.html_dir = html_dir
+        self.output_csv = output_csv
+        self.fields = []
+        for field in fields:
+            field_type = field.get("type", "text")
+            if field_type not in FIELD_TYPES:
+                raise ValueError(f"スキーマ {name} の列 {field['column']} の型が不正です: {field_type}")
+            self.fields.append({"column": field["column"], "field_id": str(field["field_id"]), "type": field_type})
+
+        self.fieldnames = [field["column"] for field in self.fields]
+        self.column_types = {field["column"]: field["type"] for field in self.fields}
+        self.field_classes = {field["column"]: f"value-{field['field_id']}" for field in self.fields}
+        # いずれかのフィールドのクラスを含むかを1回で判定する（大半のセルはここで除外される）
+        self.field_class_pattern = re.compile(
+            "|".join(re.escape(css_class) for css_class in self.field_classes.values())
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        dictから生成
+
+        Args:
+            data: スキーマファイルの内容
+
+        Returns:
+            ExtractionSchema: スキーマ
+        """
+        return cls(
+            data["name"],
+            data["fields"],
+            row_class=data.get("row_class", DEFAULT_ROW_CLASS),
+            html_dir=data.get("html_dir"),
+            output_csv=data.get("output_csv")
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        スキーマファイル（JSON）を読み込む
+
+        Args:
+            path: スキーマファイルのパス
+
+        Returns:
+            ExtractionSchema: スキーマ
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def list_html_files(self):
+        """
+        html_dir 内のHTMLファイルをファイル名順に取得
+
+        Returns:
+            list: HTMLファイルパスのリスト
+        """
+        if not self.html_dir:
+            return []
+        return sorted(glob.glob(os.path.join(self.html_dir, "*.html")))
+
+
+def load_schemas(schema_dir=DEFAULT_SCHEMA_DIR):
+    """
+    ディレクトリ内のスキーマファイルをすべて読み込む
+
+    Args:
+        schema_dir: スキーマファイルのディレクトリ
+
+    Returns:
+        list: ファイル名順の ExtractionSchema のリスト
+    """
+    return [
+        ExtractionSchema.load(path)
+        for path in sorted(glob.glob(os.path.join(schema_dir, "*.json")))
+    ]
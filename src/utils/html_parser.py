@@ -1,37 +1,292 @@
 import os
 import csv
+import time
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from bs4 import BeautifulSoup
+from lxml import etree
+from src.utils.extraction_schema import ExtractionSchema
 
+# 人事アプリのスキーマ（スキーマ未指定時に使用。config/sources/人事.json と同じ内容）
+DEFAULT_SCHEMA = ExtractionSchema(
+    "人事",
+    [
+        {"column": "更新日時", "field_id": "6446951", "type": "datetime"},  # 活動日時を更新日時として使用
+        {"column": "法人名", "field_id": "6446950", "type": "text"},
+        {"column": "活動内容", "field_id": "6446959", "type": "text"}
+    ]
+)
 
-def parse_html_to_csv(html_files, output_csv_path):
+
+def convert_sources(schemas, workers=1):
+    """
+    複数ソース（kintoneアプリ）のHTMLを1回の実行でそれぞれのCSVに変換
+
+    各HTMLファイルはそのソースのスキーマで1回だけパースする。
+    workers が2以上の場合は全ソースで1つのプロセスプールを共有する。
+
+    Args:
+        schemas: ExtractionSchema のリスト（html_dir・output_csv の指定が必要）
+        workers: 並列プロセス数（1なら逐次処理）
+
+    Returns:
+        dict: ソース名 → 抽出件数
+    """
+    totals = {}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        for schema in schemas:
+            html_files = schema.list_html_files()
+            print(f"\n【{schema.name}】HTMLファイル数: {len(html_files)}件")
+            if not html_files:
+                print(f"⚠ HTMLファイルが見つかりません: {schema.html_dir}")
+                totals[schema.name] = 0
+                continue
+
+            output_dir = os.path.dirname(schema.output_csv)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            totals[schema.name] = parse_html_to_csv(
+                html_files, schema.output_csv, workers=workers, schema=schema, executor=executor
+            )
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return totals
+
+
+def parse_html_to_csv(html_files, output_csv_path, workers=1, schema=DEFAULT_SCHEMA, executor=None):
     """
     複数のHTMLファイルをパースして、1つのCSVファイルに変換
 
+    レコードは1行ずつCSVに書き出すため、ファイル数・サイズに関わらずメモリ使用量は一定。
+    workers が2以上の場合はプロセスプールでファイルを並列に処理し、
+    ファイルごとの部分CSVを html_files の順に連結する（出力は逐次処理と同一）。
+
     Args:
         html_files: HTMLファイルパスのリスト
         output_csv_path: 出力CSVファイルパス
+        workers: 並列プロセス数（1なら逐次処理）
+        schema: 抽出スキーマ（ExtractionSchema）
+        executor: 共有するプロセスプール（Noneの場合は workers に応じて生成）
+
+    Returns:
+        int: 抽出件数
     """
-    all_records = []
-
-    for html_file in html_files:
-        print(f"処理中: {os.path.basename(html_file)}")
-        records = extract_records_from_html(html_file)
-        all_records.extend(records)
-        print(f"  抽出件数: {len(records)}件")
-
-    # CSVに書き込み
-    if all_records:
-        with open(output_csv_path, 'w', encoding='utf-8', newline='') as f:
-            fieldnames = ['更新日時', '法人名', '活動内容']
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_records)
+    total = 0
+    started_at = time.perf_counter()
+    temp_csv_path = output_csv_path + ".tmp"
+
+    with open(temp_csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=schema.fieldnames)
+        writer.writeheader()
 
+        if workers <= 1 and executor is None:
+            for html_file in html_files:
+                print(f"処理中: {os.path.basename(html_file)}")
+                file_started_at = time.perf_counter()
+                count = stream_records_from_html(html_file, writer.writerow, schema)
+                total += count
+                print(f"  抽出件数: {count}件 ({time.perf_counter() - file_started_at:.2f}秒)")
+        else:
+            total = _parse_files_in_parallel(html_files, output_csv_path, f, workers, schema, executor)
+
+    elapsed = time.perf_counter() - started_at
+    if total:
+        os.replace(temp_csv_path, output_csv_path)
         print(f"\n✓ 変換完了: {output_csv_path}")
-        print(f"総件数: {len(all_records)}件")
+        print(f"総件数: {total}件 ({elapsed:.2f}秒)")
     else:
+        os.remove(temp_csv_path)
         print("\n⚠ データが見つかりませんでした")
 
+    return total
+
+
+def _parse_files_in_parallel(html_files, output_csv_path, output_file, workers, schema, executor=None):
+    """
+    プロセスプールで各HTMLを部分CSVに変換し、入力順に連結
+
+    Args:
+        html_files: HTMLファイルパスのリスト
+        output_csv_path: 出力CSVファイルパス（部分CSVの作業ディレクトリの場所に使用）
+        output_file: 連結先のファイルオブジェクト（ヘッダー書き込み済み）
+        workers: 並列プロセス数
+        schema: 抽出スキーマ
+        executor: 共有するプロセスプール（Noneの場合はここで生成して終了時に閉じる）
+
+    Returns:
+        int: 総件数
+    """
+    total = 0
+    work_dir = tempfile.mkdtemp(prefix="html_parts_", dir=os.path.dirname(output_csv_path) or ".")
+    part_paths = [os.path.join(work_dir, f"{i:06d}.csv") for i in range(len(html_files))]
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        print(f"並列プロセス数: {workers}")
+        # map は入力順に結果を返すため、連結順はファイル名順で決定的になる
+        results = executor.map(_convert_file_to_part, html_files, part_paths, [schema] * len(html_files))
+        for html_file, part_path, (count, elapsed) in zip(html_files, part_paths, results):
+            print(f"処理済み: {os.path.basename(html_file)} - 抽出件数: {count}件 ({elapsed:.2f}秒)")
+            with open(part_path, 'r', encoding='utf-8', newline='') as part:
+                shutil.copyfileobj(part, output_file)
+            os.remove(part_path)
+            total += count
+    finally:
+        if own_executor:
+            executor.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return total
+
+
+def _convert_file_to_part(html_file, part_path, schema):
+    """
+    1ファイルをヘッダーなしの部分CSVに変換（ワーカープロセスで実行）
+
+    Args:
+        html_file: HTMLファイルパス
+        part_path: 部分CSVの出力パス
+        schema: 抽出スキーマ
+
+    Returns:
+        tuple: (抽出件数, 処理秒数)
+    """
+    started_at = time.perf_counter()
+    with open(part_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=schema.fieldnames)
+        count = stream_records_from_html(html_file, writer.writerow, schema)
+    return count, time.perf_counter() - started_at
+
+
+def stream_records_from_html(html_file_path, on_record, schema=DEFAULT_SCHEMA):
+    """
+    単一のHTMLファイルからレコードを1件ずつ抽出（ストリーミング）
+
+    lxmlのターゲットパーサーでタグのイベントを順に受け取り、行が閉じるたびに on_record を呼ぶ。
+    木構造を作らないため、ファイルサイズに関わらずメモリ使用量は一定。
+
+    Args:
+        html_file_path: HTMLファイルパス
+        on_record: 抽出したレコード（dict）を受け取る関数
+        schema: 抽出スキーマ（ExtractionSchema）
+
+    Returns:
+        int: 抽出件数
+    """
+    target = _RecordTarget(on_record, schema)
+    # ファイル名を渡してlibxml2に読み込ませる（feedで渡すと入力全体がバッファに残るため）
+    parser = etree.HTMLParser(target=target, encoding='utf-8')
+    return etree.parse(html_file_path, parser)
+
+
+class _RecordTarget:
+    """
+    lxmlのターゲットパーサー用のイベントハンドラ
+
+    BeautifulSoupの get_text(strip=True) と同じく、セル内の各テキストを個別に strip して連結する。
+    セルのクラス名はスキーマのコンパイル済みパターンで1回だけ検索し、該当したセルのみフィールドを特定する。
+    """
+
+    def __init__(self, on_record, schema):
+        self.on_record = on_record
+        self.row_class = schema.row_class
+        self.field_classes = schema.field_classes
+        self.field_class_pattern = schema.field_class_pattern
+        self.fieldnames = schema.fieldnames
+        self.count = 0
+        self.in_row = False
+        self.tr_depth = 0       # 対象の行の中でネストした<tr>（セル内の表など）の深さ
+        self.record = None
+        self.field = None       # 現在テキストを収集中のフィールド
+        self.td_depth = 0       # 収集中のセル内でネストした<td>の深さ
+        self.texts = []
+        self.buffer = []
+
+    def _flush(self):
+        # 連続したテキストを1つの文字列として strip する
+        if self.buffer:
+            text = "".join(self.buffer).strip()
+            if text:
+                self.texts.append(text)
+            self.buffer = []
+
+    def start(self, tag, attrib):
+        self._flush()
+        if tag == 'tr':
+            if self.in_row:
+                self.tr_depth += 1
+            elif self.row_class in attrib.get('class', ''):
+                self.in_row = True
+                self.tr_depth = 0
+                self.record = {}
+            return
+
+        if tag != 'td' or not self.in_row:
+            return
+
+        if self.field:
+            self.td_depth += 1
+            return
+
+        css = attrib.get('class', '')
+        if not self.field_class_pattern.search(css):
+            return
+
+        for field, css_class in self.field_classes.items():
+            # 各フィールドは最初に見つかったセルを使う
+            if css_class in css and field not in self.record:
+                self.field = field
+                self.td_depth = 0
+                self.texts = []
+                break
+
+    def end(self, tag):
+        self._flush()
+        if not self.in_row:
+            return
+
+        if tag == 'td' and self.field:
+            if self.td_depth:
+                self.td_depth -= 1
+            else:
+                self.record[self.field] = "".join(self.texts)
+                self.field = None
+
+        elif tag == 'tr' and self.tr_depth:
+            # セル内の表の行が閉じただけで、対象の行はまだ続く
+            self.tr_depth -= 1
+
+        elif tag == 'tr':
+            self.in_row = False
+            self.field = None
+            try:
+                record = {field: self.record.get(field, "") for field in self.fieldnames}
+                # データが揃っている場合のみ追加
+                if all(record.values()):
+                    self.on_record(record)
+                    self.count += 1
+            except Exception as e:
+                print(f"    行の解析エラー: {e}")
+
+    def data(self, data):
+        if self.field:
+            self.buffer.append(data)
+
+    def comment(self, text):
+        # コメントはテキストに含めないが、前後のテキストの区切りになる
+        self._flush()
+
+    def close(self):
+        return self.count
+
 
 def extract_records_from_html(html_file_path):
     """
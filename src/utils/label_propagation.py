@@ -0,0 +1,492 @@
+import os
+import json
+import hashlib
+import numpy as np
+from src.utils.embeddings import create_embedder
+from src.utils.embedding_index import EmbeddingIndex, DEFAULT_INDEX_DIR
+
+# 学習済みモデルの保存先（タスクごとに <タスク名>_propagation.npz）
+PROPAGATION_MODEL_DIR = "data/models"
+
+# ローカルでラベルを付ける確率の閾値を決めるときに求める適合率（正例・負例とも）
+DEFAULT_MIN_PRECISION = float(os.getenv("PROPAGATION_MIN_PRECISION", "0.95"))
+
+# ローカルでラベルを付けた行のうち、LLMにも送って一致を確認する割合
+DEFAULT_AUDIT_RATE = float(os.getenv("PROPAGATION_AUDIT_RATE", "0.05"))
+
+# 閾値を決めるのに必要な評価用データの正例・負例の件数（足りないラベルはローカルで判定しない）
+MIN_THRESHOLD_SUPPORT = 20
+
+
+def propagation_model_path(task_name):
+    """
+    タスクのラベル伝播モデルのパス
+
+    Args:
+        task_name: 分析タスク名
+
+    Returns:
+        str: モデルファイルのパス
+    """
+    return os.path.join(PROPAGATION_MODEL_DIR, f"{task_name}_propagation.npz")
+
+
+def auto_labeled_path(model_path):
+    """
+    ローカルでラベルを付けた行の記録のパス（モデルファイルの隣に置く）
+
+    Args:
+        model_path: モデルファイルのパス
+
+    Returns:
+        str: 記録のパス
+    """
+    return os.path.splitext(model_path)[0] + "_auto.json"
+
+
+def hash_fraction(value, salt=""):
+    """
+    文字列のハッシュから0〜1の値を決める（実行ごとに同じ分割・抽出になる）
+
+    Args:
+        value: 文字列
+        salt: 分割ごとに変える接頭辞（同じ値でも別の分割と独立した値になる）
+
+    Returns:
+        float: 0以上1未満の値
+    """
+    return int(hashlib.sha256((salt + value).encode('utf-8')).hexdigest()[:8], 16) % 1000 / 1000
+
+
+class LogisticRegressionModel:
+    """
+    ラベルごとのロジスティック回帰（複数ラベルの重みをまとめて勾配降下で学習、NumPyのみ）
+
+    特徴量は学習データの平均・標準偏差で標準化する。
+    """
+
+    def __init__(self, weights=None, bias=None, mean=None, scale=None):
+        self.weights = weights
+        self.bias = bias
+        self.mean = mean
+        self.scale = scale
+
+    def fit(self, features, labels, epochs=300, learning_rate=0.05, l2=1e-3):
+        """
+        学習する
+
+        Args:
+            features: (件数, 次元数) の特徴量
+            labels: (件数, ラベル数) の0/1行列
+            epochs: 反復回数
+            learning_rate: Adamの学習率
+            l2: L2正則化の強さ
+
+        Returns:
+            LogisticRegressionModel: 自身
+        """
+        features = np.asarray(features, dtype=np.float32)
+        labels = np.asarray(labels, dtype=np.float32)
+        self.mean = features.mean(axis=0)
+        self.scale = features.std(axis=0) + 1e-6
+        x = (features - self.mean) / self.scale
+
+        count, dim = x.shape
+        self.weights = np.zeros((dim, labels.shape[1]), dtype=np.float32)
+        # 切片はラベルごとの正例の割合で初期化する
+        rate = np.clip(labels.mean(axis=0), 1e-3, 1 - 1e-3)
+        self.bias = np.log(rate / (1 - rate)).astype(np.float32)
+
+        moments = [np.zeros_like(self.weights), np.zeros_like(self.bias)]
+        velocities = [np.zeros_like(self.weights), np.zeros_like(self.bias)]
+        for step in range(1, epochs + 1):
+            error = self._sigmoid(x @ self.weights + self.bias) - labels
+            gradients = [x.T @ error / count + l2 * self.weights, error.mean(axis=0)]
+            for parameter, gradient, moment, velocity in zip(
+                    (self.weights, self.bias), gradients, moments, velocities):
+                moment *= 0.9
+                moment += 0.1 * gradient
+                velocity *= 0.999
+                velocity += 0.001 * gradient ** 2
+                parameter -= learning_rate * (moment / (1 - 0.9 ** step)) / (
+                    np.sqrt(velocity / (1 - 0.999 ** step)) + 1e-8
+                )
+        return self
+
+    def predict_proba(self, features):
+        """
+        ラベルごとの確率を計算
+
+        Args:
+            features: (件数, 次元数) の特徴量
+
+        Returns:
+            numpy.ndarray: (件数, ラベル数) の確率
+        """
+        x = (np.asarray(features, dtype=np.float32) - self.mean) / self.scale
+        return self._sigmoid(x @ self.weights + self.bias)
+
+    @staticmethod
+    def _sigmoid(values):
+        return 1.0 / (1.0 + np.exp(-np.clip(values, -30, 30)))
+
+
+def choose_thresholds(probabilities, labels, min_precision=DEFAULT_MIN_PRECISION, min_support=MIN_THRESHOLD_SUPPORT):
+    """
+    評価用データから、ラベルごとにローカルで判定する確率の閾値を決める
+
+    上側の閾値は「確率がそれ以上なら1」とした行の適合率が min_precision 以上になる最も低い確率、
+    下側の閾値は「確率がそれ以下なら0」とした行の適合率が min_precision 以上になる最も高い確率
+    （上側の閾値を超えない。間の行はどちらにも決めずLLMに任せる）。
+    条件を満たす範囲がない・件数が足りない場合は、その側をローカルで判定しない値（上側は1超、下側は0未満）にする。
+
+    Args:
+        probabilities: (件数, ラベル数) の確率
+        labels: (件数, ラベル数) のLLMの0/1ラベル
+        min_precision: 求める適合率
+        min_support: 閾値を決めるのに必要な正例（上側）・負例（下側）の件数
+
+    Returns:
+        tuple: (上側の閾値の配列, 下側の閾値の配列)
+    """
+    label_count = probabilities.shape[1]
+    upper = np.full(label_count, np.inf)
+    lower = np.full(label_count, -np.inf)
+    for j in range(label_count):
+        actual = labels[:, j].astype(bool)
+        order = np.argsort(-probabilities[:, j], kind="stable")
+        if actual.sum() >= min_support:
+            precision = np.cumsum(actual[order]) / np.arange(1, len(order) + 1)
+            reached = np.flatnonzero(precision >= min_precision)
+            if len(reached):
+                upper[j] = probabilities[order[reached[-1]], j]
+
+        order = order[::-1]
+        if (~actual).sum() >= min_support:
+            precision = np.cumsum(~actual[order]) / np.arange(1, len(order) + 1)
+            reached = np.flatnonzero((precision >= min_precision) & (probabilities[order, j] < upper[j]))
+            if len(reached):
+                lower[j] = probabilities[order[reached[-1]], j]
+    return upper, lower
+
+
+def label_metrics(predicted, actual):
+    """
+    ラベルごとの適合率・再現率（LLMのラベルを正解とする）
+
+    Args:
+        predicted: (件数, ラベル数) のローカルの0/1ラベル
+        actual: (件数, ラベル数) のLLMの0/1ラベル
+
+    Returns:
+        dict: true_positive / false_positive / false_negative / precision / recall（いずれもラベル数の配列。
+              分母が0の適合率・再現率はnan）
+    """
+    predicted = np.asarray(predicted, dtype=bool)
+    actual = np.asarray(actual, dtype=bool)
+    true_positive = (predicted & actual).sum(axis=0)
+    false_positive = (predicted & ~actual).sum(axis=0)
+    false_negative = (~predicted & actual).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = true_positive / (true_positive + false_positive)
+        recall = true_positive / (true_positive + false_negative)
+    return {
+        "true_positive": true_positive,
+        "false_positive": false_positive,
+        "false_negative": false_negative,
+        "precision": precision,
+        "recall": recall,
+    }
+
+
+def print_label_metrics(labels, metrics, indent="  "):
+    """
+    ラベルごとの適合率・再現率を表示
+
+    Args:
+        labels: ラベル名のリスト
+        metrics: label_metrics の結果
+        indent: 行頭の字下げ
+    """
+    def percent(value):
+        return "   -  " if np.isnan(value) else f"{100 * value:5.1f}%"
+
+    for j, label in enumerate(labels):
+        print(
+            f"{indent}{label}: 適合率 {percent(metrics['precision'][j])} / 再現率 {percent(metrics['recall'][j])} "
+            f"(一致 {int(metrics['true_positive'][j])}, 誤って1 {int(metrics['false_positive'][j])}, "
+            f"見逃し {int(metrics['false_negative'][j])})"
+        )
+
+
+class LabelPropagator:
+    """
+    埋め込みとLLMのラベルで学習したモデルで、確信度の高い行にローカルでラベルを付けるクラス
+
+    すべてのラベルの確率が上側の閾値以上か下側の閾値以下の行だけをローカルで判定し、
+    1つでも曖昧なラベルがある行は None を返してLLMに任せる。ローカルで判定した行のうち audit_rate の割合は
+    LLMにも送り、ラベルごとの適合率・再現率を集計する（閾値の見直しに使う）。
+    """
+
+    def __init__(self, labels, model, upper, lower, embedder_name, audit_rate=DEFAULT_AUDIT_RATE,
+                 auto_labeled=None):
+        """
+        Args:
+            labels: ラベル名のリスト
+            model: LogisticRegressionModel
+            upper: ラベルごとの上側の閾値
+            lower: ラベルごとの下側の閾値
+            embedder_name: 学習に使った埋め込みの名前
+            audit_rate: ローカルで判定した行をLLMにも送る割合
+            auto_labeled: AutoLabeledRows（Noneなら記録しない）
+        """
+        self.labels = list(labels)
+        self.model = model
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.embedder_name = embedder_name
+        self.audit_rate = audit_rate
+        self.auto_labeled = auto_labeled
+        self.index = None
+        self.stats = {"local": 0, "escalated": 0, "audited": 0}
+        self._audit_predicted = []
+        self._audit_actual = []
+
+    def prepare(self, source, records, index_dir=DEFAULT_INDEX_DIR):
+        """
+        埋め込みインデックスを開き、分析対象の新しい行を埋め込んで追加する（classify の前に呼ぶ）
+
+        Args:
+            source: ソース名（"人事" / "小売"）
+            records: そのソースのクレンジング済みレコード全件のイテラブル
+            index_dir: インデックスの保存先
+
+        Returns:
+            dict: EmbeddingIndex.update の集計
+        """
+        embedder = create_embedder(self.embedder_name.split(":", 1)[0])
+        if embedder.name != self.embedder_name:
+            raise ValueError(
+                f"モデルは {self.embedder_name} の埋め込みで学習されています（現在: {embedder.name}）。"
+                "同じ埋め込みで学習し直してください"
+            )
+        self.index = EmbeddingIndex.open(index_dir, embedder)
+        return self.index.update(source, records, embedder)
+
+    def close(self):
+        """インデックスを閉じ、ローカルでラベルを付けた行の記録を保存"""
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+        if self.auto_labeled is not None:
+            self.auto_labeled.save()
+
+    def mark(self, key, local):
+        """
+        行をローカル判定・LLM判定のどちらで出力したかを記録
+
+        Args:
+            key: 行の指紋
+            local: ローカルで判定した場合はTrue
+        """
+        if self.auto_labeled is not None:
+            self.auto_labeled.mark(key, local)
+
+    def predict(self, vectors):
+        """
+        埋め込みからラベルを判定
+
+        Args:
+            vectors: (件数, 次元数) の埋め込み
+
+        Returns:
+            list: 行ごとのラベルのdict（曖昧な行はNone）
+        """
+        probabilities = self.model.predict_proba(vectors)
+        positive = probabilities >= self.upper
+        negative = probabilities <= self.lower
+        confident = (positive | negative).all(axis=1)
+        return [
+            {label: int(flag) for label, flag in zip(self.labels, row)} if is_confident else None
+            for row, is_confident in zip(positive, confident)
+        ]
+
+    def classify(self, content):
+        """
+        1件の活動内容をローカルで判定（埋め込みはインデックスから取得する）
+
+        Args:
+            content: 活動内容
+
+        Returns:
+            dict: ラベルのdict（曖昧な場合・埋め込みがない場合はNone）
+        """
+        vector = self.index.vector_for(content) if self.index is not None else None
+        result = self.predict(vector[np.newaxis, :])[0] if vector is not None else None
+        self.stats["local" if result is not None else "escalated"] += 1
+        return result
+
+    def should_audit(self, key):
+        """
+        ローカルで判定した行をLLMにも送って確認するかどうか（行の指紋で決めるため再実行しても同じ行になる）
+
+        Args:
+            key: 行の指紋
+
+        Returns:
+            bool: 確認する場合はTrue
+        """
+        return hash_fraction(key) < self.audit_rate
+
+    def audit(self, local_result, llm_result):
+        """
+        ローカルの判定とLLMの判定を比較して記録
+
+        Args:
+            local_result: ローカルのラベルのdict
+            llm_result: LLMのラベルのdict
+        """
+        self.stats["audited"] += 1
+        self._audit_predicted.append([local_result.get(label, 0) == 1 for label in self.labels])
+        self._audit_actual.append([llm_result.get(label, 0) == 1 for label in self.labels])
+
+    def audit_metrics(self):
+        """
+        確認した行でのラベルごとの適合率・再現率
+
+        Returns:
+            dict: label_metrics の結果（確認した行がなければNone）
+        """
+        if not self._audit_predicted:
+            return None
+        return label_metrics(np.array(self._audit_predicted), np.array(self._audit_actual))
+
+    def print_stats(self):
+        """ローカルで判定した件数とLLMとの一致を表示"""
+        total = self.stats["local"] + self.stats["escalated"]
+        rate = 100 * self.stats["local"] / total if total else 0
+        print(
+            f"ラベル伝播: ローカルで判定 {self.stats['local']}件 / {total}件 ({rate:.1f}%, "
+            f"うちLLMでも確認: {self.stats['audited']}件), LLMへ: {self.stats['escalated']}件"
+        )
+        metrics = self.audit_metrics()
+        if metrics is not None:
+            print("  LLMで確認した行でのローカル判定の精度:")
+            print_label_metrics(self.labels, metrics, indent="    ")
+
+    def save(self, path):
+        """
+        モデルを保存
+
+        Args:
+            path: 保存先（.npz）
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                labels=np.array(self.labels),
+                weights=self.model.weights,
+                bias=self.model.bias,
+                mean=self.model.mean,
+                scale=self.model.scale,
+                upper=self.upper,
+                lower=self.lower,
+                embedder_name=np.array(self.embedder_name)
+            )
+
+    @classmethod
+    def load(cls, path, audit_rate=DEFAULT_AUDIT_RATE):
+        """
+        保存したモデルを読み込む（ローカルでラベルを付けた行の記録もモデルの隣から読み込む）
+
+        Args:
+            path: モデルファイルのパス
+            audit_rate: ローカルで判定した行をLLMにも送る割合
+
+        Returns:
+            LabelPropagator: ラベル伝播
+        """
+        with np.load(path) as data:
+            model = LogisticRegressionModel(data["weights"], data["bias"], data["mean"], data["scale"])
+            return cls(
+                data["labels"].tolist(),
+                model,
+                data["upper"],
+                data["lower"],
+                str(data["embedder_name"]),
+                audit_rate=audit_rate,
+                auto_labeled=AutoLabeledRows(auto_labeled_path(path))
+            )
+
+
+class AutoLabeledRows:
+    """
+    ローカルでラベルを付けた行の指紋の記録（JSON）
+
+    学習データはLLMが付けたラベルだけにするため、出力CSVのうちローカルで付けた行を学習から除く。
+    後からLLMで判定し直した行は記録から外す。
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 記録のパス（auto_labeled_path で決める）
+        """
+        self.path = path
+        self.fingerprints = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.fingerprints = set(json.load(f))
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self.fingerprints
+
+    def mark(self, fingerprint, local):
+        """
+        行をローカル判定・LLM判定のどちらで出力したかを記録
+
+        Args:
+            fingerprint: 行の指紋
+            local: ローカルで判定した場合はTrue
+        """
+        if local:
+            self.fingerprints.add(fingerprint)
+        else:
+            self.fingerprints.discard(fingerprint)
+
+    def save(self):
+        """記録を保存"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(sorted(self.fingerprints), f)
+
+
+def content_vectors(index, contents, embedder):
+    """
+    活動内容の埋め込みを取得（インデックスにあればそのベクトル、なければ埋め込む）
+
+    Args:
+        index: EmbeddingIndex
+        contents: 活動内容のリスト
+        embedder: 埋め込みクラスのインスタンス
+
+    Returns:
+        numpy.ndarray: (件数, 次元数) の埋め込み
+    """
+    vectors = np.empty((len(contents), index.dim), dtype=np.float32)
+    missing = []
+    for i, content in enumerate(contents):
+        vector = index.vector_for(content)
+        if vector is None:
+            missing.append(i)
+        else:
+            vectors[i] = vector
+    if missing:
+        vectors[missing] = embedder.embed([contents[i] for i in missing])
+    return vectors
+
@@ -0,0 +1,229 @@
+import csv
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from src.utils.table_io import RECORD_COLUMN_TYPES, is_datetime_text_column, is_parquet, read_columns
+from src.utils.timestamp_parser import TimestampParser
+
+# 共起件数の行列積を一度に行う行数（float32 で件数を正確に表せる 2**24 未満にする）
+COOCCURRENCE_CHUNK_ROWS = 1_000_000
+
+# 時系列集計の単位（Y: 年、M: 月、D: 日）
+TREND_FREQUENCIES = ("Y", "M", "D")
+
+
+def read_label_names(path):
+    """
+    分析結果ファイルのラベル列名を取得（ヘッダー・スキーマだけを読む）
+
+    Args:
+        path: 分析結果ファイルパス（CSVまたはParquet）
+
+    Returns:
+        list: ラベル列名のリスト（ファイルの列順）
+    """
+    if is_parquet(path):
+        names = pq.ParquetFile(path).schema_arrow.names
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            names = next(csv.reader(f), [])
+    return [name for name in names if name not in RECORD_COLUMN_TYPES and not is_datetime_text_column(name)]
+
+
+def to_datetime64(column, unit="m"):
+    """
+    日時の列をNumPyのdatetime64配列に変換
+
+    Args:
+        column: Arrowの列（日時型または文字列）
+        unit: datetime64の単位
+
+    Returns:
+        numpy.ndarray: datetime64配列（空・解析できない値はNaT）
+    """
+    if pa.types.is_timestamp(column.type):
+        return column.to_numpy(zero_copy_only=False).astype(f"datetime64[{unit}]")
+    values = pc.fill_null(column.cast(pa.string()), "").to_numpy(zero_copy_only=False)
+    return TimestampParser().to_datetime64(values, unit=unit)
+
+
+class LabelMatrix:
+    """
+    分析結果の0/1ラベルを行 × ラベルの行列として保持し、集計をベクトル演算で行うクラス
+
+    values は uint8 の (行数, ラベル数) 行列、timestamps は行ごとの更新日時（datetime64、NaTあり）。
+    """
+
+    def __init__(self, labels, values, timestamps=None, companies=None):
+        """
+        Args:
+            labels: ラベル名のリスト
+            values: (行数, ラベル数) の0/1行列
+            timestamps: 行ごとの更新日時（datetime64配列、Noneなら時系列集計は不可）
+            companies: 行ごとの法人名（Noneなら読み込まない）
+        """
+        self.labels = list(labels)
+        self.values = np.ascontiguousarray(values, dtype=np.uint8)
+        self.timestamps = timestamps
+        self.companies = companies
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    @classmethod
+    def load(cls, path, labels=None, with_companies=False):
+        """
+        分析結果ファイルからラベル列（と更新日時）だけを読み込む
+
+        Args:
+            path: 分析結果ファイルパス（CSVまたはParquet）
+            labels: 読み込むラベル列（Noneならすべてのラベル列）
+            with_companies: 法人名も読み込むかどうか
+
+        Returns:
+            LabelMatrix: ラベル行列
+        """
+        labels = list(labels) if labels else read_label_names(path)
+        columns = ["更新日時"] + (["法人名"] if with_companies else []) + labels
+        table = read_columns(path, columns)
+
+        values = np.empty((table.num_rows, len(labels)), dtype=np.uint8)
+        for j, label in enumerate(labels):
+            column = pc.fill_null(table.column(label).cast(pa.int64()), 0)
+            values[:, j] = column.to_numpy(zero_copy_only=False) == 1
+
+        companies = None
+        if with_companies:
+            companies = pc.fill_null(table.column("法人名").cast(pa.string()), "").to_numpy(zero_copy_only=False)
+
+        return cls(labels, values, to_datetime64(table.column("更新日時")), companies)
+
+    def hstack(self, other):
+        """
+        同じ入力から作られた別の分析結果のラベル列を横に連結（訴求ポイント + 課題など）
+
+        Args:
+            other: LabelMatrix（行数・行の順序が同じもの）
+
+        Returns:
+            LabelMatrix: 連結したラベル行列
+        """
+        if len(self) != len(other):
+            raise ValueError(f"行数が一致しません: {len(self)}行 / {len(other)}行")
+        if self.companies is not None and other.companies is not None \
+                and not np.array_equal(self.companies, other.companies):
+            raise ValueError("法人名の並びが一致しません（同じ入力から作られた分析結果を指定してください）")
+
+        return LabelMatrix(
+            self.labels + other.labels,
+            np.hstack([self.values, other.values]),
+            self.timestamps if self.timestamps is not None else other.timestamps,
+            self.companies if self.companies is not None else other.companies
+        )
+
+    def select(self, labels):
+        """
+        指定したラベル列だけを取り出す
+
+        Args:
+            labels: ラベル名のリスト
+
+        Returns:
+            LabelMatrix: ラベル行列
+        """
+        indices = [self.labels.index(label) for label in labels]
+        return LabelMatrix(labels, self.values[:, indices], self.timestamps, self.companies)
+
+    def counts(self):
+        """
+        ラベルごとの該当件数
+
+        Returns:
+            numpy.ndarray: (ラベル数,) の件数
+        """
+        return self.values.sum(axis=0, dtype=np.int64)
+
+    def rates(self):
+        """
+        ラベルごとの該当率
+
+        Returns:
+            numpy.ndarray: (ラベル数,) の割合（行がなければ0）
+        """
+        return self.counts() / max(len(self), 1)
+
+    def cooccurrence(self, other=None):
+        """
+        ラベルの共起件数（両方が1の行数）
+
+        Args:
+            other: 列側のラベル行列（Noneなら自身。行の並びが同じもの）
+
+        Returns:
+            numpy.ndarray: (行側のラベル数, 列側のラベル数) の件数
+        """
+        other = self if other is None else other
+        # uint8 のままでは桁あふれするため、行単位に分けて float32 の行列積（BLAS）で数え、float64 で合計する
+        result = np.zeros((len(self.labels), len(other.labels)), dtype=np.float64)
+        for start in range(0, len(self), COOCCURRENCE_CHUNK_ROWS):
+            end = start + COOCCURRENCE_CHUNK_ROWS
+            block = self.values[start:end].astype(np.float32)
+            other_block = block if other is self else other.values[start:end].astype(np.float32)
+            result += block.T @ other_block
+        return result.astype(np.int64)
+
+    def lift(self, other=None):
+        """
+        ラベルのリフト値 P(A∧B) / (P(A)・P(B))
+
+        1より大きいほど、偶然より多く同時に現れる組み合わせ。
+
+        Args:
+            other: 列側のラベル行列（Noneなら自身）
+
+        Returns:
+            numpy.ndarray: (行側のラベル数, 列側のラベル数) のリフト値（該当0件のラベルはnan）
+        """
+        other = self if other is None else other
+        expected = np.outer(self.counts(), other.counts()).astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lift = self.cooccurrence(other) * float(len(self)) / expected
+        lift[expected == 0] = np.nan
+        return lift
+
+    def trend(self, freq="M"):
+        """
+        期間ごとの行数と該当件数（更新日時が空・解析できない行は除く）
+
+        Args:
+            freq: 集計の単位（"Y" / "M" / "D"）
+
+        Returns:
+            tuple: (期間の配列（datetime64）, 期間ごとの行数, (期間数, ラベル数) の該当件数)
+        """
+        if freq not in TREND_FREQUENCIES:
+            raise ValueError(f"集計の単位が不正です: {freq}（{', '.join(TREND_FREQUENCIES)} のいずれか）")
+        if self.timestamps is None:
+            raise ValueError("更新日時が読み込まれていません")
+
+        valid = ~np.isnat(self.timestamps)
+        if not valid.any():
+            return np.array([], dtype=f"datetime64[{freq}]"), np.zeros(0, dtype=np.int64), \
+                np.zeros((0, len(self.labels)), dtype=np.int64)
+
+        # 期間を最も古い期間からの通し番号にして数える（ソートしないため行数に比例する時間で済む）
+        offsets = self.timestamps[valid].astype(f"datetime64[{freq}]").astype(np.int64)
+        first = offsets.min()
+        offsets -= first
+
+        totals = np.bincount(offsets)
+        values = self.values[valid]
+        counts = np.zeros((len(totals), len(self.labels)), dtype=np.int64)
+        for j in range(len(self.labels)):
+            counts[:, j] = np.bincount(offsets, weights=values[:, j], minlength=len(totals))
+
+        # 行のない期間は除く
+        present = np.flatnonzero(totals)
+        periods = (first + present).astype(f"datetime64[{freq}]")
+        return periods, totals[present], counts[present]
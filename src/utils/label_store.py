@@ -0,0 +1,402 @@
+import re
+import numpy as np
+from datetime import timedelta
+from src.utils.label_stats import LabelMatrix
+from src.utils.timestamp_parser import parse_timestamp
+
+# ラベルストアのデフォルト保存先
+DEFAULT_STORE_PATH = "results/label_store.npz"
+
+# 条件式の演算子
+QUERY_OPERATORS = ("AND", "OR", "NOT")
+
+# 条件式の字句（括弧、"..." で囲んだラベル名、それ以外の語）
+_TOKEN_PATTERN = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+
+# 1バイトごとの立っているビット数（numpy.bitwise_count がない環境用）
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    """
+    ビット列の立っているビットの数を数える
+
+    Args:
+        words: uint64 の配列
+
+    Returns:
+        int: 1のビットの数
+    """
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+    return int(_BYTE_POPCOUNT[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def pack_rows(mask):
+    """
+    行ごとの真偽値を64行ずつ uint64 に詰める（行 i は i // 64 番目の語の i % 64 ビット目）
+
+    Args:
+        mask: 真偽値（0/1）の配列、または (行数, 列数) の行列
+
+    Returns:
+        numpy.ndarray: (語数,) または (列数, 語数) の uint64 配列
+    """
+    mask = np.asarray(mask, dtype=np.uint8)
+    packed = np.packbits(mask, axis=0, bitorder="little")
+    padding = (-packed.shape[0]) % 8
+    if padding:
+        packed = np.concatenate([packed, np.zeros((padding,) + packed.shape[1:], dtype=np.uint8)])
+    return np.ascontiguousarray(packed.T).view("<u8")
+
+
+def unpack_rows(words, size):
+    """
+    pack_rows で詰めたビット列から1の行番号を取り出す
+
+    Args:
+        words: uint64 の配列
+        size: 行数
+
+    Returns:
+        numpy.ndarray: 行番号の配列（昇順）
+    """
+    return np.flatnonzero(np.unpackbits(words.view(np.uint8), count=size, bitorder="little"))
+
+
+def tokenize_query(expression):
+    """
+    条件式を字句に分ける（演算子以外の連続する語は空白でつないで1つのラベル名にする）
+
+    Args:
+        expression: 条件式（例: "シフトの欠員 AND 前払いニーズ AND NOT 福利厚生"）
+
+    Returns:
+        list: (種類, 値) のリスト（種類は "op" / "(" / ")" / "label"）
+    """
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(expression):
+        if word in ("(", ")"):
+            tokens.append((word, word))
+        elif word.upper() in QUERY_OPERATORS:
+            tokens.append(("op", word.upper()))
+        elif word.startswith('"'):
+            tokens.append(("quoted", word[1:-1]))
+        elif tokens and tokens[-1][0] == "label":
+            tokens[-1] = ("label", tokens[-1][1] + " " + word)
+        else:
+            tokens.append(("label", word))
+    return [("label", value) if kind == "quoted" else (kind, value) for kind, value in tokens]
+
+
+class LabelQuery:
+    """
+    ラベルの条件式（AND / OR / NOT と括弧）を解析してビット演算で評価するクラス
+
+    優先順位は NOT > AND > OR。ラベル名に空白を含む場合もそのまま書ける（"..." で囲んでもよい）。
+    """
+
+    def __init__(self, store, expression):
+        """
+        Args:
+            store: LabelStore
+            expression: 条件式
+        """
+        self.store = store
+        self.expression = expression
+        self._tokens = tokenize_query(expression)
+        self._position = 0
+
+    def evaluate(self):
+        """
+        条件式を評価
+
+        Returns:
+            numpy.ndarray: 条件を満たす行のビット列（uint64）
+        """
+        if not self._tokens:
+            raise ValueError("条件式が空です")
+        words = self._parse_or()
+        if self._position < len(self._tokens):
+            raise ValueError(f"条件式を解析できません: {self._tokens[self._position][1]!r} の位置（{self.expression}）")
+        return words
+
+    def _peek(self):
+        return self._tokens[self._position] if self._position < len(self._tokens) else (None, None)
+
+    def _parse_or(self):
+        words = self._parse_and()
+        while self._peek() == ("op", "OR"):
+            self._position += 1
+            words = words | self._parse_and()
+        return words
+
+    def _parse_and(self):
+        words = self._parse_not()
+        while self._peek() == ("op", "AND"):
+            self._position += 1
+            words = words & self._parse_not()
+        return words
+
+    def _parse_not(self):
+        kind, value = self._peek()
+        if (kind, value) == ("op", "NOT"):
+            self._position += 1
+            return ~self._parse_not() & self.store.all_rows
+        if kind == "(":
+            self._position += 1
+            words = self._parse_or()
+            if self._peek()[0] != ")":
+                raise ValueError(f"括弧が閉じていません（{self.expression}）")
+            self._position += 1
+            return words
+        if kind == "label":
+            self._position += 1
+            return self.store.label_bits(value)
+        raise ValueError(f"ラベル名がありません（{self.expression}）")
+
+
+class QueryResult:
+    """
+    条件に該当した行
+
+    words は該当行のビット列、count は該当行数。行番号・法人名は必要になったときに取り出す。
+    """
+
+    def __init__(self, store, words):
+        self.store = store
+        self.words = words
+        self.count = popcount(words)
+
+    def rows(self):
+        """
+        該当した行番号
+
+        Returns:
+            numpy.ndarray: 行番号の配列（入力の順）
+        """
+        return unpack_rows(self.words, len(self.store))
+
+    def companies(self, limit=None):
+        """
+        該当した行の法人名
+
+        Args:
+            limit: 取り出す件数の上限（Noneならすべて）
+
+        Returns:
+            list: 法人名のリスト（入力の順）
+        """
+        rows = self.rows()
+        if limit is not None:
+            rows = rows[:limit]
+        return [self.store.company(row) for row in rows]
+
+
+class LabelStore:
+    """
+    分析結果の0/1ラベルをラベルごとのビット列（64行ずつ uint64 に詰めたもの）で保持するクラス
+
+    1ラベルあたり行数/8バイトのため数百万行でも数MBで、AND / OR / NOT は語単位のビット演算で評価する。
+    法人名はUTF-8のバイト列と各行の開始位置で保持し、法人名 → 行番号の索引は初めて使うときに作る。
+    """
+
+    def __init__(self, labels, bits, size, timestamps, company_data, company_offsets):
+        """
+        Args:
+            labels: ラベル名のリスト
+            bits: (ラベル数, 語数) の uint64 ビット列
+            size: 行数
+            timestamps: 行ごとの更新日時（datetime64[m]、空・解析できない値はNaT）
+            company_data: 法人名をつないだUTF-8のバイト列（uint8 配列）
+            company_offsets: 各行の法人名の開始位置（行数 + 1 個）
+        """
+        self.labels = list(labels)
+        self.bits = bits
+        self.size = int(size)
+        self.timestamps = timestamps
+        self.company_data = company_data
+        self.company_offsets = company_offsets
+        self.all_rows = pack_rows(np.ones(self.size, dtype=np.uint8))
+        self._label_index = {label: i for i, label in enumerate(self.labels)}
+        self._company_index = None
+
+    def __len__(self):
+        return self.size
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """
+        ラベル行列からストアを作る
+
+        Args:
+            matrix: LabelMatrix（法人名を読み込んだもの）
+
+        Returns:
+            LabelStore: ラベルストア
+        """
+        encoded = [str(company).encode('utf-8') for company in matrix.companies]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(matrix.labels, pack_rows(matrix.values), len(matrix), matrix.timestamps, data, offsets)
+
+    @classmethod
+    def build(cls, paths):
+        """
+        分析結果ファイルからストアを作る（同じ入力から作られたものは横に連結する）
+
+        Args:
+            paths: 分析結果ファイルパス（CSVまたはParquet）のリスト
+
+        Returns:
+            LabelStore: ラベルストア
+        """
+        matrix = None
+        for path in paths:
+            loaded = LabelMatrix.load(path, with_companies=True)
+            matrix = loaded if matrix is None else matrix.hstack(loaded)
+        if matrix is None:
+            raise ValueError("分析結果ファイルが指定されていません")
+        return cls.from_matrix(matrix)
+
+    def save(self, path):
+        """
+        ストアをファイルに保存
+
+        Args:
+            path: 保存先（.npz）
+        """
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                labels=np.array(self.labels),
+                bits=self.bits,
+                size=np.array(self.size),
+                timestamps=self.timestamps,
+                company_data=self.company_data,
+                company_offsets=self.company_offsets
+            )
+
+    @classmethod
+    def load(cls, path):
+        """
+        保存したストアを読み込む
+
+        Args:
+            path: save で保存したファイルパス
+
+        Returns:
+            LabelStore: ラベルストア
+        """
+        with np.load(path) as data:
+            return cls(
+                data["labels"].tolist(),
+                data["bits"],
+                int(data["size"]),
+                data["timestamps"],
+                data["company_data"],
+                data["company_offsets"]
+            )
+
+    def label_bits(self, label):
+        """
+        ラベルのビット列
+
+        Args:
+            label: ラベル名
+
+        Returns:
+            numpy.ndarray: 該当行のビット列
+        """
+        try:
+            return self.bits[self._label_index[label]]
+        except KeyError:
+            raise ValueError(f"ラベルがありません: {label!r}（{' / '.join(self.labels)}）") from None
+
+    def date_bits(self, start=None, end=None):
+        """
+        更新日時が期間内の行のビット列
+
+        Args:
+            start: 開始日時（"YYYY-MM-DD" または "YYYY-MM-DD HH:MM"、この日時を含む）
+            end: 終了日時（同上、この日時を含む。日付だけの場合はその日の終わりまで）
+
+        Returns:
+            numpy.ndarray: 該当行のビット列（更新日時が空の行は含まない）
+        """
+        mask = ~np.isnat(self.timestamps)
+        if start:
+            mask &= self.timestamps >= np.datetime64(self._parse_bound(start), "m")
+        if end:
+            bound = self._parse_bound(end)
+            if len(end.strip()) == 10:
+                mask &= self.timestamps < np.datetime64(bound + timedelta(days=1), "m")
+            else:
+                mask &= self.timestamps <= np.datetime64(bound, "m")
+        return pack_rows(mask)
+
+    def query(self, expression=None, start=None, end=None):
+        """
+        条件に該当する行を取得
+
+        Args:
+            expression: ラベルの条件式（例: "シフトの欠員 AND 前払いニーズ AND NOT 福利厚生"、Noneなら全行）
+            start: 更新日時の開始（Noneなら指定なし）
+            end: 更新日時の終了（Noneなら指定なし）
+
+        Returns:
+            QueryResult: 該当した行
+        """
+        words = LabelQuery(self, expression).evaluate() if expression else self.all_rows
+        if start or end:
+            words = words & self.date_bits(start, end)
+        return QueryResult(self, words)
+
+    def company(self, row):
+        """
+        行の法人名
+
+        Args:
+            row: 行番号
+
+        Returns:
+            str: 法人名
+        """
+        return self.company_data[self.company_offsets[row]:self.company_offsets[row + 1]].tobytes().decode('utf-8')
+
+    def company_rows(self, company):
+        """
+        法人名の行番号（初回に全行の索引を作る）
+
+        Args:
+            company: 法人名
+
+        Returns:
+            list: 行番号のリスト（該当がなければ空）
+        """
+        if self._company_index is None:
+            self._company_index = {}
+            for row in range(self.size):
+                self._company_index.setdefault(self.company(row), []).append(row)
+        return self._company_index.get(company, [])
+
+    def labels_of(self, row):
+        """
+        行で1になっているラベル
+
+        Args:
+            row: 行番号
+
+        Returns:
+            list: ラベル名のリスト（ラベルの順）
+        """
+        word, bit = divmod(row, 64)
+        flags = (self.bits[:, word] >> np.uint64(bit)) & np.uint64(1)
+        return [label for label, flag in zip(self.labels, flags) if flag]
+
+    def _parse_bound(self, value):
+        parsed = parse_timestamp(value.strip())
+        if parsed is None:
+            raise ValueError(f"日時を解析できません: {value!r}（YYYY-MM-DD または YYYY-MM-DD HH:MM）")
+        return parsed
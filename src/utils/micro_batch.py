@@ -0,0 +1,220 @@
+import json
+import asyncio
+from src.utils.rate_limiter import estimate_tokens
+
+# 1件用プロンプトの活動内容の位置に差し込む文言
+BATCH_CONTENT_PLACEHOLDER = "（最後に示す「ログ一覧」の各ログ）"
+
+
+class MicroBatcher:
+    """
+    複数の短いログを1回のリクエストにまとめて分析するクラス
+
+    - 各ログに入力順の安定したID（r0, r1, ...）を振り、{"results": [...]} 形式で回答させる
+    - 1バッチの件数はトークン予算から自動的に決める
+    - 欠落・形式不正のIDは半分ずつに分割して再リクエストし、最後は1件用プロンプトで処理する
+    """
+
+    def __init__(self, client, prompts, required_keys, temperature=0.3,
+                 input_token_budget=6000, output_token_budget=4000, max_batch_size=40,
+                 output_tokens_per_item=None):
+        """
+        Args:
+            client: AsyncOpenAIClient
+            prompts: get_system_prompt() / get_user_prompt(content) を持つプロンプト
+            required_keys: 1件分の回答に必須のキー
+            temperature: 生成の温度パラメータ
+            input_token_budget: 1リクエストの入力トークン数の上限
+            output_token_budget: 1リクエストの出力トークン数の上限
+            max_batch_size: 1リクエストにまとめる最大件数
+            output_tokens_per_item: 1件分の回答のトークン数の見積もり（Noneならキーから推定）
+        """
+        self.client = client
+        self.prompts = prompts
+        self.required_keys = list(required_keys)
+        self.temperature = temperature
+        self.input_token_budget = input_token_budget
+        self.output_token_budget = output_token_budget
+        self.max_batch_size = max_batch_size
+        self.output_tokens_per_item = output_tokens_per_item or (
+            sum(estimate_tokens(key) + 4 for key in self.required_keys) + 10
+        )
+        self.stats = {"requests": 0, "resplits": 0, "single_fallbacks": 0}
+
+        # 指示・回答形式は全バッチで共通なので一度だけ組み立てる（ログ一覧は末尾に付けてプロンプトキャッシュを効かせる）
+        self.system_prompt = prompts.get_system_prompt()
+        self.instructions = prompts.get_user_prompt(BATCH_CONTENT_PLACEHOLDER)
+        self.prefix = f"""
+以下の「指示」を、最後に示す「ログ一覧」に含まれる各商談ログに1件ずつ個別に適用してください。
+
+=== 指示 ===
+{self.instructions}
+=== 指示ここまで ===
+
+回答形式:
+指示で指定されたJSONオブジェクトを各ログについて作成し、"id" を加えて "results" 配列にまとめてください。
+ログ一覧のすべてのidについて、漏れなく1件ずつ回答してください。
+{{"results": [{{"id": "r0", ...}}, {{"id": "r1", ...}}]}}
+"""
+        self.overhead_tokens = (
+            estimate_tokens(self.system_prompt) + estimate_tokens(self.build_user_prompt([]))
+        )
+
+    def build_user_prompt(self, batch):
+        """
+        バッチ用のユーザープロンプトを組み立てる
+
+        Args:
+            batch: (id, 活動内容) のリスト
+
+        Returns:
+            str: ユーザープロンプト
+        """
+        logs_json = json.dumps(
+            [{"id": entry_id, "活動内容": content} for entry_id, content in batch],
+            ensure_ascii=False, indent=2
+        )
+        return f"""{self.prefix}
+ログ一覧（JSON配列。"id" と "活動内容" の組）:
+{logs_json}
+"""
+
+    def plan_batches(self, entries):
+        """
+        トークン予算に収まるようにログをバッチに分割
+
+        Args:
+            entries: (id, 活動内容) のリスト
+
+        Returns:
+            list: バッチ（(id, 活動内容) のリスト）のリスト
+        """
+        batches = []
+        current = []
+        input_tokens = self.overhead_tokens
+
+        for entry_id, content in entries:
+            # JSONのキーや区切りの分を加味する
+            tokens = estimate_tokens(content) + 15
+            full = (
+                len(current) >= self.max_batch_size
+                or input_tokens + tokens > self.input_token_budget
+                or (len(current) + 1) * self.output_tokens_per_item > self.output_token_budget
+            )
+            if current and full:
+                batches.append(current)
+                current = []
+                input_tokens = self.overhead_tokens
+            current.append((entry_id, content))
+            input_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def run(self, contents, progress_callback=None):
+        """
+        全ログを分析
+
+        Args:
+            contents: 活動内容のリスト
+            progress_callback: 結果が確定した件数を受け取るコールバック（任意）
+
+        Returns:
+            list: 入力順の分析結果（失敗した要素はNone）
+        """
+        entries = [(f"r{i}", content) for i, content in enumerate(contents)]
+        results = {}
+        batches = self.plan_batches(entries)
+
+        await asyncio.gather(*(self._run_batch(batch, results, progress_callback) for batch in batches))
+
+        return [results.get(entry_id) for entry_id, _ in entries]
+
+    async def _run_batch(self, batch, results, progress_callback):
+        """
+        1バッチを分析し、欠落・形式不正の分は分割して再実行
+
+        Args:
+            batch: (id, 活動内容) のリスト
+            results: ID → 分析結果（この辞書に書き込む）
+            progress_callback: 進捗コールバック
+        """
+        if len(batch) == 1:
+            entry_id, content = batch[0]
+            result = await self.client.analyze_with_prompt(
+                self.system_prompt, self.prompts.get_user_prompt(content), temperature=self.temperature,
+                required_keys=self.required_keys
+            )
+            self.stats["requests"] += 1
+            results[entry_id] = result if self._is_complete(result) else None
+            if progress_callback:
+                progress_callback(1)
+            return
+
+        response = await self.client.analyze_with_prompt(
+            self.system_prompt,
+            self.build_user_prompt(batch),
+            temperature=self.temperature,
+            expected_output_tokens=len(batch) * self.output_tokens_per_item,
+            required_keys=["results"]
+        )
+        self.stats["requests"] += 1
+
+        parsed = self._parse_response(response, {entry_id for entry_id, _ in batch})
+        results.update(parsed)
+        if progress_callback and parsed:
+            progress_callback(len(parsed))
+
+        missing = [entry for entry in batch if entry[0] not in parsed]
+        if not missing:
+            return
+
+        # 欠落分を半分ずつに分けて再リクエスト
+        self.stats["resplits"] += 1
+        if len(missing) == 1:
+            self.stats["single_fallbacks"] += 1
+            await self._run_batch(missing, results, progress_callback)
+        else:
+            middle = len(missing) // 2
+            await asyncio.gather(
+                self._run_batch(missing[:middle], results, progress_callback),
+                self._run_batch(missing[middle:], results, progress_callback)
+            )
+
+    def _parse_response(self, response, expected_ids):
+        """
+        バッチの回答からIDごとの結果を取り出す
+
+        Args:
+            response: APIの回答（dict）
+            expected_ids: このバッチのIDの集合
+
+        Returns:
+            dict: ID → 分析結果（必須キーが揃っているもののみ）
+        """
+        if not isinstance(response, dict) or not isinstance(response.get("results"), list):
+            return {}
+
+        parsed = {}
+        for item in response["results"]:
+            if not isinstance(item, dict):
+                continue
+            entry_id = str(item.get("id"))
+            if entry_id not in expected_ids or entry_id in parsed:
+                continue
+            result = {key: value for key, value in item.items() if key != "id"}
+            if self._is_complete(result):
+                parsed[entry_id] = result
+        return parsed
+
+    def _is_complete(self, result):
+        """必須キーがすべて含まれているか"""
+        return isinstance(result, dict) and all(key in result for key in self.required_keys)
+
+    def print_stats(self):
+        """バッチ処理の統計を表示"""
+        print(
+            f"マイクロバッチ: リクエスト {self.stats['requests']}回 "
+            f"(再分割: {self.stats['resplits']}回, 1件ずつ再実行: {self.stats['single_fallbacks']}回)"
+        )
@@ -1,54 +1,78 @@
 import os
 import json
-from openai import OpenAI
+import asyncio
+import threading
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
 from dotenv import load_dotenv
+from src.utils.rate_limiter import RateLimitScheduler, backoff_delay, estimate_tokens, parse_reset_duration
+from src.utils.response_cache import ResponseCache
 
 # 環境変数を読み込む
 load_dotenv()
 
+# リトライ対象のエラー（一時的な障害）
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
 
-class OpenAIClient:
-    """OpenAI APIクライアントのラッパークラス"""
 
-    def __init__(self, api_key=None):
+class PromptCacheStats:
+    """
+    APIの usage から入力トークン数と、そのうちプロンプトキャッシュ（先頭が一致する部分）に当たったトークン数を集計するクラス
+
+    プロンプトは共通の指示を先頭に、ログごとに変わる部分を末尾に置いているため、
+    2回目以降のリクエストでは共通部分がキャッシュに当たる（1024トークン以上の場合）。
+    """
+
+    def __init__(self):
+        self.responses = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    def add(self, prompt_tokens, cached_tokens):
         """
-        OpenAIクライアントを初期化
+        1回の応答のトークン数を加算
 
         Args:
-            api_key: OpenAI APIキー（Noneの場合は環境変数から取得）
+            prompt_tokens: 入力トークン数
+            cached_tokens: そのうちキャッシュに当たったトークン数
         """
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        with self._lock:
+            self.responses += 1
+            self.prompt_tokens += prompt_tokens or 0
+            self.cached_tokens += cached_tokens or 0
 
-    def analyze_with_prompt(self, system_prompt, user_prompt, model="gpt-4o-mini", temperature=0.3):
+    def add_usage(self, usage):
         """
-        プロンプトを使用してOpenAI APIで分析を実行
+        SDKの応答の usage を加算
 
         Args:
-            system_prompt: システムプロンプト
-            user_prompt: ユーザープロンプト
-            model: 使用するモデル名
-            temperature: 生成の温度パラメータ
-
-        Returns:
-            dict: 分析結果（JSON形式）
+            usage: response.usage（Noneの場合は何もしない）
         """
-        try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=temperature
-            )
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.add(usage.prompt_tokens, getattr(details, "cached_tokens", 0))
 
-            result = json.loads(response.choices[0].message.content)
-            return result
+    def print_stats(self):
+        """入力トークン数とキャッシュに当たった割合を表示（応答がなければ何もしない）"""
+        if not self.responses:
+            return
+        rate = 100 * self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0
+        print(
+            f"入力トークン: {self.prompt_tokens:,} "
+            f"(うちプロンプトキャッシュ: {self.cached_tokens:,}, {rate:.1f}%、{self.responses}回の応答)"
+        )
 
-        except Exception as e:
-            print(f"分析エラー: {e}")
-            return None
+
+class DefaultResponseMixin:
+    """エラー時のデフォルト応答を提供する共通クラス"""
 
     def get_default_error_response(self):
         """
@@ -102,3 +126,245 @@ class OpenAIClient:
             "福利厚生": 0,
             "前払いニーズ": 0
         }
+
+    def get_unified_default_error_response(self):
+        """
+        エラー時のデフォルト応答を返す（訴求ポイント＋課題分類の一括版）
+
+        Returns:
+            dict: 訴求ポイント・課題の各項目が0の辞書
+        """
+        return {
+            "訴求ポイント": self.get_hr_default_error_response(),
+            "課題": self.get_challenge_default_error_response()
+        }
+
+
+class OpenAIClient(DefaultResponseMixin):
+    """OpenAI APIクライアントのラッパークラス"""
+
+    def __init__(self, api_key=None, cache=None):
+        """
+        OpenAIクライアントを初期化
+
+        Args:
+            api_key: OpenAI APIキー（Noneの場合は環境変数から取得）
+            cache: ResponseCache（Noneの場合は環境変数の設定で生成）
+        """
+        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.cache = cache or ResponseCache.from_env()
+        self.usage = PromptCacheStats()
+
+    def analyze_with_prompt(self, system_prompt, user_prompt, model="gpt-4o-mini", temperature=0.3,
+                            use_cache=True, required_keys=None):
+        """
+        プロンプトを使用してOpenAI APIで分析を実行
+
+        同じモデル・温度・プロンプトの応答がキャッシュにあればAPIを呼ばずに返す。
+
+        Args:
+            system_prompt: システムプロンプト
+            user_prompt: ユーザープロンプト
+            model: 使用するモデル名
+            temperature: 生成の温度パラメータ
+            use_cache: キャッシュを使用するかどうか
+            required_keys: 回答に必須のキー（欠けている回答はキャッシュに保存しない）
+
+        Returns:
+            dict: 分析結果（JSON形式）
+        """
+        cache_key = ResponseCache.make_key(model, temperature, system_prompt, user_prompt)
+        if use_cache:
+            cached = self.cache.get(cache_key, required_keys)
+            if cached is not None:
+                return cached
+
+        try:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                response_format={"type": "json_object"},
+                temperature=temperature
+            )
+            self.usage.add_usage(response.usage)
+
+            result = json.loads(response.choices[0].message.content)
+            if use_cache:
+                self.cache.put(cache_key, result, required_keys)
+            return result
+
+        except Exception as e:
+            print(f"分析エラー: {e}")
+            return None
+
+
+class AsyncOpenAIClient(DefaultResponseMixin):
+    """
+    AsyncOpenAIを使った非同期クライアント
+
+    RateLimitSchedulerでRPM/TPMと同時実行数を制御し、
+    429・タイムアウト・5xxはジッター付きバックオフでリトライする。
+    """
+
+    def __init__(self, api_key=None, scheduler=None, cache=None, max_retries=6, max_output_tokens=300, usage=None):
+        """
+        非同期クライアントを初期化
+
+        Args:
+            api_key: OpenAI APIキー（Noneの場合は環境変数から取得）
+            scheduler: RateLimitScheduler（Noneの場合は環境変数の設定で生成）
+            cache: ResponseCache（Noneの場合は環境変数の設定で生成）
+            max_retries: 一時的なエラーのリトライ回数
+            max_output_tokens: 出力トークン数の見積もり（TPM予算の計算用）
+            usage: PromptCacheStats（Noneの場合は生成。同期クライアントと集計を共有する場合に指定）
+        """
+        # リトライはスケジューラと連動させるためSDK側では行わない
+        self.client = AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"), max_retries=0)
+        self.scheduler = scheduler or RateLimitScheduler.from_env()
+        self.cache = cache or ResponseCache.from_env()
+        self.max_retries = max_retries
+        self.max_output_tokens = max_output_tokens
+        self.usage = usage or PromptCacheStats()
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+
+    async def analyze_with_prompt(self, system_prompt, user_prompt, model="gpt-4o-mini", temperature=0.3,
+                                  use_cache=True, expected_output_tokens=None, required_keys=None):
+        """
+        プロンプトを使用してOpenAI APIで分析を実行（非同期版）
+
+        Args:
+            system_prompt: システムプロンプト
+            user_prompt: ユーザープロンプト
+            model: 使用するモデル名
+            temperature: 生成の温度パラメータ
+            use_cache: キャッシュを使用するかどうか
+            expected_output_tokens: 出力トークン数の見積もり（Noneならmax_output_tokens）
+            required_keys: 回答に必須のキー（欠けている回答はキャッシュに保存しない）
+
+        Returns:
+            dict: 分析結果（JSON形式）。リトライしても失敗した場合はNone
+        """
+        cache_key = ResponseCache.make_key(model, temperature, system_prompt, user_prompt)
+        if use_cache:
+            cached = self.cache.get(cache_key, required_keys)
+            if cached is not None:
+                return cached
+
+        estimated = (
+            estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+            + (expected_output_tokens or self.max_output_tokens)
+        )
+
+        for attempt in range(self.max_retries + 1):
+            await self.scheduler.acquire(estimated)
+            self.stats["requests"] += 1
+            # release は1回のリクエストにつき1回だけ呼ぶ（2回呼ぶと同時実行数の上限がずれる）
+            released = False
+
+            try:
+                raw = await self.client.chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=temperature
+                )
+                self.scheduler.update_from_headers(raw.headers)
+                response = raw.parse()
+                self.usage.add_usage(response.usage)
+                used = response.usage.total_tokens if response.usage else None
+
+                # 回答を解釈できた場合だけ成功として扱う
+                result = json.loads(response.choices[0].message.content)
+                if not isinstance(result, dict):
+                    raise ValueError(f"回答がJSONオブジェクトではありません: {type(result).__name__}")
+                released = True
+                await self.scheduler.release(success=True, estimated_tokens=estimated, used_tokens=used)
+
+                if use_cache:
+                    self.cache.put(cache_key, result, required_keys)
+                return result
+
+            except asyncio.CancelledError:
+                if not released:
+                    self.scheduler.cancel()
+                raise
+
+            except RETRYABLE_ERRORS as e:
+                rate_limited = isinstance(e, RateLimitError)
+                await self.scheduler.release(success=False, rate_limited=rate_limited, estimated_tokens=estimated)
+
+                if rate_limited:
+                    self.stats["rate_limited"] += 1
+                if attempt >= self.max_retries:
+                    print(f"分析エラー（リトライ上限）: {type(e).__name__}: {e}")
+                    break
+
+                delay = backoff_delay(attempt)
+                retry_after = self._get_retry_after(e)
+                if retry_after:
+                    delay = max(delay, retry_after)
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+
+            except Exception as e:
+                # 認証エラーやJSONの解析失敗などはリトライしない
+                if not released:
+                    await self.scheduler.release(success=False, estimated_tokens=estimated)
+                print(f"分析エラー: {type(e).__name__}: {e}")
+                break
+
+        self.stats["failures"] += 1
+        return None
+
+    async def analyze_many(self, prompt_pairs, model="gpt-4o-mini", temperature=0.3):
+        """
+        複数のプロンプトを並行して分析
+
+        Args:
+            prompt_pairs: (system_prompt, user_prompt) のリスト
+            model: 使用するモデル名
+            temperature: 生成の温度パラメータ
+
+        Returns:
+            list: 入力順の分析結果（失敗した要素はNone）
+        """
+        return await asyncio.gather(*(
+            self.analyze_with_prompt(system_prompt, user_prompt, model=model, temperature=temperature)
+            for system_prompt, user_prompt in prompt_pairs
+        ))
+
+    def print_stats(self):
+        """リクエスト統計を表示"""
+        print(
+            f"APIリクエスト: {self.stats['requests']}回 "
+            f"(リトライ: {self.stats['retries']}回, 429: {self.stats['rate_limited']}回, "
+            f"失敗: {self.stats['failures']}件, 最終同時実行数: {self.scheduler.concurrency})"
+        )
+        self.usage.print_stats()
+        self.cache.print_stats()
+
+    @staticmethod
+    def _get_retry_after(error):
+        """
+        エラーレスポンスから待ち時間を取得
+
+        Args:
+            error: OpenAIの例外
+
+        Returns:
+            float: 待ち秒数（取得できない場合はNone）
+        """
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        headers = response.headers
+        return (
+            parse_reset_duration(headers.get("retry-after"))
+            or parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+        )
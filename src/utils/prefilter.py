@@ -0,0 +1,307 @@
+import os
+import re
+import json
+import math
+import threading
+import unicodedata
+from collections import Counter
+
+# 学習済みモデルの保存先
+DEFAULT_MODEL_PATH = "data/models/prefilter_nb.json"
+
+# モデルの判定を採用する確率の下限（これ未満はLLMに回す）
+DEFAULT_THRESHOLD = float(os.getenv("PREFILTER_THRESHOLD", "0.98"))
+
+# ローカルで判定した結果の理由に付ける印（学習データ・マニフェストからの除外に使う）
+RULE_REASON_SUFFIX = "（ルール判定）"
+MODEL_REASON_SUFFIX = "（モデル判定）"
+
+# 自動送信メール・システム通知
+AUTO_NOTIFICATION_PATTERN = re.compile(
+    r"自動(送信|配信|通知)|送信専用|配信停止|このメールに(は)?返信|no-?reply|do-?not-?reply"
+    r"|システム(通知|メール)|※\s*本メールは",
+    re.IGNORECASE
+)
+
+# メールのヘッダー行
+EMAIL_HEADER_PATTERN = re.compile(r"^\s*(件名|Subject|From|To|CC|差出人|宛先|送信日時)\s*[:：]", re.IGNORECASE | re.MULTILINE)
+
+# メールの定型文（書き出しと結び）
+EMAIL_OPENING_PATTERN = re.compile(r"お世話になって(おり|お)ります|お疲れ様です|ご担当者様")
+EMAIL_CLOSING_PATTERN = re.compile(r"よろしくお願い(いた|致)?します|何卒|ご査収")
+
+# 日程調整
+SCHEDULING_PATTERN = re.compile(r"日程|候補日|ご都合|調整|リスケ|日時(の)?変更|アポ(イント)?(取得|設定|変更)")
+
+# 商談の実質的な内容を示す語（これを含む場合はルールで除外しない）
+BUSINESS_PATTERN = re.compile(
+    r"課題|ヒアリング|提案|予算|検討|導入|採用|ニーズ|要望|決裁|競合|見積|受注|失注|懸念|困って|悩み|次回までに"
+)
+
+# 日程調整のみと判定する最大文字数
+SCHEDULING_MAX_LENGTH = 80
+
+# メール文面のみと判定する最大文字数
+EMAIL_MAX_LENGTH = 400
+
+
+def normalize_text(text):
+    """
+    特徴量抽出用にテキストを正規化（NFKC・小文字化・数字の統一・空白の除去）
+
+    Args:
+        text: テキスト
+
+    Returns:
+        str: 正規化したテキスト
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"\d", "0", text)
+    return re.sub(r"\s+", "", text)
+
+
+def extract_features(text):
+    """
+    文字bigramの集合を特徴量として抽出（分かち書き不要で日本語に使える）
+
+    Args:
+        text: テキスト
+
+    Returns:
+        set: bigramの集合
+    """
+    normalized = normalize_text(text)
+    return {normalized[i:i + 2] for i in range(len(normalized) - 1)}
+
+
+def is_local_verdict(verdict):
+    """
+    ルール・モデルでローカルに判定した結果かどうか
+
+    Args:
+        verdict: {"is_valid": bool, "reason": str}
+
+    Returns:
+        bool: ローカル判定ならTrue
+    """
+    return verdict.get('reason', '').endswith((RULE_REASON_SUFFIX, MODEL_REASON_SUFFIX))
+
+
+class NaiveBayesClassifier:
+    """
+    文字bigramのナイーブベイズ分類器（純Python、外部ライブラリ不要）
+
+    各文書のbigramは1回だけ数える（二値化した多項モデル）。ラベルは True（有効）/ False（除外）。
+    """
+
+    VERSION = 1
+
+    def __init__(self):
+        self.doc_counts = {True: 0, False: 0}
+        self.feature_counts = {True: Counter(), False: Counter()}
+        self.totals = {True: 0, False: 0}
+        self.vocabulary = set()
+
+    def train(self, texts, labels):
+        """
+        学習データを追加
+
+        Args:
+            texts: テキストのリスト
+            labels: 各テキストのラベル（bool）のリスト
+        """
+        for text, label in zip(texts, labels):
+            label = bool(label)
+            features = extract_features(text)
+            self.doc_counts[label] += 1
+            self.feature_counts[label].update(features)
+            self.totals[label] += len(features)
+            self.vocabulary.update(features)
+
+    def predict_proba(self, text):
+        """
+        有効（True）である確率を計算
+
+        Args:
+            text: テキスト
+
+        Returns:
+            float: 有効である確率（学習データがなければ0.5）
+        """
+        total_docs = self.doc_counts[True] + self.doc_counts[False]
+        if not total_docs or not self.doc_counts[True] or not self.doc_counts[False]:
+            return 0.5
+
+        vocabulary_size = len(self.vocabulary) + 1
+        scores = {}
+        for label in (True, False):
+            counts = self.feature_counts[label]
+            denominator = self.totals[label] + vocabulary_size
+            score = math.log(self.doc_counts[label] / total_docs)
+            for feature in extract_features(text):
+                score += math.log((counts.get(feature, 0) + 1) / denominator)
+            scores[label] = score
+
+        # log-sum-exp で確率に変換
+        diff = scores[False] - scores[True]
+        if diff > 700:
+            return 0.0
+        return 1.0 / (1.0 + math.exp(diff))
+
+    def save(self, path):
+        """
+        モデルをJSONに保存
+
+        Args:
+            path: 保存先のパス
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": self.VERSION,
+                "doc_counts": {"valid": self.doc_counts[True], "invalid": self.doc_counts[False]},
+                "feature_counts": {
+                    "valid": dict(self.feature_counts[True]),
+                    "invalid": dict(self.feature_counts[False])
+                }
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        """
+        保存したモデルを読み込む
+
+        Args:
+            path: モデルファイルのパス
+
+        Returns:
+            NaiveBayesClassifier: 分類器（バージョン不一致の場合はNone）
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != cls.VERSION:
+            return None
+
+        model = cls()
+        for label, key in ((True, "valid"), (False, "invalid")):
+            model.doc_counts[label] = data["doc_counts"][key]
+            model.feature_counts[label] = Counter(data["feature_counts"][key])
+            model.totals[label] = sum(model.feature_counts[label].values())
+            model.vocabulary.update(model.feature_counts[label])
+        return model
+
+
+class PreFilter:
+    """
+    LLM検証の前段でルールとモデルにより判定するクラス
+
+    - ルール: 自動通知・メール文面のみ・日程調整のみを除外（商談内容を示す語を含む場合は適用しない）
+    - モデル: ナイーブベイズの確率が threshold 以上（または 1 - threshold 以下）の場合のみ判定
+    いずれにも当てはまらない曖昧なものは None を返し、LLMに判定を任せる。
+    """
+
+    def __init__(self, model=None, threshold=DEFAULT_THRESHOLD, use_rules=True):
+        """
+        Args:
+            model: NaiveBayesClassifier（Noneならルールのみ）
+            threshold: モデルの判定を採用する確率の下限
+            use_rules: ルールを使うかどうか
+        """
+        self.model = model
+        self.threshold = threshold
+        self.use_rules = use_rules
+        self.stats = {"rule": 0, "model": 0, "escalated": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_path(cls, model_path=DEFAULT_MODEL_PATH, **kwargs):
+        """
+        モデルファイルがあれば読み込んで生成
+
+        Args:
+            model_path: モデルファイルのパス
+
+        Returns:
+            PreFilter: 前段フィルタ
+        """
+        model = NaiveBayesClassifier.load(model_path) if model_path and os.path.exists(model_path) else None
+        return cls(model=model, **kwargs)
+
+    def classify(self, activity_content):
+        """
+        ローカルで判定できる場合は判定結果を返す
+
+        Args:
+            activity_content: 検証対象の活動内容
+
+        Returns:
+            dict: {"is_valid": bool, "reason": str}（LLMでの判定が必要な場合はNone）
+        """
+        verdict = self.check_rules(activity_content) if self.use_rules else None
+        kind = "rule"
+
+        if verdict is None and self.model:
+            verdict = self.check_model(activity_content)
+            kind = "model"
+
+        with self._lock:
+            self.stats[kind if verdict else "escalated"] += 1
+        return verdict
+
+    def check_rules(self, activity_content):
+        """
+        ルールで明らかに不適切な内容を判定
+
+        Args:
+            activity_content: 検証対象の活動内容
+
+        Returns:
+            dict: 判定結果（該当しない場合はNone）
+        """
+        if BUSINESS_PATTERN.search(activity_content):
+            return None
+
+        if AUTO_NOTIFICATION_PATTERN.search(activity_content):
+            return {"is_valid": False, "reason": "自動通知" + RULE_REASON_SUFFIX}
+
+        length = len(activity_content.strip())
+        if length <= EMAIL_MAX_LENGTH and (
+            len(EMAIL_HEADER_PATTERN.findall(activity_content)) >= 2
+            or (EMAIL_OPENING_PATTERN.search(activity_content) and EMAIL_CLOSING_PATTERN.search(activity_content))
+        ):
+            return {"is_valid": False, "reason": "メール文面のみ" + RULE_REASON_SUFFIX}
+
+        if length <= SCHEDULING_MAX_LENGTH and SCHEDULING_PATTERN.search(activity_content):
+            return {"is_valid": False, "reason": "日程調整のみ" + RULE_REASON_SUFFIX}
+
+        return None
+
+    def check_model(self, activity_content):
+        """
+        モデルの確率が十分に高い・低い場合のみ判定
+
+        Args:
+            activity_content: 検証対象の活動内容
+
+        Returns:
+            dict: 判定結果（曖昧な場合はNone）
+        """
+        probability = self.model.predict_proba(activity_content)
+        if probability >= self.threshold:
+            return {"is_valid": True, "reason": "商談内容あり" + MODEL_REASON_SUFFIX}
+        if probability <= 1 - self.threshold:
+            return {"is_valid": False, "reason": "商談内容なし" + MODEL_REASON_SUFFIX}
+        return None
+
+    def print_stats(self):
+        """API呼び出しを回避した件数を表示"""
+        avoided = self.stats["rule"] + self.stats["model"]
+        total = avoided + self.stats["escalated"]
+        rate = 100 * avoided / total if total else 0
+        print(
+            f"  前段フィルタ: API呼び出し回避 {avoided}件 / {total}件 ({rate:.1f}%) "
+            f"(ルール: {self.stats['rule']}件, モデル: {self.stats['model']}件, LLMへ: {self.stats['escalated']}件)"
+        )
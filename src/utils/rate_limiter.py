@@ -0,0 +1,276 @@
+import os
+import re
+import time
+import random
+import asyncio
+
+
+def estimate_tokens(text):
+    """
+    テキストのトークン数を概算
+
+    日本語などの非ASCII文字は1文字≒1トークン、ASCII文字は4文字≒1トークンとして数える。
+
+    Args:
+        text: 対象テキスト
+
+    Returns:
+        int: 推定トークン数
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return (len(text) - ascii_chars) + ascii_chars // 4 + 1
+
+
+def parse_reset_duration(value):
+    """
+    レート制限ヘッダーのリセット時間を秒に変換
+
+    Args:
+        value: ヘッダー値 (例: "1s", "6m0s", "20ms")
+
+    Returns:
+        float: 秒数（解釈できない場合はNone）
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        matched = True
+        amount = float(amount)
+        if unit == "ms":
+            total += amount / 1000
+        elif unit == "s":
+            total += amount
+        elif unit == "m":
+            total += amount * 60
+        elif unit == "h":
+            total += amount * 3600
+    return total if matched else None
+
+
+class TokenBucket:
+    """1分あたりの予算を一定速度で補充するトークンバケット"""
+
+    def __init__(self, capacity_per_minute):
+        """
+        Args:
+            capacity_per_minute: 1分あたりの上限
+        """
+        self.capacity = float(capacity_per_minute)
+        self.tokens = float(capacity_per_minute)
+        self.refill_rate = self.capacity / 60.0
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def wait_time(self, amount):
+        """
+        指定量を消費できるまでの待ち時間を返す
+
+        Args:
+            amount: 消費量
+
+        Returns:
+            float: 待ち秒数（0なら即時消費可能）
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount):
+        """予算を消費（マイナスになる場合もある）"""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount):
+        """見積もりとの差分を返却"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def sync(self, remaining, reset_seconds=None):
+        """
+        APIが返した残量に合わせてバケットを補正
+
+        Args:
+            remaining: サーバー側の残量
+            reset_seconds: 上限までリセットされるまでの秒数
+        """
+        self._refill()
+        self.tokens = min(self.tokens, float(remaining))
+        if reset_seconds and remaining < self.capacity:
+            # サーバー側の回復速度の方が遅い場合はそちらに合わせる
+            self.refill_rate = min(self.capacity / 60.0, (self.capacity - remaining) / reset_seconds)
+        else:
+            self.refill_rate = self.capacity / 60.0
+
+
+class RateLimitScheduler:
+    """
+    RPM/TPMの予算と同時実行数を管理するスケジューラ
+
+    - リクエスト数・トークン数それぞれをトークンバケットで制御
+    - レスポンスの x-ratelimit-* ヘッダーでバケットを補正
+    - 成功が続けば同時実行数を1ずつ増やし、429を受けたら半減させる（AIMD）
+    """
+
+    def __init__(self, requests_per_minute=500, tokens_per_minute=200000,
+                 initial_concurrency=8, min_concurrency=1, max_concurrency=64):
+        """
+        Args:
+            requests_per_minute: 1分あたりのリクエスト上限
+            tokens_per_minute: 1分あたりのトークン上限
+            initial_concurrency: 同時実行数の初期値
+            min_concurrency: 同時実行数の下限
+            max_concurrency: 同時実行数の上限
+        """
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency = max(min_concurrency, min(initial_concurrency, max_concurrency))
+        self.in_flight = 0
+        self._successes_since_change = 0
+        self._condition = None
+
+    @classmethod
+    def from_env(cls):
+        """
+        環境変数から設定を読み込んで生成
+
+        OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT / OPENAI_MAX_CONCURRENCY を参照する。
+
+        Returns:
+            RateLimitScheduler: スケジューラ
+        """
+        return cls(
+            requests_per_minute=int(os.getenv("OPENAI_RPM_LIMIT", "500")),
+            tokens_per_minute=int(os.getenv("OPENAI_TPM_LIMIT", "200000")),
+            max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "64")),
+        )
+
+    def _get_condition(self):
+        # イベントループ上で初めて使われた時点で生成する
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self, estimated_tokens):
+        """
+        リクエスト送信の許可を待つ
+
+        Args:
+            estimated_tokens: このリクエストで消費する推定トークン数
+        """
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < self.concurrency)
+            self.in_flight += 1
+
+        try:
+            while True:
+                wait = max(self.request_bucket.wait_time(1), self.token_bucket.wait_time(estimated_tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            # 予算待ちの間に取り消された場合は確保した枠を返す
+            self.cancel()
+            raise
+
+        self.request_bucket.consume(1)
+        self.token_bucket.consume(estimated_tokens)
+
+    async def release(self, success=True, rate_limited=False, estimated_tokens=0, used_tokens=None):
+        """
+        リクエスト完了を通知し、同時実行数を調整
+
+        Args:
+            success: 成功したかどうか
+            rate_limited: 429を受けたかどうか
+            estimated_tokens: 送信前に見積もったトークン数
+            used_tokens: 実際に消費したトークン数（不明ならNone）
+        """
+        if used_tokens is not None and used_tokens < estimated_tokens:
+            self.token_bucket.refund(estimated_tokens - used_tokens)
+        elif used_tokens is not None:
+            self.token_bucket.consume(used_tokens - estimated_tokens)
+
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            if rate_limited:
+                self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+                self._successes_since_change = 0
+            elif success:
+                self._successes_since_change += 1
+                if self._successes_since_change >= self.concurrency and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self._successes_since_change = 0
+            condition.notify_all()
+
+    def cancel(self):
+        """
+        acquire 済みのリクエストを送信・完了させずに取り消す（タスクが取り消された場合）
+
+        同時実行数の枠だけを返し、AIMDの調整は行わない。取り消し中のタスクから呼べるよう、
+        待機中のタスクへの通知は別タスクで行う。
+        """
+        self.in_flight -= 1
+        asyncio.ensure_future(self._notify_waiters())
+
+    async def _notify_waiters(self):
+        condition = self._get_condition()
+        async with condition:
+            condition.notify_all()
+
+    def update_from_headers(self, headers):
+        """
+        x-ratelimit-* ヘッダーでバケットを補正
+
+        Args:
+            headers: レスポンスヘッダー（dict互換）
+        """
+        if not headers:
+            return
+
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        if remaining_requests is not None:
+            self.request_bucket.sync(
+                float(remaining_requests),
+                parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+            )
+
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None:
+            self.token_bucket.sync(
+                float(remaining_tokens),
+                parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+            )
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """
+    ジッター付き指数バックオフの待ち時間を計算（Full Jitter）
+
+    Args:
+        attempt: 試行回数（0始まり）
+        base: 基準秒数
+        cap: 最大秒数
+
+    Returns:
+        float: 待ち秒数
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
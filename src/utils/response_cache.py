@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# キャッシュファイルのデフォルト保存先
+DEFAULT_CACHE_PATH = "data/cache/llm_cache.sqlite3"
+
+
+def has_required_keys(value, required_keys):
+    """
+    応答が必須のキーをすべて含むかどうか
+
+    Args:
+        value: 応答
+        required_keys: 必須のキー（Noneなら確認しない）
+
+    Returns:
+        bool: 含む場合（確認しない場合）はTrue
+    """
+    if not required_keys:
+        return True
+    return isinstance(value, dict) and all(key in value for key in required_keys)
+
+
+class ResponseCache:
+    """
+    LLM応答のディスクキャッシュ（SQLite）
+
+    モデル・温度・システムプロンプト・ユーザープロンプトのハッシュをキーに応答を保存する。
+    必須のキーを指定した場合は、それを欠く応答（形式不正）は保存せず、保存済みでも使わない。
+    件数・容量の上限を超えたら最終参照が古いものから削除し、保存期間を過ぎたものは参照時に破棄する。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=200000, max_bytes=512 * 1024 * 1024,
+                 max_age_days=90, bypass=False):
+        """
+        キャッシュを初期化
+
+        Args:
+            path: SQLiteファイルのパス
+            max_entries: 保持する最大件数
+            max_bytes: 保持する応答の合計バイト数の上限
+            max_age_days: 保存期間（日数、Noneなら無期限）
+            bypass: Trueの場合は読み込みをスキップして常にAPIを呼ぶ（結果の書き込みは行う）
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 86400 if max_age_days else None
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_evict = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # スレッドプールから利用するため接続はロックで保護して共有する
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+        self.evict()
+
+    @classmethod
+    def from_env(cls):
+        """
+        環境変数から設定を読み込んで生成
+
+        LLM_CACHE_PATH / LLM_CACHE_MAX_ENTRIES / LLM_CACHE_MAX_MB / LLM_CACHE_MAX_AGE_DAYS / LLM_CACHE_BYPASS を参照する。
+
+        Returns:
+            ResponseCache: キャッシュ
+        """
+        return cls(
+            path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "200000")),
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024,
+            max_age_days=int(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "90")),
+            bypass=os.getenv("LLM_CACHE_BYPASS", "0") == "1",
+        )
+
+    @staticmethod
+    def make_key(model, temperature, system_prompt, user_prompt):
+        """
+        リクエスト内容からキャッシュキーを生成
+
+        Args:
+            model: モデル名
+            temperature: 温度パラメータ
+            system_prompt: システムプロンプト
+            user_prompt: ユーザープロンプト
+
+        Returns:
+            str: SHA-256のハッシュ値
+        """
+        payload = json.dumps([model, temperature, system_prompt, user_prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key, required_keys=None):
+        """
+        キャッシュから応答を取得
+
+        Args:
+            key: キャッシュキー
+            required_keys: 応答に必須のキー（欠けている応答はミスとして扱う）
+
+        Returns:
+            dict: 保存済みの応答（未登録・期限切れ・必須のキーがない・バイパス時はNone）
+        """
+        if self.bypass:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            value = json.loads(value)
+            expired = self.max_age_seconds and now - created_at > self.max_age_seconds
+            if expired or not has_required_keys(value, required_keys):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        return value
+
+    def put(self, key, value, required_keys=None):
+        """
+        応答をキャッシュに保存
+
+        Args:
+            key: キャッシュキー
+            value: 応答（JSONに変換可能なdict）
+            required_keys: 応答に必須のキー（欠けている応答は保存しない）
+        """
+        if not has_required_keys(value, required_keys):
+            return
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data.encode("utf-8")), now, now)
+            )
+            self._conn.commit()
+            self._puts_since_evict += 1
+
+        if self._puts_since_evict >= 1000:
+            self.evict()
+
+    def evict(self):
+        """期限切れのエントリを削除し、件数・容量の上限を超えた分を古い順に削除"""
+        with self._lock:
+            self._puts_since_evict = 0
+
+            if self.max_age_seconds:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+                )
+
+            count, total_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+
+            if count > self.max_entries or total_size > self.max_bytes:
+                # 最終参照が古い順に上限内に収まるまで削除
+                removed_count = 0
+                removed_size = 0
+                stale_keys = []
+                for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+                    if count - removed_count <= self.max_entries and total_size - removed_size <= self.max_bytes:
+                        break
+                    stale_keys.append((key,))
+                    removed_count += 1
+                    removed_size += size
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+
+            self._conn.commit()
+
+    def print_stats(self):
+        """ヒット・ミス件数を表示"""
+        total = self.hits + self.misses
+        hit_rate = 100 * self.hits / total if total else 0
+        bypass_note = "（バイパス中）" if self.bypass else ""
+        print(f"キャッシュ: ヒット {self.hits}件 / ミス {self.misses}件 (ヒット率 {hit_rate:.1f}%){bypass_note}")
+
+    def close(self):
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,163 @@
+import os
+import json
+import sqlite3
+import hashlib
+
+# チェックポイントのデフォルト保存先
+DEFAULT_JOURNAL_PATH = "data/checkpoints/analysis_journal.sqlite3"
+
+# 何件記録するごとにコミットするか
+DEFAULT_COMMIT_INTERVAL = 50
+
+# プロンプトの署名を作るときに活動内容の位置に差し込む文字列
+SIGNATURE_PLACEHOLDER = "{活動内容}"
+
+
+def prompt_signature(prompts):
+    """
+    プロンプトの内容を表す署名を計算（プロンプトを変更したら記録を使わないようにする）
+
+    Args:
+        prompts: get_system_prompt() / get_user_prompt(content) を持つプロンプト
+
+    Returns:
+        str: SHA-256のハッシュ値
+    """
+    payload = json.dumps(
+        [prompts.get_system_prompt(), prompts.get_user_prompt(SIGNATURE_PLACEHOLDER)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RunJournal:
+    """
+    分析の実行途中の結果を記録するチェックポイント（SQLite）
+
+    タスク名と行の指紋（更新日時・法人名・活動内容のハッシュ）をキーに、成功した行の分析結果を保存する。
+    中断後に同じタスクを実行すると記録済みの行はAPIを呼ばずに記録の結果を使い、
+    記録のない行（未処理・エラーの行）だけを分析する。プロンプトが変わった場合は記録を破棄する。
+    """
+
+    def __init__(self, task_name, signature, path=DEFAULT_JOURNAL_PATH, commit_interval=DEFAULT_COMMIT_INTERVAL):
+        """
+        Args:
+            task_name: タスク名
+            signature: プロンプトの署名（prompt_signature）
+            path: SQLiteファイルのパス
+            commit_interval: 何件記録するごとにコミットするか
+        """
+        self.task_name = task_name
+        self.path = path
+        self.commit_interval = commit_interval
+        self._uncommitted = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                task TEXT PRIMARY KEY,
+                signature TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                task TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (task, fingerprint)
+            )
+        """)
+
+        row = self._conn.execute("SELECT signature FROM runs WHERE task = ?", (task_name,)).fetchone()
+        self.discarded = 0
+        if row is not None and row[0] != signature:
+            self.discarded = self._conn.execute(
+                "DELETE FROM entries WHERE task = ?", (task_name,)
+            ).rowcount
+        self._conn.execute("INSERT OR REPLACE INTO runs (task, signature) VALUES (?, ?)", (task_name, signature))
+        self._conn.commit()
+
+        self.recorded = self._conn.execute(
+            "SELECT COUNT(*) FROM entries WHERE task = ?", (task_name,)
+        ).fetchone()[0]
+        self.resumed = 0
+
+    @classmethod
+    def for_task(cls, task, path=None):
+        """
+        分析タスクのチェックポイントを開く
+
+        Args:
+            task: AnalysisTask
+            path: SQLiteファイルのパス（Noneなら ANALYSIS_JOURNAL_PATH または DEFAULT_JOURNAL_PATH）
+
+        Returns:
+            RunJournal: チェックポイント
+        """
+        return cls(
+            task.name,
+            prompt_signature(task.prompts),
+            path=path or os.getenv("ANALYSIS_JOURNAL_PATH", DEFAULT_JOURNAL_PATH)
+        )
+
+    def get(self, fingerprint):
+        """
+        記録済みの分析結果を取得
+
+        Args:
+            fingerprint: 行の指紋
+
+        Returns:
+            dict: 分析結果（記録がなければNone）
+        """
+        row = self._conn.execute(
+            "SELECT result FROM entries WHERE task = ? AND fingerprint = ?", (self.task_name, fingerprint)
+        ).fetchone()
+        if row is None:
+            return None
+        self.resumed += 1
+        return json.loads(row[0])
+
+    def record(self, fingerprint, result):
+        """
+        成功した行の分析結果を記録
+
+        Args:
+            fingerprint: 行の指紋
+            result: 分析結果（JSONに変換可能なdict）
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (task, fingerprint, result) VALUES (?, ?, ?)",
+            (self.task_name, fingerprint, json.dumps(result, ensure_ascii=False))
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        """記録をディスクに書き出す"""
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def clear(self):
+        """このタスクの記録を削除（全行が成功して実行が完了したとき・最初から実行し直すとき）"""
+        self._conn.execute("DELETE FROM entries WHERE task = ?", (self.task_name,))
+        self.commit()
+        self.recorded = 0
+
+    def print_stats(self):
+        """記録の利用状況を表示（前回の記録がなければ何も表示しない）"""
+        if self.discarded:
+            print(f"チェックポイント: プロンプトが変更されたため前回の記録 {self.discarded}件を破棄しました")
+        if self.recorded:
+            print(f"チェックポイント: 前回の記録 {self.recorded}件のうち {self.resumed}件を再利用")
+
+    def close(self):
+        """コミットして接続を閉じる"""
+        self.commit()
+        self._conn.close()
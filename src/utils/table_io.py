@@ -0,0 +1,306 @@
+import os
+import csv
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from src.utils.timestamp_parser import TimestampParser
+
+# 中間データの形式（csv: CSVのみ、parquet: Parquetを正としてCSVも併せて出力）
+DATA_FORMATS = ("csv", "parquet")
+DEFAULT_DATA_FORMAT = os.getenv("DATA_FORMAT", "csv")
+
+# Parquetに書き出すときの1行グループの行数
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+# Parquetの日時列をCSV・dictに戻すときの書式
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+# 日時列の元の文字列を保存する列名の接尾辞
+# （DATETIME_FORMAT に戻すと元と変わる値（日付だけ・解析できない値など）だけを入れ、それ以外はnull）
+DATETIME_TEXT_SUFFIX = "__text"
+
+# 列の型 → Arrowの型（text: 文字列、datetime: 日時（Parquetの最小単位のミリ秒）、label: 0/1のint8）
+ARROW_TYPES = {
+    "text": pa.string(),
+    "datetime": pa.timestamp("ms"),
+    "label": pa.int8(),
+}
+
+# 元データ・クレンジング済みデータの列の型
+RECORD_COLUMN_TYPES = {"更新日時": "datetime", "法人名": "text", "活動内容": "text"}
+EXCLUDED_COLUMN_TYPES = {**RECORD_COLUMN_TYPES, "除外理由": "text"}
+
+
+def parquet_path(csv_path):
+    """
+    CSVファイルパスに対応するParquetファイルパス
+
+    Args:
+        csv_path: CSVファイルパス
+
+    Returns:
+        str: 拡張子を .parquet にしたパス
+    """
+    root, _ = os.path.splitext(csv_path)
+    return root + ".parquet"
+
+
+def is_parquet(path):
+    """Parquetファイルのパスかどうか"""
+    return path.endswith(".parquet")
+
+
+def resolve_input_path(csv_path, data_format):
+    """
+    読み込む入力ファイルを決める（parquet 指定時にParquetがあればParquetを使う）
+
+    CSVの方が新しい場合（csv 形式で実行し直した・CSVを手で修正したなど）は、古いParquetではなくCSVを使う。
+    Parquetは常にCSVの後に書き出すため、同じ実行で出力した組ではParquetの方が新しい。
+
+    Args:
+        csv_path: CSVファイルパス
+        data_format: "csv" または "parquet"
+
+    Returns:
+        str: 読み込むファイルのパス
+    """
+    path = parquet_path(csv_path)
+    if data_format != "parquet" or not os.path.exists(path):
+        return csv_path
+    if os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(path):
+        print(f"⚠ {csv_path} が {path} より新しいため、CSVを読み込みます")
+        return csv_path
+    return path
+
+
+def datetime_text_column(column):
+    """日時列の元の文字列を保存する列名"""
+    return column + DATETIME_TEXT_SUFFIX
+
+
+def is_datetime_text_column(column):
+    """日時列の元の文字列を保存する列かどうか"""
+    return column.endswith(DATETIME_TEXT_SUFFIX)
+
+
+def build_schema(column_types):
+    """
+    列の型からArrowのスキーマを作る
+
+    日時列には元の文字列を保存する文字列の列（datetime_text_column）を続けて追加する。
+
+    Args:
+        column_types: 列名 → 型（"text" / "datetime" / "label"）の辞書（列順）
+
+    Returns:
+        pyarrow.Schema: スキーマ
+    """
+    fields = []
+    for column, column_type in column_types.items():
+        fields.append((column, ARROW_TYPES[column_type]))
+        if column_type == "datetime":
+            fields.append((datetime_text_column(column), pa.string()))
+    return pa.schema(fields)
+
+
+def to_label(value):
+    """
+    ラベルの値を0/1に変換（1・True・"1" 以外は0）
+
+    Args:
+        value: 回答の値
+
+    Returns:
+        int: 0 または 1
+    """
+    return 1 if value in (1, True, "1") else 0
+
+
+class ParquetRecordWriter:
+    """
+    dictのレコードを型付きのParquetファイルに逐次書き込むクラス
+
+    row_group_size 行ごとに列ごとの配列に変換して1つの行グループとして書き出すため、
+    メモリに保持するのは1行グループ分だけ。日時列は TimestampParser で変換する
+    （解析できない値はnullになり、report で確認できる）。DATETIME_FORMAT に戻すと元と変わる値は
+    元の文字列も保存し、iter_records でCSVと同じ値に戻せるようにする。
+    """
+
+    def __init__(self, path, column_types, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        """
+        Args:
+            path: 出力Parquetファイルパス
+            column_types: 列名 → 型の辞書（列順）
+            row_group_size: 1行グループの行数
+        """
+        self.path = path
+        self.column_types = dict(column_types)
+        self.schema = build_schema(self.column_types)
+        self.row_group_size = row_group_size
+        self.timestamps = TimestampParser()
+        self.count = 0
+        self._columns = {column: [] for column in self.schema.names}
+        self._buffered = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, record):
+        """
+        1行を書き込む
+
+        Args:
+            record: レコード（dict）
+        """
+        for column, column_type in self.column_types.items():
+            value = record.get(column)
+            if column_type == "datetime":
+                text = value or ""
+                value = self.timestamps.parse(text)
+                formatted = value.strftime(DATETIME_FORMAT) if value is not None else ""
+                self._columns[datetime_text_column(column)].append(text if text != formatted else None)
+            elif column_type == "label":
+                value = to_label(value)
+            elif value is None:
+                value = ""
+            self._columns[column].append(value)
+
+        self._buffered += 1
+        self.count += 1
+        if self._buffered >= self.row_group_size:
+            self.flush()
+
+    def write_all(self, records):
+        """
+        複数行を書き込む
+
+        Args:
+            records: レコード（dict）のイテラブル
+        """
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """バッファの行を1つの行グループとして書き出す"""
+        if not self._buffered:
+            return
+        table = pa.Table.from_pydict(self._columns, schema=self.schema)
+        self._writer.write_table(table)
+        self._columns = {column: [] for column in self.schema.names}
+        self._buffered = 0
+
+    def close(self):
+        """残りの行を書き出してファイルを閉じる"""
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_records(path, columns=None, batch_size=DEFAULT_ROW_GROUP_SIZE):
+    """
+    CSVまたはParquetのレコードを1行ずつ読み込む
+
+    Parquetの日時列は DATETIME_FORMAT の文字列（nullは空文字）に戻し、元の文字列が保存されている値は
+    元の文字列を使って、CSVから読んだ場合と同じdictにする。
+
+    Args:
+        path: 入力ファイルパス（拡張子で形式を判定）
+        columns: 読み込む列（Parquetのみ。Noneなら全列）
+        batch_size: Parquetから一度に読み込む行数
+
+    Yields:
+        dict: レコード
+    """
+    if not is_parquet(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+        return
+
+    parquet_file = pq.ParquetFile(path)
+    names = parquet_file.schema_arrow.names
+    if columns is not None:
+        columns = list(columns) + [
+            datetime_text_column(column) for column in columns if datetime_text_column(column) in names
+        ]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        for column, field in zip(batch.schema.names, batch.schema):
+            if pa.types.is_timestamp(field.type):
+                text_column = datetime_text_column(column)
+                texts = (
+                    batch.column(text_column).to_pylist() if text_column in batch.schema.names
+                    else [None] * batch.num_rows
+                )
+                formatted = [
+                    text if text is not None else value.strftime(DATETIME_FORMAT) if value is not None else ""
+                    for value, text in zip(batch.column(column).to_pylist(), texts)
+                ]
+                batch = batch.set_column(batch.schema.get_field_index(column), column, pa.array(formatted))
+        batch = batch.drop_columns([name for name in batch.schema.names if is_datetime_text_column(name)])
+        yield from batch.to_pylist()
+
+
+def count_records(path):
+    """
+    CSVまたはParquetの行数を数える（Parquetはメタデータから取得）
+
+    Args:
+        path: 入力ファイルパス
+
+    Returns:
+        int: ヘッダーを除いた行数
+    """
+    if is_parquet(path):
+        return pq.ParquetFile(path).metadata.num_rows
+    with open(path, 'r', encoding='utf-8') as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+def read_columns(path, columns):
+    """
+    指定した列だけをArrowのテーブルとして読み込む（活動内容などの大きな列は読まない）
+
+    Parquetは指定した列のデータだけを読み込む。CSVの場合も指定した列だけを変換する
+（法人名などの文字列の列は数字だけの値も文字列のまま読み込む）。
+
+    Args:
+        path: 入力ファイルパス（CSVまたはParquet）
+        columns: 読み込む列のリスト
+
+    Returns:
+        pyarrow.Table: テーブル
+    """
+    if is_parquet(path):
+        return pq.read_table(path, columns=columns)
+    return pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(encoding="utf-8"),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={column: pa.string() for column in columns if RECORD_COLUMN_TYPES.get(column) == "text"}
+        )
+    )
+
+
+def convert_csv_to_parquet(csv_path, column_types, output_path=None):
+    """
+    CSVファイルを型付きのParquetファイルに変換
+
+    Args:
+        csv_path: 入力CSVファイルパス
+        column_types: 列名 → 型の辞書（列順）
+        output_path: 出力Parquetファイルパス（Noneなら拡張子を .parquet にしたパス）
+
+    Returns:
+        ParquetRecordWriter: 書き込みに使ったライター（件数・解析できない日時の確認用）
+    """
+    with ParquetRecordWriter(output_path or parquet_path(csv_path), column_types) as writer:
+        writer.write_all(iter_records(csv_path))
+    return writer
+
@@ -0,0 +1,149 @@
+from collections import Counter
+from datetime import datetime
+import numpy as np
+
+# 受け付ける日時の書式（先頭から順に試す）
+TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+
+def parse_timestamp(value):
+    """
+    日時文字列をdatetimeに変換（解析できない場合はNone）
+
+    "YYYY-MM-DD HH:MM" / "YYYY-MM-DD" の固定幅の文字列はスライスで直接変換し、
+    それ以外（桁数の違う日付など）は TIMESTAMP_FORMATS の strptime で解析する。
+
+    Args:
+        value: 日時文字列
+
+    Returns:
+        datetime: datetimeオブジェクト（解析できない場合はNone）
+    """
+    if not value:
+        return None
+
+    length = len(value)
+    try:
+        if length == 16 and value[4] == '-' and value[7] == '-' and value[10] == ' ' and value[13] == ':' \
+                and value.isascii():
+            digits = value[0:4] + value[5:7] + value[8:10] + value[11:13] + value[14:16]
+            if digits.isdigit():
+                return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                int(value[11:13]), int(value[14:16]))
+        elif length == 10 and value[4] == '-' and value[7] == '-' and value.isascii():
+            digits = value[0:4] + value[5:7] + value[8:10]
+            if digits.isdigit():
+                return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+    except ValueError:
+        # 存在しない日付など（strptime でも解析できないので下で None になる）
+        pass
+
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class TimestampParser:
+    """
+    更新日時の列を一括で解析するクラス
+
+    同じ文字列の解析結果はキャッシュし、解析できなかった値は件数とともに記録する。
+    """
+
+    def __init__(self):
+        self.cache = {}
+        self.unparseable = Counter()
+
+    def parse(self, value):
+        """
+        日時文字列をdatetimeに変換
+
+        Args:
+            value: 日時文字列
+
+        Returns:
+            datetime: datetimeオブジェクト（解析できない場合はNone）
+        """
+        try:
+            parsed = self.cache[value]
+        except KeyError:
+            parsed = self.cache[value] = parse_timestamp(value)
+
+        if parsed is None:
+            self.unparseable[value] += 1
+        return parsed
+
+    def parse_many(self, values):
+        """
+        日時文字列のリストをまとめて変換
+
+        Args:
+            values: 日時文字列のリスト
+
+        Returns:
+            list: datetime（解析できない要素はNone）のリスト
+        """
+        return [self.parse(value) for value in values]
+
+    def to_datetime64(self, values, unit="m"):
+        """
+        日時文字列のリストをNumPyのdatetime64配列に変換（重複する文字列は1回だけ解析）
+
+        Args:
+            values: 日時文字列のリスト
+            unit: datetime64の単位（デフォルト: 分）
+
+        Returns:
+            numpy.ndarray: datetime64配列（解析できない要素はNaT）
+        """
+        values = np.asarray(values, dtype=object)
+        if not len(values):
+            return np.array([], dtype=f"datetime64[{unit}]")
+
+        uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+        parsed = np.array(
+            [np.datetime64(dt, unit) if dt else np.datetime64("NaT", unit) for dt in map(self._parse_quiet, uniques)],
+            dtype=f"datetime64[{unit}]"
+        )
+
+        counts = np.bincount(inverse, minlength=len(uniques))
+        for i in np.flatnonzero(np.isnat(parsed)):
+            self.unparseable[str(uniques[i])] += int(counts[i])
+
+        return parsed[inverse]
+
+    def _parse_quiet(self, value):
+        """キャッシュを使って解析（解析できない値の件数は呼び出し元で数える）"""
+        if value not in self.cache:
+            self.cache[value] = parse_timestamp(value)
+        return self.cache[value]
+
+    def report(self):
+        """
+        解析できなかった値の一覧を取得
+
+        Returns:
+            dict: 値 → 件数（件数の多い順）
+        """
+        return dict(self.unparseable.most_common())
+
+    def print_report(self, limit=10, note="最も古い日時として扱います"):
+        """
+        解析できなかった値を表示（なければ何も表示しない）
+
+        Args:
+            limit: 表示する値の種類の上限
+            note: 解析できなかった値の扱いの説明
+        """
+        if not self.unparseable:
+            return
+
+        total = sum(self.unparseable.values())
+        print(f"⚠ 日時を解析できない値: {total}件（{len(self.unparseable)}種類、{note}）")
+        for value, count in self.unparseable.most_common(limit):
+            print(f"  {value!r}: {count}件")
+        if len(self.unparseable) > limit:
+            print(f"  ...ほか{len(self.unparseable) - limit}種類")
@@ -0,0 +1,44 @@
+import os
+import sys
+import pytest
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    一時ディレクトリを作業ディレクトリにする（data/ や results/ の相対パスはここに作られる）
+
+    APIキーは外し、APIを呼ぶ処理が紛れ込んだら失敗するようにする。
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    return tmp_path
+
+
+def write_csv(path, rows, fieldnames=("更新日時", "法人名", "活動内容")):
+    """
+    テスト用のCSVを書き込む
+
+    Args:
+        path: ファイルパス
+        rows: 行（dict）のリスト
+        fieldnames: 列
+    """
+    import csv
+    directory = os.path.dirname(str(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(fieldnames))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_csv(path):
+    """CSVを行（dict）のリストとして読み込む"""
+    import csv
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
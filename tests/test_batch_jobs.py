@@ -0,0 +1,51 @@
+import sys
+from src.utils.analysis_runner import run_cli
+from src.utils.analysis_tasks import HR_UNIFIED_TASK, CHALLENGE_CLASSIFICATION_TASK
+from src.utils.batch_jobs import BatchJobRunner, LocalBatchBackend
+from src.prompts.analysis_prompts import HR_APPEAL_LABELS, CHALLENGE_LABELS
+from tests.conftest import write_csv, read_csv
+
+ROWS = [
+    {"更新日時": "2024-01-01 10:00", "法人名": "A社", "活動内容": "シフトの欠員が多く、前払いに興味がある"},
+    {"更新日時": "2024-01-02 10:00", "法人名": "B社", "活動内容": "離職率が高い。福利厚生として検討"},
+    {"更新日時": "2024-01-03 10:00", "法人名": "C社", "活動内容": "シフトの欠員が多く、前払いに興味がある"},
+]
+
+
+def test_mock_response_follows_nested_schema():
+    answer = HR_UNIFIED_TASK.mock_response()
+
+    assert set(answer) == {"訴求ポイント", "課題"}
+    assert answer["訴求ポイント"] == {label: 0 for label in HR_APPEAL_LABELS}
+    assert answer["課題"] == {label: 0 for label in CHALLENGE_LABELS}
+    assert HR_UNIFIED_TASK.is_complete(answer)
+
+
+def test_local_backend_runs_unified_task_offline(workdir, monkeypatch, capsys):
+    write_csv("data/cleaned/人事_cleaned.csv", ROWS)
+    monkeypatch.setattr(sys, "argv", ["3_analyze_logs_hr_unified.py", "--batch-api", "--batch-backend", "local"])
+
+    run_cli(HR_UNIFIED_TASK)
+
+    out = capsys.readouterr().out
+    assert "エラーのためデフォルト値で出力" not in out
+    assert "APIリクエスト" not in out
+    for path, labels in (("results/analysis_results_hr.csv", HR_APPEAL_LABELS),
+                         ("results/challenge_classification.csv", CHALLENGE_LABELS)):
+        rows = read_csv(path)
+        assert [row["法人名"] for row in rows] == ["A社", "B社", "C社"]
+        assert all(row[label] == "0" for row in rows for label in labels)
+    assert (workdir / "data/batch/analysis_hr_unified_requests.jsonl").exists()
+
+
+def test_local_backend_answers_in_input_order(workdir):
+    labels = CHALLENGE_CLASSIFICATION_TASK.outputs[0].labels
+
+    def responder(body):
+        content = body["messages"][-1]["content"]
+        return {label: int(label == "シフトの欠員" and "シフト" in content.split("商談ログ:")[-1]) for label in labels}
+
+    runner = BatchJobRunner(LocalBatchBackend(root="local", responder=responder), work_dir="batch", use_cache=False)
+    results = runner.run("challenge", CHALLENGE_CLASSIFICATION_TASK.prompts, [row["活動内容"] for row in ROWS])
+
+    assert [result["シフトの欠員"] for result in results] == [1, 0, 1]
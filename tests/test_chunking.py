@@ -0,0 +1,44 @@
+from src.utils.analysis_runner import AnalysisRunner
+from src.utils.analysis_tasks import HR_UNIFIED_TASK
+from src.utils.chunking import HISTORY_SEPARATOR, ChunkPlan, HistoryChunker, or_reduce
+
+
+class CharCounter:
+    """1文字を1トークンとして数える"""
+
+    def count(self, text):
+        return len(text)
+
+
+def test_or_reduce_merges_nested_labels():
+    results = [
+        {"訴求ポイント": {"給与": 0, "休日": 1}, "課題": {"採用": 0}, "メモ": "最初"},
+        {"訴求ポイント": {"給与": 1, "休日": 0}, "課題": {"採用": 0}, "メモ": "次"},
+    ]
+    assert or_reduce(results) == {"訴求ポイント": {"給与": 1, "休日": 1}, "課題": {"採用": 0}, "メモ": "最初"}
+
+
+def test_chunker_splits_on_log_separator_within_budget():
+    chunker = HistoryChunker(max_tokens=20, counter=CharCounter())
+    entries = ["[2024-01-01]\n" + "a" * 5, "[2024-01-02]\n" + "b" * 5, "[2024-01-03]\n" + "c" * 5]
+    plan = chunker.plan(["短い", HISTORY_SEPARATOR.join(entries)])
+
+    assert plan.contents[0] == "短い"
+    assert plan.contents[1:] == entries
+    assert plan.chunk_counts() == [1, 3]
+    assert all(len(chunk) <= 20 for chunk in plan.contents)
+
+
+def test_reduce_chunks_treats_failed_chunks_as_defaults(workdir):
+    runner = AnalysisRunner(HR_UNIFIED_TASK)
+    plan = ChunkPlan(["a", "b1", "b2", "c"], [0, 1, 1, 2], 3)
+    answer = HR_UNIFIED_TASK.mock_response()
+    hit = HR_UNIFIED_TASK.mock_response()
+    labels = next(iter(hit.values()))
+    labels[next(iter(labels))] = 1
+
+    outcomes = runner._reduce_chunks(plan, [answer, None, hit, None])
+
+    assert outcomes[0] == (answer, True)
+    assert outcomes[1] == (hit, False)
+    assert outcomes[2] == (HR_UNIFIED_TASK.default_response(), False)
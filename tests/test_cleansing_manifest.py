@@ -0,0 +1,67 @@
+import importlib.util
+import os
+
+from src.utils.cleansing_manifest import CleansingManifest, fingerprint_record, group_signature
+from src.utils.content_validator import VALIDATION_ERROR_REASON
+from src.utils.data_cleaner import merge_duplicate_corporations
+
+from tests.conftest import read_csv, write_csv
+
+spec = importlib.util.spec_from_file_location(
+    "cleanse_data", os.path.join(os.path.dirname(__file__), "..", "scripts", "2_cleanse_data.py")
+)
+cleanse_data = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(cleanse_data)
+
+RECORDS = [
+    {"更新日時": "2024-01-01 10:00", "法人名": "A社", "活動内容": "訪問"},
+    {"更新日時": "2024-01-01 10:00", "法人名": "A社", "活動内容": "電話"},
+    {"更新日時": "2024-01-02 10:00", "法人名": "B社", "活動内容": "メール"},
+]
+
+
+def test_group_signature_depends_on_input_order():
+    fingerprints = [fingerprint_record(record) for record in RECORDS[:2]]
+    assert group_signature(fingerprints) != group_signature(fingerprints[::-1])
+
+
+def test_incremental_merge_matches_full_merge_after_reordering(workdir):
+    manifest = CleansingManifest("manifest.json")
+    for records in (RECORDS, [RECORDS[1], RECORDS[0], RECORDS[2]]):
+        write_csv("valid.csv", records)
+        merge_duplicate_corporations("valid.csv", "full.csv")
+        cleanse_data.merge_incrementally(records, "incremental.csv", manifest)
+        assert read_csv("incremental.csv") == read_csv("full.csv")
+
+
+class ScriptedValidator:
+    """実行ごとに決めた判定結果を返し、検証した活動内容を記録するバリデーター"""
+
+    def __init__(self, verdicts):
+        self.verdicts = verdicts
+        self.validated = []
+
+    def validate_records(self, records, show_progress=True, micro_batch=False):
+        self.validated.append([record["活動内容"] for record in records])
+        return [dict(self.verdicts[record["活動内容"]]) for record in records]
+
+
+def test_error_verdict_is_retried_on_next_run(workdir):
+    manifest = CleansingManifest("manifest.json")
+    first = ScriptedValidator({
+        "訪問": {"is_valid": True, "reason": VALIDATION_ERROR_REASON},
+        "電話": {"is_valid": False},
+        "メール": {"is_valid": True, "reason": "商談の記録"},
+    })
+    valid, excluded = cleanse_data.validate_incrementally(first, [dict(r) for r in RECORDS], manifest)
+    assert [r["活動内容"] for r in valid] == ["訪問", "メール"]
+    assert [(r["活動内容"], r["除外理由"]) for r in excluded] == [("電話", "")]
+    manifest.save()
+
+    manifest = CleansingManifest("manifest.json")
+    second = ScriptedValidator({"訪問": {"is_valid": False, "reason": "メールのみ"}})
+    valid, excluded = cleanse_data.validate_incrementally(second, [dict(r) for r in RECORDS], manifest)
+    # エラーで仮判定した行だけを検証し直す（理由のない判定は理由を空で記録済み）
+    assert second.validated == [["訪問"]]
+    assert [r["活動内容"] for r in valid] == ["メール"]
+    assert [(r["活動内容"], r["除外理由"]) for r in excluded] == [("訪問", "メールのみ"), ("電話", "")]
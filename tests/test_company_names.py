@@ -0,0 +1,54 @@
+import csv
+
+from src.utils.company_names import CompanyNameResolver, edited_characters, normalize_company_name
+
+
+def test_normalize_strips_legal_form_and_width():
+    assert normalize_company_name("株式会社ｴｯｸｽ") == normalize_company_name("(株)エックス")
+    assert normalize_company_name("Acme Co., Ltd.") == "acme"
+
+
+def test_english_designator_needs_word_boundary():
+    assert normalize_company_name("Acme Inc.") == "acme"
+    assert normalize_company_name("Acme Corp") == "acme"
+    assert normalize_company_name("アクメ Co.,Ltd.") == "アクメ"
+    assert normalize_company_name("アクメInc") == "アクメ"
+    # 名前の末尾が法人格と同じ綴りでも、英字の途中なら除去しない
+    assert normalize_company_name("Zinc") == "zinc"
+    assert normalize_company_name("Hamcorp") == "hamcorp"
+
+
+def test_edited_characters():
+    assert edited_characters("ヤマダショウジ", "ヤマタショウジ") == "ダタ"
+    assert edited_characters("ヤマダショウジ", "ヤマダショウジー") == "ー"
+    assert edited_characters("ヤマダショウジ", "ヤマダショウジ") == ""
+    assert edited_characters("ヤマダショウジ", "ヤメタショウジ") is None
+
+
+def test_kanji_substitution_needs_shared_timestamp():
+    names = ["東京第一物産", "東京第一物産", "東京第二物産"]
+
+    resolver = CompanyNameResolver()
+    mapping = resolver.resolve(names, ["2024-01-01 10:00", "2024-01-02 10:00", "2024-02-01 10:00"])
+    assert mapping["東京第二物産"] == "東京第二物産"
+    assert resolver.fuzzy_pairs == []
+
+    mapping = resolver.resolve(names, ["2024-01-01 10:00", "2024-01-02 10:00", "2024-01-02 10:00"])
+    assert mapping["東京第二物産"] == "東京第一物産"
+    assert resolver.fuzzy_pairs == [("東京第二物産", "東京第一物産", "同じ日時のログ")]
+
+
+def test_spelling_variant_is_merged_and_exported(tmp_path):
+    resolver = CompanyNameResolver()
+    mapping = resolver.resolve(["アクメシステムズ株式会社", "アクメシステムズ株式会社", "アクメシステム株式会社"])
+
+    assert mapping["アクメシステム株式会社"] == "アクメシステムズ株式会社"
+    assert resolver.stats["entities"] == 1
+
+    path = tmp_path / "fuzzy.csv"
+    resolver.export_fuzzy_pairs(str(path))
+    with open(path, encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [
+            ["法人名", "まとめた先の法人名", "根拠"],
+            ["アクメシステム株式会社", "アクメシステムズ株式会社", "綴りの揺れ"],
+        ]
@@ -0,0 +1,42 @@
+import threading
+import time
+
+from src.utils import content_validator
+from src.utils.content_validator import ContentValidator
+
+RECORDS = [
+    {"法人名": f"{i}社", "活動内容": f"商談ログ{i}: 採用課題についてヒアリングした"}
+    for i in range(8)
+]
+
+
+class OutOfOrderClient:
+    """後ろのログほど早く回答し、偶数番目のログを有効と判定するクライアント（スレッドから呼ばれる）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = []
+        self.completed = []
+
+    def analyze_with_prompt(self, system_prompt, user_prompt, **kwargs):
+        index = next(i for i, record in enumerate(RECORDS) if record["活動内容"] in user_prompt)
+        with self.lock:
+            self.calls.append(index)
+        time.sleep(0.02 * (len(RECORDS) - index))
+        with self.lock:
+            self.completed.append(index)
+        return {"is_valid": index % 2 == 0, "reason": f"理由{index}"}
+
+
+def test_validate_batch_keeps_input_order_with_one_call_per_record(monkeypatch):
+    monkeypatch.setattr(content_validator, "OpenAIClient", OutOfOrderClient)
+    validator = ContentValidator(max_workers=len(RECORDS))
+
+    valid, excluded = validator.validate_batch([dict(record) for record in RECORDS], show_progress=False)
+
+    client = validator.client
+    assert client.completed != sorted(client.completed)
+    assert sorted(client.calls) == list(range(len(RECORDS)))
+    assert [record["法人名"] for record in valid] == ["0社", "2社", "4社", "6社"]
+    assert [record["法人名"] for record in excluded] == ["1社", "3社", "5社", "7社"]
+    assert [record["除外理由"] for record in excluded] == ["理由1", "理由3", "理由5", "理由7"]
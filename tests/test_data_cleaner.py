@@ -0,0 +1,49 @@
+import random
+
+from src.utils.data_cleaner import SortedRunMerger, merge_duplicate_corporations
+
+from tests.conftest import read_csv, write_csv
+
+
+def test_sorted_run_merger_spills_and_merges_in_key_order(tmp_path):
+    rng = random.Random(0)
+    rows = [(rng.randrange(50), rng.randrange(-1000, 1000), i, f"値{i}") for i in range(500)]
+
+    merger = SortedRunMerger(3, str(tmp_path), max_buffer_bytes=100)
+    for row in rows:
+        merger.add(row, 10)
+
+    assert len(merger.run_paths) > 1
+    assert list(merger) == sorted(rows)
+
+
+def test_sorted_run_merger_without_spill_keeps_rows_in_memory(tmp_path):
+    merger = SortedRunMerger(1, str(tmp_path))
+    for row in [(3, "c"), (1, "a"), (2, "b")]:
+        merger.add(row, 1)
+
+    assert merger.run_paths == []
+    assert list(merger) == [(1, "a"), (2, "b"), (3, "c")]
+
+
+def test_merge_output_does_not_depend_on_buffer_size(tmp_path):
+    rng = random.Random(1)
+    rows = [
+        {
+            "更新日時": f"2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} {rng.randrange(24):02d}:00",
+            "法人名": f"{rng.randrange(30)}社",
+            "活動内容": f"ログ{i}"
+        }
+        for i in range(300)
+    ]
+    rows.append({"更新日時": "不明", "法人名": "0社", "活動内容": "日時なし"})
+    write_csv(tmp_path / "valid.csv", rows)
+
+    merge_duplicate_corporations(str(tmp_path / "valid.csv"), str(tmp_path / "memory.csv"))
+    merge_duplicate_corporations(str(tmp_path / "valid.csv"), str(tmp_path / "spilled.csv"), max_buffer_bytes=500)
+
+    merged = read_csv(tmp_path / "memory.csv")
+    assert read_csv(tmp_path / "spilled.csv") == merged
+    assert len(merged) == len({row["法人名"] for row in rows})
+    # 更新日時の新しい順
+    assert [row["更新日時"] for row in merged] == sorted((row["更新日時"] for row in merged), reverse=True)
@@ -0,0 +1,42 @@
+from src.utils.dedup import DuplicateIndex, NearDuplicateDetector
+
+BASE = "本日は採用担当の方と面談し、アルバイトの応募が減っている件について今後の求人媒体の使い方を相談した。"
+
+
+def test_groups_exact_and_near_duplicates():
+    texts = [
+        BASE,
+        "  " + BASE + "\n",                         # 空白だけの違い（完全一致）
+        BASE.replace("相談した。", "相談しました。"),  # 近似重複
+        "来週の訪問日程を調整する電話をした。",
+        "短い",
+    ]
+    groups = NearDuplicateDetector().group(texts)
+
+    assert groups.assignments == [0, 0, 0, 1, 2]
+    assert groups.representatives == [0, 3, 4]
+    assert groups.near_duplicates == 1
+    assert groups.expand(["a", "b", "c"]) == ["a", "a", "a", "b", "c"]
+    assert groups.select(texts) == [texts[0], texts[3], texts[4]]
+
+
+def test_dissimilar_texts_stay_separate():
+    detector = NearDuplicateDetector()
+    texts = [BASE, "先月導入した研修制度の効果測定について、人事部長に報告資料を説明した。"]
+    assert detector.group(texts).assignments == [0, 1]
+
+
+def test_signature_similarity_tracks_jaccard():
+    detector = NearDuplicateDetector(num_perm=256, bands=32)
+    a = detector.signature(BASE)
+    b = detector.signature(BASE[:-10] + "全く別の文章を付け足した")
+    assert (a == a).mean() == 1.0
+    assert 0.3 < (a == b).mean() < 0.95
+    assert detector.signature("abc") is None
+
+
+def test_index_matches_batch_grouping():
+    texts = [BASE, BASE.replace("相談した。", "相談しました。"), "別の内容のログです。", BASE]
+    index = DuplicateIndex()
+    assert [index.add(text) for text in texts] == [(0, True), (0, False), (1, True), (0, False)]
+    assert NearDuplicateDetector().group(texts).assignments == [0, 0, 1, 0]
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from src.utils import embedding_index
+from src.utils.embedding_index import EmbeddingIndex
+from src.utils.embeddings import HashingEmbedder, normalize_rows
+
+WORDS = ["採用", "研修", "評価", "離職", "給与", "面接", "育成", "制度", "シフト", "欠員", "福利厚生", "前払い"]
+
+
+def make_records(start, count):
+    rng = np.random.default_rng(start)
+    return [
+        {
+            "更新日時": f"2024-01-01 {i % 24:02d}:00",
+            "法人名": f"{i}社",
+            "活動内容": f"ログ{i} " + "と".join(rng.choice(WORDS, size=6)),
+        }
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def small_ivf(monkeypatch):
+    # 小さなデータでもIVFを学習させる
+    monkeypatch.setattr(embedding_index, "IVF_MIN_ROWS", 200)
+    monkeypatch.setattr(embedding_index, "IVF_MIN_TRAIN_PER_LIST", 10)
+
+
+def exact_search(index, query, k):
+    query = normalize_rows(query)
+    scores = np.asarray(index.vectors) @ query
+    scores[index.inactive] = -np.inf
+    return [int(i) for i in np.argsort(-scores, kind="stable")[:k]]
+
+
+def test_ivf_search_with_all_lists_matches_exact_search(tmp_path, small_ivf):
+    embedder = HashingEmbedder(dim=64)
+    index = EmbeddingIndex.open(str(tmp_path / "index"), embedder)
+    records = make_records(0, 300)
+    stats = index.update("人事", records, embedder)
+
+    assert stats["added"] == 300
+    assert index.ivf is not None
+    nlist = len(index.ivf.centroids)
+    for record in records[:20]:
+        query = embedder.embed([record["活動内容"]])[0]
+        found = [row for row, _ in index.search(query, k=5, nprobe=nlist)]
+        assert found == exact_search(index, query, 5)
+        # 絞り込んだ検索でも自分自身は最上位に来る
+        assert index.search(query, k=1, nprobe=2)[0][0] == records.index(record)
+    index.close()
+
+
+def test_incremental_update_assigns_new_rows_and_drops_removed(tmp_path, small_ivf):
+    embedder = HashingEmbedder(dim=64)
+    directory = str(tmp_path / "index")
+    index = EmbeddingIndex.open(directory, embedder)
+    records = make_records(0, 300)
+    index.update("人事", records, embedder)
+    centroids = index.ivf.centroids.copy()
+
+    # 20件を削除し、30件を追加（学習時の2倍以下なのでIVFは学び直さない）
+    updated = records[20:] + make_records(300, 30) + [{**records[25], "法人名": "別名"}]
+    stats = index.update("人事", updated, embedder)
+
+    assert stats == {"added": 31, "embedded": 30, "reused": 1, "deactivated": 20}
+    assert len(index.ivf.assignments) == len(index) == 331
+    assert np.array_equal(index.ivf.centroids, centroids)
+
+    nlist = len(index.ivf.centroids)
+    removed = embedder.embed([records[3]["活動内容"]])[0]
+    assert 3 not in [row for row, _ in index.search(removed, k=10, nprobe=nlist)]
+    added = make_records(300, 30)[7]
+    query = embedder.embed([added["活動内容"]])[0]
+    top_row, score = index.search(query, k=1, nprobe=nlist)[0]
+    assert index.row(top_row)["活動内容"] == added["活動内容"]
+    assert score == pytest.approx(1.0, abs=1e-5)
+    index.close()
+
+    # 開き直しても同じ検索結果になる
+    reopened = EmbeddingIndex.open(directory, embedder)
+    assert [row for row, _ in reopened.search(query, k=5, nprobe=nlist)] == exact_search(reopened, query, 5)
+    assert reopened.inactive.sum() == 20
+    reopened.close()
+
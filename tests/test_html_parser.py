@@ -0,0 +1,58 @@
+import pytest
+
+from src.utils.html_parser import extract_records_from_html, stream_records_from_html
+
+
+def row(corp, when, content, extra_cell=""):
+    return f"""
+<tr class="recordlist-row-gaia">
+  <td class="recordlist-cell-gaia value-6446950"><div>{corp}</div></td>
+  <td class="recordlist-cell-gaia value-6446951"><span>{when}</span></td>
+  {extra_cell}
+  <td class="recordlist-cell-gaia value-6446959"><div>{content}</div></td>
+</tr>"""
+
+
+NESTED_CONTENT = "前半<table><tr><td>表のセル</td></tr><tr><td>2行目</td></tr></table>後半"
+
+PAGES = {
+    "multi_row": [
+        row("A社", "2024-01-01 10:00", "訪問<br>ヒアリング"),
+        row("B社", "2024-01-02 11:00", "電話 <b>提案</b> 送付"),
+        row("C社", "", "日時なし"),
+        row("D社", "2024-01-04 09:00", "<!-- メモ -->コメント<!-- 区切り -->あり"),
+    ],
+    "nested_table": [
+        row("A社", "2024-01-01 10:00", NESTED_CONTENT),
+        row("B社", "2024-01-02 11:00", "続き"),
+    ],
+    "nested_table_outside_fields": [
+        row("A社", "2024-01-01 10:00", "本文", extra_cell="<td><table><tr><td>添付</td></tr></table></td>"),
+        row("B社", "2024-01-02 11:00", "続き"),
+    ],
+}
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_streaming_matches_beautifulsoup(tmp_path, name):
+    path = tmp_path / f"{name}.html"
+    path.write_text(
+        "<html><body><table><tbody>" + "".join(PAGES[name]) + "</tbody></table></body></html>", encoding="utf-8"
+    )
+
+    streamed = []
+    count = stream_records_from_html(str(path), streamed.append)
+
+    expected = extract_records_from_html(str(path))
+    assert streamed == expected
+    assert count == len(expected)
+
+
+def test_nested_table_row_keeps_record(tmp_path):
+    path = tmp_path / "nested.html"
+    path.write_text("<table>" + "".join(PAGES["nested_table"]) + "</table>", encoding="utf-8")
+
+    streamed = []
+    stream_records_from_html(str(path), streamed.append)
+
+    assert [record["活動内容"] for record in streamed] == ["前半表のセル2行目後半", "続き"]
@@ -0,0 +1,114 @@
+import asyncio
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+from src.utils.analysis_runner import AnalysisRunner
+from src.utils.analysis_tasks import CHALLENGE_CLASSIFICATION_TASK as TASK
+from src.utils.cleansing_manifest import fingerprint_record
+from src.utils.label_propagation import AutoLabeledRows, LabelPropagator, LogisticRegressionModel, choose_thresholds
+
+from tests.conftest import write_csv
+
+spec = importlib.util.spec_from_file_location(
+    "train_label_propagation",
+    os.path.join(os.path.dirname(__file__), "..", "scripts", "train_label_propagation.py")
+)
+train_label_propagation = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(train_label_propagation)
+
+PROBABILITIES = np.array([0.9, 0.8, 0.7, 0.6, 0.4, 0.3, 0.2, 0.1])
+
+
+def test_choose_thresholds_keeps_precision_on_each_side():
+    probabilities = np.column_stack([PROBABILITIES, PROBABILITIES])
+    labels = np.array([
+        [1, 1], [1, 0], [0, 0], [1, 0], [0, 0], [0, 0], [0, 0], [0, 0],
+    ])
+
+    upper, lower = choose_thresholds(probabilities, labels, min_precision=0.75, min_support=2)
+
+    # 1列目: 上位4件（0.6以上）の適合率は3/4。0にする側は上側の閾値未満の0.4以下（4件とも0）
+    # 2列目: 正例が1件で件数不足のため1にしない。0にする側は全8件で適合率7/8
+    np.testing.assert_array_equal(upper, [0.6, np.inf])
+    np.testing.assert_array_equal(lower, [0.4, 0.9])
+
+
+def test_choose_thresholds_without_support_decides_nothing():
+    labels = np.array([[1], [0], [1], [0], [1], [0], [1], [0]])
+    upper, lower = choose_thresholds(PROBABILITIES[:, np.newaxis], labels, min_precision=0.75, min_support=5)
+    assert upper[0] == np.inf
+    assert lower[0] == -np.inf
+
+
+def identity_propagator(labels, auto_labeled=None):
+    """埋め込みの各次元をそのままラベルのロジットにするモデルの LabelPropagator（閾値は0.9 / 0.1）"""
+    dim = len(labels)
+    model = LogisticRegressionModel(
+        weights=np.eye(dim, dtype=np.float32), bias=np.zeros(dim, dtype=np.float32),
+        mean=np.zeros(dim, dtype=np.float32), scale=np.ones(dim, dtype=np.float32)
+    )
+    return LabelPropagator(
+        labels, model, upper=np.full(dim, 0.9), lower=np.full(dim, 0.1), embedder_name="test",
+        audit_rate=0.0, auto_labeled=auto_labeled
+    )
+
+
+def test_predict_returns_none_when_any_label_is_ambiguous():
+    propagator = identity_propagator(["a", "b"])
+    vectors = np.array([[5.0, -5.0], [5.0, 0.0], [-5.0, -5.0]])
+    assert propagator.predict(vectors) == [{"a": 1, "b": 0}, None, {"a": 0, "b": 0}]
+
+
+class FakeIndex:
+    """活動内容に対応する埋め込みを返すインデックス"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def vector_for(self, content):
+        return self.vectors.get(content)
+
+
+class FakeClient:
+    """すべてのラベルを1にした結果を返すクライアント"""
+
+    async def analyze_with_prompt(self, system_prompt, user_prompt, **kwargs):
+        return {label: 1 for label in TASK.propagation_labels}
+
+    def print_stats(self):
+        pass
+
+
+@pytest.mark.parametrize("batch_api", [False, True])
+def test_local_results_of_duplicates_are_not_used_for_training(workdir, batch_api):
+    labels = TASK.propagation_labels
+    rows = [
+        {"更新日時": "2024-01-01 10:00", "法人名": "A社", "活動内容": "確信度の高いログ"},
+        {"更新日時": "2024-01-02 10:00", "法人名": "B社", "活動内容": "曖昧なログ"},
+        {"更新日時": "2024-01-03 10:00", "法人名": "C社", "活動内容": "確信度の高いログ"},
+        {"更新日時": "2024-01-04 10:00", "法人名": "D社", "活動内容": "曖昧なログ"},
+    ]
+    os.makedirs(os.path.dirname(TASK.input_path))
+    write_csv(TASK.input_path, rows)
+
+    auto_labeled = AutoLabeledRows(os.path.join("data", "models", "auto.json"))
+    propagator = identity_propagator(labels, auto_labeled)
+    propagator.index = FakeIndex({
+        "確信度の高いログ": np.full(len(labels), -5.0, dtype=np.float32),
+        "曖昧なログ": np.zeros(len(labels), dtype=np.float32),
+    })
+    # Batch APIはローカルバックエンド（APIを呼ばない）で実行する
+    runner = AnalysisRunner(TASK, client=None if batch_api else FakeClient(), dedup=True, propagator=propagator)
+    if batch_api:
+        runner.run_batch_api("local")
+    else:
+        asyncio.run(runner.run())
+
+    # 重複行も代表と同じくローカル判定として記録される
+    assert auto_labeled.fingerprints == {fingerprint_record(rows[0]), fingerprint_record(rows[2])}
+    contents, matrix = train_label_propagation.load_labeled_rows(TASK, TASK.outputs[0].path, auto_labeled)
+    assert contents == ["曖昧なログ"]
+    assert matrix.shape == (1, len(labels))
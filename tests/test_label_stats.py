@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from src.utils import label_stats
+from src.utils.label_stats import LabelMatrix
+
+# a, b, c と該当なしの d
+VALUES = np.array([
+    [1, 1, 0, 0],
+    [1, 0, 0, 0],
+    [0, 1, 1, 0],
+    [1, 1, 1, 0],
+    [0, 0, 0, 0],
+])
+TIMESTAMPS = np.array(
+    ["2024-01-05T10:00", "2024-01-20T09:00", "NaT", "2024-03-01T00:00", "2024-03-31T23:59"],
+    dtype="datetime64[m]"
+)
+
+# 両方が1の行数（対角は各ラベルの件数）
+EXPECTED_COOCCURRENCE = np.array([
+    [3, 2, 1, 0],
+    [2, 3, 2, 0],
+    [1, 2, 2, 0],
+    [0, 0, 0, 0],
+])
+
+
+@pytest.fixture
+def matrix():
+    return LabelMatrix(["a", "b", "c", "d"], VALUES, TIMESTAMPS)
+
+
+@pytest.mark.parametrize("chunk_rows", [1_000_000, 2])
+def test_cooccurrence_counts_rows_with_both_labels(matrix, monkeypatch, chunk_rows):
+    monkeypatch.setattr(label_stats, "COOCCURRENCE_CHUNK_ROWS", chunk_rows)
+    np.testing.assert_array_equal(matrix.cooccurrence(), EXPECTED_COOCCURRENCE)
+    np.testing.assert_array_equal(matrix.cooccurrence(matrix.select(["c"])), EXPECTED_COOCCURRENCE[:, [2]])
+
+
+@pytest.mark.parametrize("chunk_rows", [1_000_000, 2])
+def test_lift_compares_with_independent_labels(matrix, monkeypatch, chunk_rows):
+    monkeypatch.setattr(label_stats, "COOCCURRENCE_CHUNK_ROWS", chunk_rows)
+    lift = matrix.lift()
+
+    # 5行で a, b は3件、c は2件: lift(a, b) = 2 * 5 / (3 * 3)
+    np.testing.assert_allclose(lift[:3, :3], [
+        [5 / 3, 10 / 9, 5 / 6],
+        [10 / 9, 5 / 3, 5 / 3],
+        [5 / 6, 5 / 3, 5 / 2],
+    ])
+    # 該当0件のラベルとの組はnan
+    assert np.isnan(lift[3]).all() and np.isnan(lift[:, 3]).all()
+
+
+def test_trend_counts_per_period_and_skips_missing_timestamps(matrix):
+    periods, totals, counts = matrix.trend("M")
+    np.testing.assert_array_equal(periods, np.array(["2024-01", "2024-03"], dtype="datetime64[M]"))
+    np.testing.assert_array_equal(totals, [2, 2])
+    np.testing.assert_array_equal(counts, [[2, 1, 0, 0], [1, 1, 1, 0]])
+
+    periods, totals, counts = matrix.trend("Y")
+    np.testing.assert_array_equal(periods, np.array(["2024"], dtype="datetime64[Y]"))
+    np.testing.assert_array_equal(totals, [4])
+    np.testing.assert_array_equal(counts, [[3, 2, 1, 0]])
+
+
+def test_trend_rejects_unknown_frequency(matrix):
+    with pytest.raises(ValueError):
+        matrix.trend("W")
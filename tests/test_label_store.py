@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.utils.label_stats import LabelMatrix
+from src.utils.label_store import LabelQuery, LabelStore, tokenize_query
+
+LABELS = ["シフトの欠員", "前払いニーズ", "福利厚生", "外部労働力への依存と 直接雇用強化のニーズ"]
+
+
+def make_store(values):
+    values = np.array(values, dtype=np.uint8)
+    # 1行目が 2024-01-01 10:00 で1日ずつ進む
+    timestamps = np.datetime64("2024-01-01T10:00", "m") + np.arange(len(values)) * np.timedelta64(1, "D")
+    companies = np.array([f"{i}社" for i in range(len(values))], dtype=object)
+    return LabelStore.from_matrix(LabelMatrix(LABELS, values, timestamps, companies))
+
+
+@pytest.fixture
+def store():
+    rng = np.random.default_rng(0)
+    # 64行の語の境界をまたぐ行数にする
+    return make_store(rng.integers(0, 2, size=(150, len(LABELS))))
+
+
+def test_tokenize_joins_words_and_quotes():
+    assert tokenize_query('シフトの欠員 and not ("前払いニーズ" OR 外部労働力への依存と 直接雇用強化のニーズ)') == [
+        ("label", "シフトの欠員"), ("op", "AND"), ("op", "NOT"), ("(", "("), ("label", "前払いニーズ"),
+        ("op", "OR"), ("label", "外部労働力への依存と 直接雇用強化のニーズ"), (")", ")"),
+    ]
+
+
+def test_query_matches_boolean_mask(store):
+    values = np.array([[label in store.labels_of(row) for label in LABELS] for row in range(len(store))])
+    a, b, c, d = values.T
+
+    cases = {
+        "シフトの欠員 AND 前払いニーズ AND NOT 福利厚生": a & b & ~c,
+        "シフトの欠員 OR 前払いニーズ AND 福利厚生": a | (b & c),
+        "(シフトの欠員 OR 前払いニーズ) AND 福利厚生": (a | b) & c,
+        "NOT NOT 福利厚生": c,
+        "NOT 外部労働力への依存と 直接雇用強化のニーズ": ~d,
+    }
+    for expression, mask in cases.items():
+        result = store.query(expression)
+        assert list(result.rows()) == list(np.flatnonzero(mask)), expression
+        assert result.count == int(mask.sum())
+
+
+def test_query_with_date_range(store):
+    result = store.query("福利厚生", start="2024-01-03", end="2024-01-10")
+    expected = [row for row in range(2, 10) if "福利厚生" in store.labels_of(row)]
+    assert list(result.rows()) == expected
+    assert result.companies() == [f"{row}社" for row in expected]
+
+
+@pytest.mark.parametrize("expression", ["", "シフトの欠員 AND", "(福利厚生", "福利厚生 )", "存在しないラベル"])
+def test_invalid_queries_raise(store, expression):
+    with pytest.raises(ValueError):
+        LabelQuery(store, expression).evaluate()
+
+
+def test_save_and_load_round_trip(store, tmp_path):
+    path = str(tmp_path / "labels.npz")
+    store.save(path)
+    loaded = LabelStore.load(path)
+    assert loaded.labels == store.labels
+    assert list(loaded.query("前払いニーズ OR 福利厚生").rows()) == list(store.query("前払いニーズ OR 福利厚生").rows())
+    assert loaded.company_rows("5社") == [5]
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+from src.utils.micro_batch import MicroBatcher
+
+
+class Prompts:
+    def get_system_prompt(self):
+        return "system"
+
+    def get_user_prompt(self, content):
+        return f"single:{content}"
+
+
+class DroppingClient:
+    """バッチの回答から指定した活動内容の結果を落とし、形式不正の結果も混ぜるクライアント"""
+
+    def __init__(self, drop, broken):
+        self.drop = drop
+        self.broken = broken
+        self.batch_sizes = []
+        self.singles = []
+
+    async def analyze_with_prompt(self, system_prompt, user_prompt, **kwargs):
+        if user_prompt.startswith("single:"):
+            content = user_prompt[len("single:"):]
+            self.singles.append(content)
+            return {"label": content}
+
+        batch = self._entries(user_prompt)
+        self.batch_sizes.append(len(batch))
+        results = []
+        for entry_id, content in batch:
+            if content in self.drop:
+                continue
+            if content in self.broken:
+                results.append({"id": entry_id, "unexpected": 1})
+            else:
+                results.append({"id": entry_id, "label": content})
+        # 範囲外・重複のIDは無視される
+        results.append({"id": "r999", "label": "x"})
+        return {"results": results}
+
+    @staticmethod
+    def _entries(user_prompt):
+        logs = json.loads(user_prompt.split("ログ一覧（JSON配列。\"id\" と \"活動内容\" の組）:\n", 1)[1])
+        return [(log["id"], log["活動内容"]) for log in logs]
+
+
+def test_missing_ids_are_resplit_until_answered():
+    contents = [f"ログ{i}" for i in range(8)]
+    client = DroppingClient(drop={"ログ2", "ログ5"}, broken={"ログ6"})
+    batcher = MicroBatcher(client, Prompts(), required_keys=["label"])
+
+    results = asyncio.run(batcher.run(contents))
+
+    assert results == [{"label": content} for content in contents]
+    # 最初は1バッチ。欠落した3件（ログ2, 5, 6）は1件と2件に分けて再リクエストし、最後は1件用プロンプト
+    assert client.batch_sizes[0] == 8
+    assert sorted(client.singles) == ["ログ2", "ログ5", "ログ6"]
+    assert batcher.stats["resplits"] >= 1
+
+
+def test_plan_batches_respects_max_batch_size():
+    batcher = MicroBatcher(DroppingClient(set(), set()), Prompts(), required_keys=["label"], max_batch_size=3)
+    batches = batcher.plan_batches([(f"r{i}", "内容") for i in range(7)])
+    assert [len(batch) for batch in batches] == [3, 3, 1]
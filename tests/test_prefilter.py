@@ -0,0 +1,74 @@
+import pytest
+
+from src.utils.prefilter import (
+    MODEL_REASON_SUFFIX, RULE_REASON_SUFFIX, NaiveBayesClassifier, PreFilter, is_local_verdict
+)
+
+
+class FixedModel:
+    """常に同じ確率を返すモデル"""
+
+    def __init__(self, probability):
+        self.probability = probability
+
+    def predict_proba(self, text):
+        return self.probability
+
+
+@pytest.mark.parametrize("content, reason", [
+    ("※本メールは送信専用アドレスから自動送信されています", "自動通知"),
+    ("件名: ご連絡\n差出人: 営業部\n資料をお送りします", "メール文面のみ"),
+    ("お世話になっております。資料を送付しました。よろしくお願いいたします。", "メール文面のみ"),
+    ("来週の候補日をご連絡", "日程調整のみ"),
+])
+def test_rules_exclude_obvious_non_business_logs(content, reason):
+    prefilter = PreFilter()
+    assert prefilter.classify(content) == {"is_valid": False, "reason": reason + RULE_REASON_SUFFIX}
+    assert prefilter.stats == {"rule": 1, "model": 0, "escalated": 0}
+
+
+def test_business_terms_disable_rules():
+    prefilter = PreFilter()
+    # 日程調整の語を含んでも、商談内容を示す語があればLLMに任せる
+    assert prefilter.classify("候補日を調整。採用の課題をヒアリングした") is None
+    # 長い日程調整の文はルールで決めない
+    assert prefilter.classify("日程" + "あ" * 80) is None
+    assert prefilter.stats == {"rule": 0, "model": 0, "escalated": 2}
+
+
+@pytest.mark.parametrize("probability, expected", [
+    (0.98, {"is_valid": True, "reason": "商談内容あり" + MODEL_REASON_SUFFIX}),
+    (0.97, None),
+    (0.03, None),
+    (0.02, {"is_valid": False, "reason": "商談内容なし" + MODEL_REASON_SUFFIX}),
+])
+def test_model_decides_only_beyond_threshold(probability, expected):
+    prefilter = PreFilter(model=FixedModel(probability), threshold=0.98)
+    assert prefilter.classify("訪問して話をした") == expected
+    assert prefilter.stats["model" if expected else "escalated"] == 1
+
+
+def test_rules_take_precedence_over_model():
+    prefilter = PreFilter(model=FixedModel(1.0))
+    assert prefilter.classify("配信停止はこちら")["reason"] == "自動通知" + RULE_REASON_SUFFIX
+    assert prefilter.stats["model"] == 0
+
+
+def test_naive_bayes_separates_trained_classes(tmp_path):
+    model = NaiveBayesClassifier()
+    model.train(
+        ["採用の課題をヒアリング", "提案内容を検討中", "自動送信のお知らせ", "配信停止のご案内"],
+        [True, True, False, False]
+    )
+    assert model.predict_proba("採用の課題を検討") > 0.5 > model.predict_proba("自動送信のご案内")
+
+    path = str(tmp_path / "model.json")
+    model.save(path)
+    assert NaiveBayesClassifier.load(path).predict_proba("採用の課題を検討") == model.predict_proba("採用の課題を検討")
+
+
+def test_local_verdicts_are_recognized_by_reason_suffix():
+    assert is_local_verdict({"is_valid": False, "reason": "日程調整のみ" + RULE_REASON_SUFFIX})
+    assert is_local_verdict({"is_valid": True, "reason": "商談内容あり" + MODEL_REASON_SUFFIX})
+    assert not is_local_verdict({"is_valid": True, "reason": "顧客の課題あり"})
+    assert not is_local_verdict({"is_valid": False})
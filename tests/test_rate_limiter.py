@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.openai_utils import AsyncOpenAIClient
+from src.utils.rate_limiter import RateLimitScheduler
+
+
+class FakeCompletions:
+    """chat.completions.with_raw_response の代わりに決まった content を返す"""
+
+    def __init__(self, content):
+        self.content = content
+        self.with_raw_response = self
+
+    async def create(self, **kwargs):
+        message = SimpleNamespace(content=self.content)
+        response = SimpleNamespace(usage=None, choices=[SimpleNamespace(message=message)])
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+
+def make_client(workdir, content, scheduler):
+    client = AsyncOpenAIClient(api_key="test", scheduler=scheduler, max_retries=0)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(content)))
+    return client
+
+
+@pytest.mark.parametrize("content", ['{"a": 1}', "not json", None, "[1, 2]"])
+def test_each_request_releases_once(workdir, content):
+    scheduler = RateLimitScheduler(initial_concurrency=4)
+
+    async def run():
+        client = make_client(workdir, content, scheduler)
+        return await client.analyze_with_prompt("system", "user", use_cache=False)
+
+    result = asyncio.run(run())
+    assert result == ({"a": 1} if content == '{"a": 1}' else None)
+    assert scheduler.in_flight == 0
+
+
+def test_cancel_while_waiting_for_budget_returns_slot():
+    # 1分あたり1リクエストなので2件目は予算待ちになる
+    scheduler = RateLimitScheduler(requests_per_minute=1, initial_concurrency=4)
+
+    async def run():
+        await scheduler.acquire(1)
+        waiting = asyncio.ensure_future(scheduler.acquire(1))
+        await asyncio.sleep(0.01)
+        assert scheduler.in_flight == 2
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await scheduler.release(estimated_tokens=1, used_tokens=1)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert scheduler.in_flight == 0
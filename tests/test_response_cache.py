@@ -0,0 +1,122 @@
+import json
+import types
+
+import pytest
+
+from src.utils import response_cache
+from src.utils.openai_utils import OpenAIClient
+from src.utils.response_cache import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """キャッシュの時刻を1秒ずつ進む値にする（同じ時刻で参照順が決まらなくなるのを避ける）"""
+    now = {"time": 1_000_000.0}
+
+    def tick():
+        now["time"] += 1
+        return now["time"]
+
+    monkeypatch.setattr(response_cache, "time", types.SimpleNamespace(time=tick))
+    return now
+
+
+def stored_keys(cache):
+    return {key for key, in cache._conn.execute("SELECT key FROM responses")}
+
+
+def test_evicts_least_recently_used_entries(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3})
+    cache.evict()
+
+    # 最後に参照したのは a → c の順なので、参照されていない b を削除する
+    assert stored_keys(cache) == {"a", "c"}
+    cache.close()
+
+
+def test_evicts_until_total_size_fits(tmp_path, clock):
+    value = {"v": "x" * 100}
+    size = len(json.dumps(value).encode("utf-8"))
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=2 * size)
+    for key in "abc":
+        cache.put(key, value)
+    cache.evict()
+    assert stored_keys(cache) == {"b", "c"}
+    cache.close()
+
+
+def test_expired_entries_are_misses_and_removed(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_age_days=1)
+    cache.put("old", {"v": 1})
+    clock["time"] += 86400
+    cache.put("new", {"v": 2})
+
+    assert cache.get("old") is None
+    assert cache.get("new") == {"v": 2}
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert stored_keys(cache) == {"new"}
+    cache.close()
+
+
+def test_bypass_skips_reads_but_still_writes(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path, bypass=True)
+    cache.put("key", {"v": 1})
+    assert cache.get("key") is None
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache.close()
+
+    cache = ResponseCache(path)
+    assert cache.get("key") == {"v": 1}
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_responses_without_required_keys_are_not_cached(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("partial", {"is_valid": True}, required_keys=["is_valid", "reason"])
+    cache.put("complete", {"is_valid": True, "reason": "商談"}, required_keys=["is_valid", "reason"])
+    assert stored_keys(cache) == {"complete"}
+
+    # 必須のキーを指定せずに保存済みの不完全な応答は、指定して読むとミスになり削除される
+    cache.put("legacy", {"unexpected": 1})
+    assert cache.get("legacy", required_keys=["is_valid"]) is None
+    assert stored_keys(cache) == {"complete"}
+    cache.close()
+
+
+class FakeCompletions:
+    """決まった内容の回答を返す chat.completions"""
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = types.SimpleNamespace(content=self.content)
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=message)],
+            usage=types.SimpleNamespace(prompt_tokens=10, prompt_tokens_details=None)
+        )
+
+
+@pytest.mark.parametrize("content, cached", [
+    ('{"is_valid": true, "reason": "商談"}', True),
+    ('{"unexpected": 1}', False),
+])
+def test_client_caches_only_complete_responses(tmp_path, content, cached):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    client = OpenAIClient(api_key="test", cache=cache)
+    completions = FakeCompletions(content)
+    client.client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+
+    for _ in range(2):
+        assert client.analyze_with_prompt("system", "user", required_keys=["is_valid"]) == json.loads(content)
+    assert completions.calls == (1 if cached else 2)
+    cache.close()
@@ -0,0 +1,77 @@
+import asyncio
+import os
+
+from src.utils.analysis_runner import AnalysisRunner
+from src.utils.analysis_tasks import CHALLENGE_CLASSIFICATION_TASK as TASK
+from src.utils.run_journal import RunJournal
+
+from tests.conftest import write_csv
+
+ROWS = [
+    {"更新日時": f"2024-01-0{i + 1} 10:00", "法人名": f"{name}社", "活動内容": f"{name}社との商談ログ"}
+    for i, name in enumerate("ABCDE")
+]
+
+
+class FakeClient:
+    """活動内容ごとに決まった回答を返し、failing に含む法人のログはエラー（None）にするクライアント"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    async def analyze_with_prompt(self, system_prompt, user_prompt, **kwargs):
+        name = next(row["法人名"] for row in ROWS if row["活動内容"] in user_prompt)
+        self.calls.append(name)
+        if name in self.failing:
+            return None
+        result = TASK.mock_response()
+        result[TASK.outputs[0].labels[ord(name[0]) % len(TASK.outputs[0].labels)]] = 1
+        return result
+
+    def print_stats(self):
+        pass
+
+
+def run(client, journal=None):
+    runner = AnalysisRunner(TASK, client=client, journal=journal)
+    asyncio.run(runner.run())
+    with open(TASK.outputs[0].path, "rb") as f:
+        return runner, f.read()
+
+
+def test_resumed_run_is_byte_identical_to_uninterrupted_run(workdir):
+    os.makedirs(os.path.dirname(TASK.input_path))
+    write_csv(TASK.input_path, ROWS)
+    _, expected = run(FakeClient())
+
+    journal = RunJournal.for_task(TASK, path="journal.sqlite3")
+    runner, first = run(FakeClient(failing={"B社", "D社"}), journal)
+    journal.close()
+    assert runner.stats["failed"] == 2
+    assert first != expected
+
+    journal = RunJournal.for_task(TASK, path="journal.sqlite3")
+    client = FakeClient()
+    runner, resumed = run(client, journal)
+    journal.close()
+
+    assert sorted(client.calls) == ["B社", "D社"]
+    assert journal.resumed == 3
+    assert runner.stats["failed"] == 0
+    assert resumed == expected
+
+
+def test_changed_prompt_discards_journal(workdir):
+    journal = RunJournal("task", "signature-1", path="journal.sqlite3")
+    journal.record("fingerprint", {"label": 1})
+    journal.close()
+
+    journal = RunJournal("task", "signature-1", path="journal.sqlite3")
+    assert journal.get("fingerprint") == {"label": 1}
+    journal.close()
+
+    journal = RunJournal("task", "signature-2", path="journal.sqlite3")
+    assert journal.discarded == 1
+    assert journal.get("fingerprint") is None
+    journal.close()
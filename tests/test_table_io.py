@@ -0,0 +1,54 @@
+import os
+
+import pyarrow.parquet as pq
+
+from src.utils.cleansing_manifest import fingerprint_record
+from src.utils.label_stats import read_label_names
+from src.utils.table_io import RECORD_COLUMN_TYPES, convert_csv_to_parquet, iter_records, resolve_input_path
+
+from tests.conftest import write_csv
+
+
+def test_parquet_round_trip_keeps_original_timestamps(tmp_path):
+    rows = [
+        {"更新日時": "2024-01-05 09:30", "法人名": "A社", "活動内容": "訪問"},
+        {"更新日時": "2024-01-05", "法人名": "B社", "活動内容": "電話"},
+        {"更新日時": "2024-1-5 9:30", "法人名": "C社", "活動内容": "メール"},
+        {"更新日時": "不明", "法人名": "D社", "活動内容": "面談"},
+        {"更新日時": "", "法人名": "E社", "活動内容": ""},
+    ]
+    csv_path = tmp_path / "records.csv"
+    write_csv(csv_path, rows)
+
+    writer = convert_csv_to_parquet(str(csv_path), RECORD_COLUMN_TYPES)
+    restored = list(iter_records(writer.path))
+
+    assert restored == list(iter_records(str(csv_path)))
+    assert [fingerprint_record(r) for r in restored] == [fingerprint_record(r) for r in rows]
+    # 日時型の列は解析できた値だけを持つ
+    typed = pq.read_table(writer.path, columns=["更新日時"]).column(0).to_pylist()
+    assert [value is not None for value in typed] == [True, True, True, False, False]
+    assert read_label_names(writer.path) == []
+
+
+def test_parquet_column_selection_keeps_original_timestamps(tmp_path):
+    csv_path = tmp_path / "records.csv"
+    write_csv(csv_path, [{"更新日時": "2024-01-05", "法人名": "A社", "活動内容": "訪問"}])
+    writer = convert_csv_to_parquet(str(csv_path), RECORD_COLUMN_TYPES)
+
+    assert list(iter_records(writer.path, columns=["更新日時"])) == [{"更新日時": "2024-01-05"}]
+
+
+def test_resolve_input_path_skips_parquet_older_than_csv(tmp_path):
+    csv_path = tmp_path / "records.csv"
+    write_csv(csv_path, [{"更新日時": "2024-01-05", "法人名": "A社", "活動内容": "訪問"}])
+    writer = convert_csv_to_parquet(str(csv_path), RECORD_COLUMN_TYPES)
+
+    assert resolve_input_path(str(csv_path), "parquet") == writer.path
+    assert resolve_input_path(str(csv_path), "csv") == str(csv_path)
+
+    # CSVを後から書き換えると、古いParquetではなくCSVを読む
+    write_csv(csv_path, [{"更新日時": "2024-01-06", "法人名": "B社", "活動内容": "電話"}])
+    modified = os.path.getmtime(writer.path) + 10
+    os.utime(csv_path, (modified, modified))
+    assert resolve_input_path(str(csv_path), "parquet") == str(csv_path)
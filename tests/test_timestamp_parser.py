@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import numpy as np
+
+from src.utils.timestamp_parser import TimestampParser, parse_timestamp
+
+
+def test_parse_timestamp_formats():
+    assert parse_timestamp("2024-03-05 09:07") == datetime(2024, 3, 5, 9, 7)
+    assert parse_timestamp("2024-03-05") == datetime(2024, 3, 5)
+    assert parse_timestamp("2024-3-5 9:07") == datetime(2024, 3, 5, 9, 7)
+    assert parse_timestamp("2024-02-30 10:00") is None
+    # 全角数字は固定幅の高速経路を通らず strptime で解析される
+    assert parse_timestamp("２０２４-03-05") == datetime(2024, 3, 5)
+    assert parse_timestamp("") is None
+    assert parse_timestamp(None) is None
+
+
+def test_parser_counts_unparseable_values_per_occurrence():
+    parser = TimestampParser()
+    values = ["2024-01-01 10:00", "不明", "2024-01-01 10:00", "不明", ""]
+
+    assert parser.parse_many(values)[0] == datetime(2024, 1, 1, 10, 0)
+    assert parser.report() == {"不明": 2, "": 1}
+
+
+def test_to_datetime64_matches_parse():
+    values = ["2024-01-01 10:00", "2024-1-2 3:04", "2024-01-03", "不明", ""]
+    converted = TimestampParser().to_datetime64(np.array(values, dtype=object))
+
+    expected = [parse_timestamp(value) for value in values]
+    assert [None if np.isnat(value) else value.astype(datetime) for value in converted] == expected
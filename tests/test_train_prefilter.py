@@ -0,0 +1,59 @@
+import importlib.util
+import os
+
+from src.utils.cleansing_manifest import CleansingManifest, fingerprint_record
+from src.utils.content_validator import VALIDATION_ERROR_REASON
+from src.utils.data_cleaner import merge_corporation_records
+
+from tests.conftest import write_csv
+
+spec = importlib.util.spec_from_file_location(
+    "train_prefilter", os.path.join(os.path.dirname(__file__), "..", "scripts", "train_prefilter.py")
+)
+train_prefilter = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(train_prefilter)
+
+RAW = [
+    {"更新日時": "2024-01-01 10:00", "法人名": "A社", "活動内容": "訪問して採用課題をヒアリングした"},
+    {"更新日時": "2024-01-02 10:00", "法人名": "A社", "活動内容": "提案資料を送付し次回の商談を設定"},
+    {"更新日時": "2024-01-03 10:00", "法人名": "B社", "活動内容": "お世話になっております。メールです"},
+    {"更新日時": "2024-01-04 10:00", "法人名": "C社", "活動内容": "まだ検証していない新しいログです"},
+]
+
+
+def write_raw():
+    os.makedirs("data/raw/人事", exist_ok=True)
+    write_csv("data/raw/人事/人事.csv", RAW)
+
+
+def test_labels_from_cleaned_and_excluded_skip_unvalidated_rows(workdir):
+    write_raw()
+    os.makedirs("data/cleaned", exist_ok=True)
+    write_csv("data/cleaned/人事_cleaned.csv", [merge_corporation_records("A社", RAW[:2])])
+    os.makedirs("data/excluded", exist_ok=True)
+    write_csv(
+        "data/excluded/人事_excluded.csv",
+        [{**RAW[2], "除外理由": "メール文面"}],
+        fieldnames=("更新日時", "法人名", "活動内容", "除外理由")
+    )
+
+    assert train_prefilter.load_labeled_contents("人事") == {
+        RAW[0]["活動内容"]: True,
+        RAW[1]["活動内容"]: True,
+        RAW[2]["活動内容"]: False,
+    }
+
+
+def test_labels_from_manifest_verdicts(workdir):
+    write_raw()
+    manifest = CleansingManifest("data/manifest/人事_manifest.json")
+    manifest.set_verdict(fingerprint_record(RAW[0]), {"is_valid": True, "reason": "商談"})
+    manifest.set_verdict(fingerprint_record(RAW[1]), {"is_valid": True, "reason": VALIDATION_ERROR_REASON})
+    manifest.set_verdict(fingerprint_record(RAW[2]), {"is_valid": False, "reason": "メール文面"})
+    os.makedirs("data/manifest", exist_ok=True)
+    manifest.save()
+
+    assert train_prefilter.load_labeled_contents("人事") == {
+        RAW[0]["活動内容"]: True,
+        RAW[2]["活動内容"]: False,
+    }